@@ -0,0 +1,289 @@
+"""
+Memory-mapped columnar applicant datasets for evaluate_batch().
+
+    python -m app.columnar convert applicants.jsonl applicants.cols
+    python -m app.columnar convert applicants.csv applicants.cols --fields credit_score,dti,income
+    python -m app.columnar score applicants.cols -o decisions.jsonl
+
+A dataset is a directory with one .npy file per field and a manifest.json:
+
+    {"version": 1, "rows": 1000000, "fields": {
+        "credit_score": {"kind": "numeric", "file": "000.npy"},
+        "region": {"kind": "categorical", "file": "001.npy", "categories": ["EU", "US"]}}}
+
+Numeric fields are float64 with NaN for missing values. Every other field
+(booleans, strings, mixed values) is categorical: small integer codes into
+the manifest's category list, -1 for missing/None. load_columns() opens the
+files with numpy memmaps, so scoring reads them without parsing or copying,
+and converting once lets every later run skip JSON entirely.
+
+Like the rest of evaluate_batch(), NaN is treated as missing. The converter
+reads its input once for the schema (twice if a field mixes numbers and other
+values) and once more for the values, writing in chunks, so memory use doesn't
+grow with the number of rows.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.rules import (DEFAULT_POLICY_PATH, CompiledPolicy, DecisionBatch, compile_policy, evaluate_batch, get_policy,
+                       load_policy)
+from app.score import DEFAULT_CHUNK_SIZE, OUTPUT_BUFFER_BYTES, _encoded_decisions, read_chunks
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+class Categorical:
+    """A categorical column: integer codes (-1 = missing) into `categories`."""
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes: Any, categories: Sequence[Any]):
+        self.codes = codes
+        self.categories = list(categories)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def eq_mask(self, value: Any):
+        """Rows whose value == `value` (Python equality, as in _matches())."""
+        import numpy as np
+
+        if value is None:
+            return np.asarray(self.codes == -1)
+        hits = [i for i, c in enumerate(self.categories) if _equal(c, value)]
+        return np.isin(self.codes, hits)
+
+    def floats(self):
+        """The column as float64 with NaN for missing; raises ValueError like float() would."""
+        import numpy as np
+
+        lookup = np.array([float(c) for c in self.categories] + [math.nan], dtype=np.float64)
+        return lookup[self.codes]     # code -1 picks the trailing NaN
+
+
+def _equal(a: Any, b: Any) -> bool:
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _csv_value(text: str) -> Any:
+    if text == "":
+        return None
+    low = text.lower()
+    if low in ("true", "false"):
+        return low == "true"
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def read_rows(path: Path, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield applicant dicts from a JSONL or CSV file (format from the suffix unless given)."""
+    path = Path(path)
+    fmt = fmt or ("csv" if path.suffix.lower() == ".csv" else "jsonl")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield {k: _csv_value(v) for k, v in row.items()}
+        else:
+            for chunk in read_chunks(f):
+                yield from chunk
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _infer_schema(src: Path, fmt: Optional[str], fields: Optional[Sequence[str]]) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    # Distinct values are only collected for non-numeric fields, so a numeric
+    # column with millions of distinct values costs nothing here.
+    n = 0
+    numeric: Dict[str, bool] = {f: True for f in fields or ()}
+    categories: Dict[str, Dict[Any, None]] = {f: {} for f in fields or ()}
+    for row in read_rows(src, fmt):
+        n += 1
+        for field, value in row.items():
+            if field not in numeric:
+                if fields is not None:
+                    continue
+                numeric[field], categories[field] = True, {}
+            if value is None or _is_number(value):
+                continue
+            numeric[field] = False
+            try:
+                categories[field].setdefault(value)
+            except TypeError:
+                raise ValueError(f"field {field!r}: unhashable value {value!r} can't be stored in a column") from None
+
+    mixed = [f for f, is_numeric in numeric.items() if not is_numeric]
+    if mixed:
+        # Categorical fields may also hold numbers; collect those in a second pass.
+        for row in read_rows(src, fmt):
+            for field in mixed:
+                value = row.get(field)
+                if _is_number(value) and value == value:
+                    categories[field].setdefault(value)
+
+    schema: Dict[str, Dict[str, Any]] = {}
+    for field, is_numeric in numeric.items():
+        if is_numeric:
+            schema[field] = {"kind": "numeric"}
+        else:
+            # Equal values (1, 1.0, True) share a category, which keeps == semantics.
+            schema[field] = {"kind": "categorical", "categories": list(categories[field])}
+    return n, schema
+
+
+def _code_dtype(n_categories: int) -> str:
+    for dtype, limit in (("int8", 127), ("int16", 32767)):
+        if n_categories <= limit:
+            return dtype
+    return "int32"
+
+
+def convert(
+    src: Path,
+    dst: Path,
+    fields: Optional[Sequence[str]] = None,
+    fmt: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Convert a JSONL/CSV file of applicants into a columnar dataset directory; returns the manifest."""
+    import numpy as np
+
+    n, schema = _infer_schema(src, fmt, fields)
+    dst = Path(dst)
+    dst.mkdir(parents=True, exist_ok=True)
+
+    columns: Dict[str, Any] = {}
+    codes: Dict[str, Dict[Any, int]] = {}
+    for i, (field, spec) in enumerate(schema.items()):
+        spec["file"] = f"{i:03d}.npy"
+        if spec["kind"] == "numeric":
+            dtype = np.float64
+        else:
+            dtype = np.dtype(_code_dtype(len(spec["categories"])))
+            codes[field] = {c: k for k, c in enumerate(spec["categories"])}
+        columns[field] = np.lib.format.open_memmap(dst / spec["file"], mode="w+", dtype=dtype, shape=(n,))
+
+    rows = read_rows(src, fmt)
+    start = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        end = start + len(chunk)
+        for field, column in columns.items():
+            if field in codes:
+                lookup = codes[field]
+                # None and NaN (which equals nothing) are stored as missing.
+                column[start:end] = [lookup.get(v, -1) if (v := row.get(field)) is not None else -1 for row in chunk]
+            else:
+                column[start:end] = [math.nan if (v := row.get(field)) is None else v for row in chunk]
+        start = end
+    for column in columns.values():
+        column.flush()
+    del columns
+
+    manifest = {"version": FORMAT_VERSION, "rows": n, "fields": schema}
+    tmp = dst / f".{MANIFEST}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, dst / MANIFEST)
+    return manifest
+
+
+def load_columns(path: Path, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Memory-map a dataset written by convert() as evaluate_batch() columns."""
+    import numpy as np
+
+    path = Path(path)
+    manifest = json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported columnar format version {manifest.get('version')!r}")
+
+    columns: Dict[str, Any] = {}
+    for field, spec in manifest["fields"].items():
+        if fields is not None and field not in fields:
+            continue
+        data = np.load(path / spec["file"], mmap_mode="r")
+        if len(data) != manifest["rows"]:
+            raise ValueError(f"{path}: column {field!r} has {len(data)} rows, manifest says {manifest['rows']}")
+        columns[field] = data if spec["kind"] == "numeric" else Categorical(data, spec["categories"])
+    return columns
+
+
+def score_dataset(path: Path, policy=None) -> DecisionBatch:
+    """evaluate_batch() over a columnar dataset, mapping only the fields the policy uses."""
+    import numpy as np
+
+    if policy is None:
+        policy = get_policy()
+    elif not isinstance(policy, CompiledPolicy):
+        policy = compile_policy(policy)
+    columns = load_columns(path, policy.fields)
+    if not columns:
+        # No referenced field was stored: every row is missing every field.
+        rows = json.loads((Path(path) / MANIFEST).read_text(encoding="utf-8"))["rows"]
+        columns = {"__rows__": np.zeros(rows, dtype=np.float64)}
+    return evaluate_batch(columns, policy)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.columnar", description="Columnar applicant datasets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="JSONL/CSV -> columnar dataset directory")
+    conv.add_argument("input", type=Path)
+    conv.add_argument("output", type=Path)
+    conv.add_argument("--format", choices=["jsonl", "csv"], help="input format (default: from the file suffix)")
+    conv.add_argument("--fields", help="comma-separated fields to keep (default: the fields --policy references)")
+    conv.add_argument("--all-fields", action="store_true", help="keep every field in the input")
+    conv.add_argument("--policy", type=Path, default=DEFAULT_POLICY_PATH)
+    score = sub.add_parser("score", help="score a columnar dataset, writing decisions JSONL in row order")
+    score.add_argument("dataset", type=Path)
+    score.add_argument("-o", "--output", default="-")
+    score.add_argument("--policy", type=Path, default=DEFAULT_POLICY_PATH)
+    score.add_argument("--rule-index", action="store_true")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "convert":
+        if args.all_fields:
+            fields = None
+        elif args.fields:
+            fields = [f for f in args.fields.split(",") if f]
+        else:
+            fields = list(compile_policy(load_policy(args.policy)).fields)
+        manifest = convert(args.input, args.output, fields, args.format)
+        print(f"wrote {manifest['rows']} rows x {len(manifest['fields'])} fields to {args.output} "
+              f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return 0
+
+    policy = compile_policy(load_policy(args.policy))
+    batch = score_dataset(args.dataset, policy)
+    encoded = _encoded_decisions(policy, args.rule_index)
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_BYTES)
+    try:
+        rule_index = batch.rule_index.tolist()
+        for k in range(0, len(rule_index), DEFAULT_CHUNK_SIZE):
+            dst.write("".join(encoded[i] + "\n" for i in rule_index[k:k + DEFAULT_CHUNK_SIZE]))
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+    elapsed = time.perf_counter() - start
+    print(f"scored {len(batch.codes)} rows in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Compare two policy versions over a dataset in a single pass.
+
+    python -m app.impact applicants.jsonl --old-policy old.json --new-policy docs/policy.json \\
+        -o diffs.jsonl --summary summary.json
+
+Each applicant is evaluated once under the old policy; its new decision is
+derived from the old first match with app.incremental, so rules that are the
+same in both versions are only ever checked once. Only applicants whose
+decision or reason_ids differ are written out, and the summary holds the
+decision transition matrix. Input is read in chunks, so memory does not grow
+with the dataset.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from app.incremental import IncrementalRescorer
+from app.rules import DEFAULT_POLICY_PATH, CompiledPolicy, compile_policy, load_policy
+from app.score import DEFAULT_CHUNK_SIZE, OUTPUT_BUFFER_BYTES, read_chunks
+
+
+class ImpactAnalysis:
+    def __init__(self, old: CompiledPolicy, new: CompiledPolicy):
+        self.old = old
+        self.new = new
+        self.rescorer = IncrementalRescorer(old, new)
+        self.transitions: Counter = Counter()     # (old decision, new decision) -> applicants
+        self.total = 0
+        self.changed = 0
+        # (old index, new index) -> encoded diff body, or None if the outcome is the same.
+        self._diffs: Dict[Tuple[int, int], Optional[str]] = {}
+        # Decision per rule index, default last so that [-1] finds it.
+        self._old_decisions = [r.decision for r in old.rules] + [old.default_decision]
+        self._new_decisions = [r.decision for r in new.rules] + [new.default_decision]
+
+    def _diff(self, old_index: int, new_index: int) -> Optional[str]:
+        key = (old_index, new_index)
+        if key not in self._diffs:
+            before, after = self.old.decision_at(old_index), self.new.decision_at(new_index)
+            if before.decision == after.decision and before.reason_ids == after.reason_ids:
+                self._diffs[key] = None
+            else:
+                self._diffs[key] = json.dumps({
+                    "old": {"decision": before.decision, "reason_ids": before.reason_ids, "reasons": before.reasons},
+                    "new": {"decision": after.decision, "reason_ids": after.reason_ids, "reasons": after.reasons},
+                })
+        return self._diffs[key]
+
+    def compare(self, applicant: Dict[str, Any]) -> Tuple[int, int]:
+        """Old and new first-match positions for one applicant, counted into the summary."""
+        old_index = self.old.first_match(applicant)
+        new_index = self.rescorer.rescore(applicant, old_index)
+        self.total += 1
+        self.transitions[(self._old_decisions[old_index], self._new_decisions[new_index])] += 1
+        return old_index, new_index
+
+    def diff_chunks(self, chunks: Iterable[List[Dict[str, Any]]], id_field: Optional[str] = "id") -> Iterator[str]:
+        """Yield one block of JSONL diff records per input chunk (possibly empty)."""
+        for chunk in chunks:
+            out = []
+            for applicant in chunk:
+                body = self._diff(*self.compare(applicant))
+                if body is None:
+                    continue
+                self.changed += 1
+                if id_field is not None and id_field in applicant:
+                    body = f"{{{json.dumps(id_field)}: {json.dumps(applicant[id_field])}, {body[1:]}"
+                out.append(body + "\n")
+            yield "".join(out)
+
+    def summary(self) -> Dict[str, Any]:
+        matrix: Dict[str, Dict[str, int]] = {}
+        for (before, after), n in sorted(self.transitions.items()):
+            matrix.setdefault(before, {})[after] = n
+        return {
+            "applicants": self.total,
+            "changed": self.changed,
+            "transitions": matrix,
+            "rules_added_or_changed": len(self.rescorer.changed),
+        }
+
+
+def diff_stream(
+    lines: Iterable[str],
+    out: TextIO,
+    analysis: ImpactAnalysis,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    id_field: Optional[str] = "id",
+) -> Dict[str, Any]:
+    """Write diff records for JSONL `lines` to `out`; returns the summary."""
+    for block in analysis.diff_chunks(read_chunks(lines, chunk_size), id_field):
+        out.write(block)
+    return analysis.summary()
+
+
+def format_matrix(transitions: Dict[str, Dict[str, int]]) -> str:
+    decisions = sorted(set(transitions) | {d for row in transitions.values() for d in row})
+    width = max([len("old \\ new")] + [len(d) for d in decisions]) + 2
+    lines = ["old \\ new".ljust(width) + "".join(d.rjust(width) for d in decisions)]
+    for before in decisions:
+        row = transitions.get(before, {})
+        lines.append(before.ljust(width) + "".join(str(row.get(after, 0)).rjust(width) for after in decisions))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.impact", description="Diff decisions of two policy versions.")
+    parser.add_argument("input", nargs="?", default="-", help="applicants JSONL file (default: stdin)")
+    parser.add_argument("--old-policy", type=Path, required=True)
+    parser.add_argument("--new-policy", type=Path, default=DEFAULT_POLICY_PATH)
+    parser.add_argument("-o", "--output", default="-", help="changed decisions JSONL (default: stdout)")
+    parser.add_argument("--summary", type=Path, help="write the summary JSON here")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--id-field", default="id")
+    args = parser.parse_args(argv)
+
+    analysis = ImpactAnalysis(compile_policy(load_policy(args.old_policy)), compile_policy(load_policy(args.new_policy)))
+
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_BYTES)
+    start = time.perf_counter()
+    try:
+        summary = diff_stream(src, dst, analysis, args.chunk_size, args.id_field)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+        else:
+            dst.flush()
+    elapsed = time.perf_counter() - start
+
+    if args.summary:
+        args.summary.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    print(f"compared {summary['applicants']} records in {elapsed:.2f}s, {summary['changed']} changed", file=sys.stderr)
+    print(format_matrix(summary["transitions"]), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Incremental re-scoring after a policy change.
+
+Given each applicant's first-match position under the old policy (as written
+by `python -m app.score --rule-index`), only the rules that could change the
+outcome are evaluated under the new policy:
+
+* if the old first match is unchanged in the new policy, only added/changed
+  rules ahead of it are checked; everything else ahead of it already failed;
+* if the applicant had no match, only added/changed rules are checked;
+* if the old first match was removed or changed, the applicant is fully
+  re-evaluated.
+
+A rule is "unchanged" when its id, decision, reason and conditions are the
+same and its order relative to the other unchanged rules is preserved. The
+result equals a full rescore with the new policy.
+
+    python -m app.incremental applicants.jsonl old_decisions.jsonl \\
+        --old-policy old.json --new-policy docs/policy.json -o new_decisions.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.rules import DEFAULT_POLICY_PATH, CompiledPolicy, CompiledRule, compile_policy, load_policy
+from app.score import OUTPUT_BUFFER_BYTES, _encoded_decisions
+
+
+def rule_signature(rule: CompiledRule) -> Tuple[Any, ...]:
+    # repr() keeps unhashable _eq values usable and tells 1 / 1.0 / True apart,
+    # which can only make the diff more conservative.
+    return rule.id, rule.decision, rule.reason, tuple((c.field, c.op, repr(c.value)) for c in rule.conditions)
+
+
+class IncrementalRescorer:
+    def __init__(self, old: CompiledPolicy, new: CompiledPolicy):
+        self.old = old
+        self.new = new
+
+        old_pos: Dict[Tuple[Any, ...], int] = {}
+        for i, rule in enumerate(old.rules):
+            old_pos.setdefault(rule_signature(rule), i)
+
+        # The longest strictly increasing run of old positions (patience
+        # sort, O(n log n)) stays unchanged; every other rule counts as
+        # added/changed, so moving one rule only marks that rule.
+        matched = [(q, old_pos.get(rule_signature(rule))) for q, rule in enumerate(new.rules)]
+        matched = [(q, o) for q, o in matched if o is not None]
+        tails: List[int] = []          # smallest old position ending a run of each length
+        tail_at: List[int] = []        # index into `matched` of that run's last rule
+        previous: List[int] = []
+        for k, (_, o) in enumerate(matched):
+            length = bisect_left(tails, o)
+            if length == len(tails):
+                tails.append(o)
+                tail_at.append(k)
+            else:
+                tails[length] = o
+                tail_at[length] = k
+            previous.append(tail_at[length - 1] if length else -1)
+
+        self.new_position_of_old: Dict[int, int] = {}
+        k = tail_at[-1] if tail_at else -1
+        while k >= 0:
+            q, o = matched[k]
+            self.new_position_of_old[o] = q
+            k = previous[k]
+        kept = set(self.new_position_of_old.values())
+        self.changed: List[int] = [q for q in range(len(new.rules)) if q not in kept]
+
+        self.rules_checked = 0
+        self.full_evaluations = 0
+        self.skipped = 0
+
+    def rescore(self, applicant: Dict[str, Any], old_index: int) -> int:
+        """New first-match position for an applicant whose old one was `old_index`."""
+        if old_index < 0:
+            bound, fallback = len(self.new.rules), -1
+        else:
+            q = self.new_position_of_old.get(old_index)
+            if q is None:
+                self.full_evaluations += 1
+                return self.new.first_match(applicant)
+            bound, fallback = q, q
+
+        rules = self.new.rules
+        candidates = self.changed[:bisect_left(self.changed, bound)]
+        if not candidates:
+            self.skipped += 1
+        for q in candidates:
+            self.rules_checked += 1
+            if rules[q].match(applicant):
+                return q
+        return fallback
+
+    def rescore_all(self, applicants: Iterable[Dict[str, Any]], old_indices: Iterable[int]) -> Iterator[int]:
+        for applicant, old_index in zip(applicants, old_indices):
+            yield self.rescore(applicant, old_index)
+
+
+def _jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.incremental", description="Re-score only what a policy change can affect.")
+    parser.add_argument("applicants", help="applicants JSONL (same order as the previous decisions)")
+    parser.add_argument("previous", help="decisions JSONL from `python -m app.score --rule-index` under the old policy")
+    parser.add_argument("--old-policy", type=Path, required=True)
+    parser.add_argument("--new-policy", type=Path, default=DEFAULT_POLICY_PATH)
+    parser.add_argument("-o", "--output", default="-", help="new decisions JSONL (default: stdout)")
+    parser.add_argument("--id-field", default="id")
+    args = parser.parse_args(argv)
+
+    rescorer = IncrementalRescorer(compile_policy(load_policy(args.old_policy)),
+                                   compile_policy(load_policy(args.new_policy)))
+    encoded = _encoded_decisions(rescorer.new, with_rule_index=True)
+
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_BYTES)
+    start = time.perf_counter()
+    count = 0
+    try:
+        previous = _jsonl(args.previous)
+        for applicant in _jsonl(args.applicants):
+            old = next(previous, None)
+            if old is None or "rule_index" not in old:
+                raise ValueError(f"record {count + 1}: previous decisions must be written with --rule-index, one per applicant")
+            record = encoded[rescorer.rescore(applicant, old["rule_index"])]
+            if args.id_field in applicant:
+                record = f"{{{json.dumps(args.id_field)}: {json.dumps(applicant[args.id_field])}, {record[1:]}"
+            dst.write(record + "\n")
+            count += 1
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"rescored {count} records in {elapsed:.2f}s: {rescorer.skipped} untouched, "
+          f"{rescorer.full_evaluations} fully re-evaluated, {rescorer.rules_checked} rule checks",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
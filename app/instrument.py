@@ -0,0 +1,179 @@
+"""
+Opt-in instrumentation for app.rules.evaluate().
+
+    from app import instrument
+    instrument.enable()
+    ...
+    instrument.snapshot()        # dict
+    instrument.to_prometheus()   # Prometheus text exposition format
+
+While disabled, evaluate() only checks one module global. While enabled,
+every thread counts into its own stats object, so the hot path takes no
+locks; snapshot() merges the per-thread stats. Only first-match calls
+(the default evaluate() mode) are instrumented. Each call runs the
+policy's counted_first_match(), the compiled first_match() (RuleIndex or
+generated scan) with a counter added, so the predicate count is what that
+evaluation actually checked and latency covers it alone. Raw policy dicts
+are interpreted as evaluate() does, with each condition counted as it is
+checked.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app import rules
+from app.rules import CompiledPolicy, Decision, _matches, get_policy
+
+# Upper bounds (seconds) of the evaluate() latency histogram buckets.
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, float("inf"))
+
+
+class _ThreadStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.decisions: Counter = Counter()
+        self.rule_hits: Counter = Counter()
+        self.predicates: Counter = Counter()       # predicates evaluated per call -> calls
+        self.latency = [0] * len(LATENCY_BUCKETS)  # non-cumulative bucket counts
+        self.latency_sum = 0.0
+
+
+_local = threading.local()
+_all_stats: List[_ThreadStats] = []
+_registry_lock = threading.Lock()
+
+
+def _stats() -> _ThreadStats:
+    stats = getattr(_local, "stats", None)
+    if stats is None:
+        stats = _local.stats = _ThreadStats()
+        with _registry_lock:
+            _all_stats.append(stats)
+    return stats
+
+
+def _interpret_counted(applicant: Dict[str, Any], policy: Dict[str, Any]) -> Tuple[Decision, int]:
+    """First-match rules._interpret() that also returns the conditions it checked."""
+    checked = 0
+    for rule in policy.get("rules", []):
+        for key, value in rule.get("conditions", {}).items():
+            checked += 1
+            if not _matches({key: value}, applicant):
+                break
+        else:
+            return Decision(decision=rule["decision"], reason_ids=[rule["id"]], reasons=[rule.get("reason", "")]), checked
+    return Decision(decision=policy.get("default_decision", "approve"), reason_ids=[], reasons=[]), checked
+
+
+def _instrumented_evaluate(applicant: Dict[str, Any], policy: Union[Dict[str, Any], CompiledPolicy, None] = None) -> Decision:
+    if policy is None:
+        policy = get_policy()
+    if isinstance(policy, CompiledPolicy):
+        counted = policy.counted_first_match()
+        start = time.perf_counter()
+        index, checked = counted(applicant)
+        decision = policy.decision_at(index)
+        elapsed = time.perf_counter() - start
+    else:
+        start = time.perf_counter()
+        decision, checked = _interpret_counted(applicant, policy)
+        elapsed = time.perf_counter() - start
+
+    stats = _stats()
+    stats.calls += 1
+    stats.decisions[decision.decision] += 1
+    if decision.reason_ids:
+        stats.rule_hits[decision.reason_ids[0]] += 1
+    stats.predicates[checked] += 1
+    stats.latency[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+    stats.latency_sum += elapsed
+    return decision
+
+
+def enable() -> None:
+    rules._instrumentation = _instrumented_evaluate
+
+
+def disable() -> None:
+    rules._instrumentation = None
+
+
+def is_enabled() -> bool:
+    return rules._instrumentation is not None
+
+
+def reset() -> None:
+    with _registry_lock:
+        for stats in _all_stats:
+            stats.__init__()
+
+
+def snapshot() -> Dict[str, Any]:
+    """Merged counters from every thread."""
+    calls = 0
+    decisions: Counter = Counter()
+    rule_hits: Counter = Counter()
+    predicates: Counter = Counter()
+    latency = [0] * len(LATENCY_BUCKETS)
+    latency_sum = 0.0
+    with _registry_lock:
+        for stats in _all_stats:
+            # Other threads keep counting while we merge: dict() copies a
+            # Counter in one step, iterating it live could see it resize.
+            calls += stats.calls
+            decisions.update(dict(stats.decisions))
+            rule_hits.update(dict(stats.rule_hits))
+            predicates.update(dict(stats.predicates))
+            latency = [a + b for a, b in zip(latency, list(stats.latency))]
+            latency_sum += stats.latency_sum
+
+    cumulative, running = {}, 0
+    for bound, count in zip(LATENCY_BUCKETS, latency):
+        running += count
+        cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+    return {
+        "calls": calls,
+        "decisions": dict(decisions),
+        "rule_hits": dict(rule_hits.most_common()),
+        "predicates_per_call": dict(sorted(predicates.items())),
+        "predicates_total": sum(n * c for n, c in predicates.items()),
+        "latency_seconds": {"buckets": cumulative, "sum": latency_sum, "count": calls},
+    }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(snap: Optional[Dict[str, Any]] = None) -> str:
+    """Render snapshot() in the Prometheus text exposition format."""
+    snap = snapshot() if snap is None else snap
+    lines = [
+        "# HELP rules_evaluate_calls_total evaluate() calls.",
+        "# TYPE rules_evaluate_calls_total counter",
+        f"rules_evaluate_calls_total {snap['calls']}",
+        "# HELP rules_decisions_total Decisions returned by evaluate().",
+        "# TYPE rules_decisions_total counter",
+    ]
+    lines += [f'rules_decisions_total{{decision="{_label(d)}"}} {n}' for d, n in sorted(snap["decisions"].items())]
+    lines += [
+        "# HELP rules_rule_hits_total Times each rule was the first match.",
+        "# TYPE rules_rule_hits_total counter",
+    ]
+    lines += [f'rules_rule_hits_total{{rule="{_label(r)}"}} {n}' for r, n in sorted(snap["rule_hits"].items())]
+    lines += [
+        "# HELP rules_predicates_evaluated_total Rule conditions checked by evaluate().",
+        "# TYPE rules_predicates_evaluated_total counter",
+        f"rules_predicates_evaluated_total {snap['predicates_total']}",
+        "# HELP rules_evaluate_latency_seconds evaluate() latency.",
+        "# TYPE rules_evaluate_latency_seconds histogram",
+    ]
+    latency = snap["latency_seconds"]
+    lines += [f'rules_evaluate_latency_seconds_bucket{{le="{le}"}} {n}' for le, n in latency["buckets"].items()]
+    lines += [
+        f"rules_evaluate_latency_seconds_sum {latency['sum']}",
+        f"rules_evaluate_latency_seconds_count {latency['count']}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,110 @@
+"""
+Bounded LRU memoization of first-match decisions.
+
+    from app.memo import DecisionMemo
+    memo = DecisionMemo(maxsize=100_000)
+    memo.evaluate(applicant)        # same result as app.rules.evaluate(applicant)
+    memo.stats()
+
+The key is the tuple of the applicant's values for the fields the policy
+references (CompiledPolicy.fields), so unrelated fields such as ids or
+timestamps don't defeat the cache. Values that compare equal give the same
+decision under _matches() (1, 1.0 and True included), so equal keys are safe
+to share. Applicants with unhashable values (e.g. lists) are evaluated without
+caching. The memo remembers which CompiledPolicy its entries belong to and
+starts over when evaluate() is called with a different one, which is what
+get_policy() returns after docs/policy.json changes.
+
+A hit costs about as much as building the key (a few microseconds), so the
+memo only pays off for policies whose first_match() is slower than that, e.g.
+hundreds of rules; evaluate() and the scoring CLIs don't go through it.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+from app.rules import DEFAULT_POLICY_PATH, CompiledPolicy, Decision, evaluate, get_policy
+
+DEFAULT_MAXSIZE = 65_536
+
+
+class DecisionMemo:
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, policy_path=DEFAULT_POLICY_PATH):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy_path = policy_path
+        # (policy, entries) is replaced as a whole on invalidation, so a reader
+        # that took one snapshot never mixes one policy with another's entries.
+        self._state: Tuple[Optional[CompiledPolicy], "OrderedDict[tuple, Decision]"] = (None, OrderedDict())
+        self._lock = threading.Lock()
+        self._stats = {"misses": 0, "evictions": 0, "uncacheable": 0, "invalidations": 0}
+        self._hits = 0            # bumped without the lock; may undercount slightly under contention
+
+    def evaluate(self, applicant: Dict[str, Any], policy: Union[Dict[str, Any], CompiledPolicy, None] = None) -> Decision:
+        """
+        First-match decision for `applicant`; raw policy dicts are passed to
+        app.rules.evaluate() uncached. Cached Decisions are shared between
+        callers, so don't mutate the result.
+        """
+        if policy is None:
+            policy = get_policy(self.policy_path)
+        elif not isinstance(policy, CompiledPolicy):
+            return evaluate(applicant, policy)
+
+        key = tuple(map(applicant.get, policy.fields))
+        cached_policy, entries = self._state
+        if policy is cached_policy:
+            # Lock-free hit path: single OrderedDict operations are atomic under
+            # the GIL, and a concurrent eviction just turns this into a miss.
+            try:
+                decision = entries.get(key)
+            except TypeError:     # unhashable value in the key
+                with self._lock:
+                    self._stats["uncacheable"] += 1
+                return policy.evaluate(applicant)
+            if decision is not None:
+                try:
+                    entries.move_to_end(key)
+                except KeyError:
+                    pass
+                self._hits += 1
+                return decision
+        else:
+            try:
+                hash(key)
+            except TypeError:
+                with self._lock:
+                    self._stats["uncacheable"] += 1
+                return policy.evaluate(applicant)
+
+        decision = policy.evaluate(applicant)
+        with self._lock:
+            self._stats["misses"] += 1
+            cached_policy, entries = self._state
+            if policy is not cached_policy:
+                if cached_policy is not None:
+                    self._stats["invalidations"] += 1
+                entries = OrderedDict()
+                self._state = (policy, entries)
+            entries[key] = decision
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current size and hit rate (hits / cacheable lookups)."""
+        with self._lock:
+            stats: Dict[str, Any] = {"hits": self._hits, **self._stats}
+            stats["size"] = len(self._state[1])
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state = (None, OrderedDict())
+            for key in self._stats:
+                self._stats[key] = 0
+            self._hits = 0
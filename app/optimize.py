@@ -0,0 +1,201 @@
+"""
+Static analysis of a policy: find rules that can never be the first match.
+
+    python -m app.optimize docs/policy.json               # report
+    python -m app.optimize docs/policy.json -o lean.json  # report + pruned policy
+
+Each rule's conditions are reduced to one constraint per field: an open
+interval from its _lt/_gt thresholds and/or a required _eq/boolean value.
+A rule is
+
+* "contradictory" if no applicant can satisfy it (two different _eq values,
+  an _eq value outside the rule's own range, a range combined with None);
+* "shadowed" if an earlier rule matches every applicant it matches and
+  decides differently, so it can never fire;
+* "redundant" if the same holds but the earlier rule has the same decision;
+* "nan_only" if its range is empty except for NaN, which passes every
+  _lt/_gt check in _matches(). Such rules are reported but kept.
+
+Coverage is checked rule against rule, not against a union of earlier rules,
+so the report never has false positives but can miss rules that only a
+combination of earlier rules covers. Pruning keeps first-match decisions for
+every applicant the original policy evaluates without raising; it does change
+the all/severity evaluate() modes, which see every matching rule.
+"""
+import argparse
+import json
+import math
+import sys
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from app.rules import DEFAULT_POLICY_PATH, _parse_condition, load_policy
+
+UNREACHABLE = ("contradictory", "shadowed", "redundant")
+
+# Rules constraining more fields than this are compared against every earlier
+# rule instead of enumerating their field subsets.
+MAX_SUBSET_FIELDS = 10
+
+_NO_EQ = object()
+
+
+@dataclass
+class Finding:
+    rule_id: str
+    position: int                 # index in the priority-ordered rule list
+    kind: str                     # "contradictory" | "shadowed" | "redundant" | "nan_only"
+    covered_by: Optional[str]     # earlier rule id for "shadowed" / "redundant"
+    detail: str
+
+
+@dataclass
+class _Span:
+    lo: float = -math.inf         # exclusive; from _gt
+    hi: float = math.inf          # exclusive; from _lt
+    has_range: bool = False
+    eq: Any = _NO_EQ
+    eq_number: Optional[float] = None   # float(eq) where that works
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _same(a: Any, b: Any) -> bool:
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _constraints(conditions: Dict[str, Any]) -> Tuple[Optional[Dict[str, _Span]], str, bool]:
+    """
+    Per-field spans of a rule, or None if it can never match.
+
+    Returns (spans, why-not / nan note, opaque); `opaque` means a field could
+    not be reasoned about (e.g. a non-numeric _eq value next to a range) and
+    the rule must not be used to cover later ones.
+    """
+    spans: Dict[str, _Span] = {}
+    for key, value in conditions.items():
+        cond = _parse_condition(key, value)
+        span = spans.setdefault(cond.field, _Span())
+        if cond.op == "lt":
+            span.hi, span.has_range = min(span.hi, cond.value), True
+        elif cond.op == "gt":
+            span.lo, span.has_range = max(span.lo, cond.value), True
+        elif span.eq is _NO_EQ:
+            span.eq, span.eq_number = cond.value, _number(cond.value)
+        elif not _same(span.eq, cond.value):
+            return None, f"{cond.field} must equal both {span.eq!r} and {cond.value!r}", False
+
+    opaque = False
+    notes = []
+    for field, span in spans.items():
+        if span.eq is not _NO_EQ:
+            if isinstance(span.eq, float) and math.isnan(span.eq):
+                return None, f"{field} == NaN is never true", False
+            if span.has_range:
+                if span.eq is None:
+                    return None, f"{field} must be None and inside a range", False
+                x = span.eq_number
+                if x is None:
+                    opaque = True
+                elif not (span.lo < x < span.hi) and not math.isnan(x):
+                    return None, f"{field} == {span.eq!r} is outside ({span.lo}, {span.hi})", False
+        elif span.lo >= span.hi:
+            notes.append(f"{field} range ({span.lo}, {span.hi}) is empty except for NaN")
+    return spans, "; ".join(notes), opaque
+
+
+def _within(inner: _Span, outer: _Span) -> bool:
+    """Every value allowed by `inner` is allowed by `outer`."""
+    if outer.eq is not _NO_EQ:
+        return inner.eq is not _NO_EQ and _same(inner.eq, outer.eq)
+    # outer is a pure range, which also admits NaN.
+    if inner.eq is not _NO_EQ:
+        x = inner.eq_number
+        return x is not None and (math.isnan(x) or outer.lo < x < outer.hi)
+    return (inner.lo >= outer.lo and inner.hi <= outer.hi) or inner.lo >= inner.hi
+
+
+def _covers(outer: Dict[str, _Span], inner: Dict[str, _Span]) -> bool:
+    return all(field in inner and _within(inner[field], span) for field, span in outer.items())
+
+
+def analyze_policy(policy: Dict[str, Any]) -> List[Finding]:
+    """Findings for policy["rules"], which must be in priority order (as load_policy() returns them)."""
+    findings: List[Finding] = []
+    # Reachable, non-opaque rules so far, grouped by the set of fields they constrain.
+    groups: Dict[FrozenSet[str], List[Tuple[Dict[str, _Span], Dict[str, Any]]]] = {}
+    for position, rule in enumerate(policy.get("rules", [])):
+        spans, note, opaque = _constraints(rule.get("conditions", {}))
+        if spans is None:
+            findings.append(Finding(rule["id"], position, "contradictory", None, note))
+            continue
+
+        fields = frozenset(spans)
+        if len(fields) <= MAX_SUBSET_FIELDS:
+            keys = [frozenset(c) for k in range(len(fields) + 1) for c in combinations(sorted(fields), k)]
+            candidates = [groups[k] for k in keys if k in groups]
+        else:
+            candidates = [g for k, g in groups.items() if k <= fields]
+
+        cover = None
+        for group in candidates:
+            for earlier_spans, earlier in group:
+                if _covers(earlier_spans, spans) and (cover is None or earlier["_position"] < cover["_position"]):
+                    cover = earlier
+                    break
+        if cover is not None:
+            kind = "redundant" if cover["decision"] == rule["decision"] else "shadowed"
+            findings.append(Finding(rule["id"], position, kind, cover["id"],
+                                    f"every applicant it matches is matched first by {cover['id']}"))
+            continue
+
+        if note:
+            findings.append(Finding(rule["id"], position, "nan_only", None, note))
+        if not opaque:
+            groups.setdefault(fields, []).append(
+                (spans, {"id": rule["id"], "decision": rule["decision"], "_position": position}))
+    return findings
+
+
+def optimize_policy(policy: Dict[str, Any], findings: Optional[List[Finding]] = None) -> Dict[str, Any]:
+    """A copy of `policy` without the rules analyze_policy() found unreachable."""
+    if findings is None:
+        findings = analyze_policy(policy)
+    drop = {f.position for f in findings if f.kind in UNREACHABLE}
+    rules = [r for i, r in enumerate(policy.get("rules", [])) if i not in drop]
+    return dict(policy, rules=rules)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.optimize", description="Find rules that can never fire.")
+    parser.add_argument("policy", nargs="?", type=Path, default=DEFAULT_POLICY_PATH)
+    parser.add_argument("-o", "--output", type=Path, help="write the pruned policy JSON here")
+    args = parser.parse_args(argv)
+
+    policy = load_policy(args.policy)
+    findings = analyze_policy(policy)
+    for f in findings:
+        by = f" (by {f.covered_by})" if f.covered_by else ""
+        print(f"{f.kind:<14} {f.rule_id}{by}: {f.detail}")
+    pruned = sum(f.kind in UNREACHABLE for f in findings)
+    print(f"{len(policy.get('rules', []))} rules, {pruned} unreachable", file=sys.stderr)
+
+    if args.output:
+        args.output.write_text(json.dumps(optimize_policy(policy, findings), indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
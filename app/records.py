@@ -0,0 +1,75 @@
+"""
+Fixed-field applicant records.
+
+A plain dict applicant carries a hash table per row; at millions of rows in
+memory that dominates. applicant_type() builds a slotted class for a fixed
+set of fields (typically CompiledPolicy.fields) that stores one pointer per
+field and still offers the dict methods app.rules relies on (get, [], in):
+
+    Applicant = applicant_type(policy.fields)
+    rows = [Applicant.from_dict(d) for d in raw_rows]
+    evaluate_many(rows, policy)
+
+Unset fields behave like missing dict keys.
+"""
+import keyword
+from typing import Any, Dict, FrozenSet, Iterator, Sequence, Tuple
+
+
+class _Record:
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+    _FIELD_SET: FrozenSet[str] = frozenset()
+
+    def __init__(self, **values: Any):
+        for key, value in values.items():
+            setattr(self, key, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_Record":
+        """Copy the record's fields out of `data`; other keys are dropped."""
+        record = cls.__new__(cls)
+        for field in cls.FIELDS:
+            if field in data:
+                setattr(record, field, data[field])
+        return record
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return getattr(self, key) if key in self._FIELD_SET else default
+        except AttributeError:
+            return default
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            if key in self._FIELD_SET:
+                return getattr(self, key)
+        except AttributeError:
+            pass
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._FIELD_SET and hasattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (f for f in self.FIELDS if hasattr(self, f))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in self}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _Record):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.to_dict().items())})"
+
+
+def applicant_type(fields: Sequence[str], name: str = "Applicant") -> type:
+    """A slotted record class with the given fields."""
+    fields = tuple(dict.fromkeys(fields))
+    for field in fields:
+        if not field.isidentifier() or keyword.iskeyword(field) or hasattr(_Record, field):
+            raise ValueError(f"{field!r} can't be used as a record field")
+    return type(name, (_Record,), {"__slots__": fields, "FIELDS": fields, "_FIELD_SET": frozenset(fields)})
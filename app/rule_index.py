@@ -0,0 +1,185 @@
+"""
+Threshold index for large policies.
+
+Rules are numbered by priority position and represented as bits of a Python
+int. For every (field, "lt"/"gt") pair the thresholds are kept sorted, with
+prefix/suffix OR-ed bitsets of the rules they belong to, so one bisect gives
+the set of rules whose condition on that field holds. Equality conditions are
+indexed by value. AND-ing those sets yields candidate rules; the lowest set
+bit is the first match by priority. Candidates are confirmed with the rule's
+own predicate, so the index only ever has to be a superset of the real matches.
+
+The first HEAD_RULES rules are still checked linearly: when an early rule
+fires (common when broad rules sit at the top) that is cheaper than building
+the candidate set.
+"""
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from app.rules import CompiledRule
+
+HEAD_RULES = 8
+
+
+class _ThresholdIndex:
+    def __init__(self, op: str, entries: List[Tuple[float, int]]):
+        self.op = op
+        entries.sort()
+        self.thresholds: List[float] = []
+        bits: List[int] = []
+        for threshold, bit in entries:
+            if self.thresholds and self.thresholds[-1] == threshold:
+                bits[-1] |= bit
+            else:
+                self.thresholds.append(threshold)
+                bits.append(bit)
+
+        self.constrained = 0
+        for b in bits:
+            self.constrained |= b
+
+        # satisfied[k]: rules whose threshold is at position >= k ("lt") or < k ("gt").
+        self.satisfied = [0] * (len(bits) + 1)
+        if op == "lt":
+            for k in range(len(bits) - 1, -1, -1):
+                self.satisfied[k] = self.satisfied[k + 1] | bits[k]
+        else:
+            for k in range(len(bits)):
+                self.satisfied[k + 1] = self.satisfied[k] | bits[k]
+
+    def lookup(self, x: float) -> int:
+        if x != x:
+            return self.constrained   # NaN passes both _lt and _gt in _matches()
+        if self.op == "lt":
+            return self.satisfied[bisect_right(self.thresholds, x)]
+        return self.satisfied[bisect_left(self.thresholds, x)]
+
+
+class RuleIndex:
+    def __init__(self, rules: Sequence["CompiledRule"]):
+        self.rules = rules
+        self.head = [rule.match for rule in rules[:HEAD_RULES]]
+        # Candidates only ever cover the rules after the head.
+        self.all_rules = ((1 << len(rules)) - 1) & ~((1 << len(self.head)) - 1)
+
+        ranges: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        self.eq: Dict[str, Dict[Any, int]] = {}
+        self.eq_constrained: Dict[str, int] = {}
+        for i, rule in enumerate(rules):
+            bit = 1 << i
+            for cond in rule.conditions:
+                if cond.op in ("lt", "gt"):
+                    ranges.setdefault((cond.field, cond.op), []).append((cond.value, bit))
+                    continue
+                values = self.eq.get(cond.field, {})
+                try:
+                    values[cond.value] = values.get(cond.value, 0) | bit
+                except TypeError:
+                    continue          # unhashable value: left to the rule's predicate
+                self.eq[cond.field] = values
+                self.eq_constrained[cond.field] = self.eq_constrained.get(cond.field, 0) | bit
+
+        self.ranges = {key: _ThresholdIndex(key[1], entries) for key, entries in ranges.items()}
+
+    def to_state(self) -> Tuple[Any, ...]:
+        """The index as plain ints/floats/dicts/tuples, e.g. for a marshal snapshot."""
+        ranges = tuple((field, op, tuple(ix.thresholds), tuple(ix.satisfied), ix.constrained)
+                       for (field, op), ix in self.ranges.items())
+        return self.all_rules, self.eq, self.eq_constrained, ranges
+
+    @classmethod
+    def from_state(cls, rules: Sequence["CompiledRule"], state: Tuple[Any, ...]) -> "RuleIndex":
+        """Rebuild an index saved with to_state() for the same `rules`, without re-sorting."""
+        index = cls.__new__(cls)
+        index.rules = rules
+        index.head = [rule.match for rule in rules[:HEAD_RULES]]
+        index.all_rules, index.eq, index.eq_constrained, ranges = state
+        index.ranges = {}
+        for field, op, thresholds, satisfied, constrained in ranges:
+            ix = _ThresholdIndex.__new__(_ThresholdIndex)
+            ix.op, ix.thresholds, ix.satisfied, ix.constrained = op, list(thresholds), list(satisfied), constrained
+            index.ranges[(field, op)] = ix
+        return index
+
+    def candidates(self, applicant: Dict[str, Any]) -> Optional[int]:
+        """Bitset of rules that may match, or None if a value can't be indexed."""
+        get = applicant.get
+        cand = self.all_rules
+        for (field, _), index in self.ranges.items():
+            v = get(field)
+            if v is None:
+                cand &= ~index.constrained
+            else:
+                try:
+                    x = float(v)
+                except (TypeError, ValueError, OverflowError):
+                    return None       # let the linear scan raise exactly as before
+                cand &= index.lookup(x) | ~index.constrained
+            if not cand:
+                return 0
+        for field, values in self.eq.items():
+            try:
+                hit = values.get(get(field), 0)
+            except TypeError:
+                continue              # unhashable applicant value: keep every candidate
+            cand &= hit | ~self.eq_constrained[field]
+            if not cand:
+                return 0
+        return cand
+
+    def first_match(self, applicant: Dict[str, Any]) -> int:
+        for i, match in enumerate(self.head):
+            if match(applicant):
+                return i
+        cand = self.candidates(applicant)
+        if cand is None:
+            for i in range(len(self.head), len(self.rules)):
+                if self.rules[i].match(applicant):
+                    return i
+            return -1
+        rules = self.rules
+        while cand:
+            low = cand & -cand
+            i = low.bit_length() - 1
+            if rules[i].match(applicant):
+                return i
+            cand ^= low
+        return -1
+
+    def first_match_counted(self, applicant: Dict[str, Any]) -> Tuple[int, int]:
+        """first_match() plus the number of rule predicates it evaluated."""
+        checked = 0
+        rules = self.rules
+        for i in range(len(self.head)):
+            matched, n = _run_predicates(rules[i], applicant)
+            checked += n
+            if matched:
+                return i, checked
+        cand = self.candidates(applicant)
+        if cand is None:
+            for i in range(len(self.head), len(rules)):
+                matched, n = _run_predicates(rules[i], applicant)
+                checked += n
+                if matched:
+                    return i, checked
+            return -1, checked
+        while cand:
+            low = cand & -cand
+            i = low.bit_length() - 1
+            matched, n = _run_predicates(rules[i], applicant)
+            checked += n
+            if matched:
+                return i, checked
+            cand ^= low
+        return -1, checked
+
+
+def _run_predicates(rule: "CompiledRule", applicant: Dict[str, Any]) -> Tuple[bool, int]:
+    # rule.match() one predicate at a time: (matched, predicates evaluated).
+    n = 0
+    for predicate in rule.predicates:
+        n += 1
+        if not predicate(applicant):
+            return False, n
+    return True, n
@@ -0,0 +1,235 @@
+"""
+Stream applicants from JSONL through app.rules and write decisions as JSONL.
+
+    python -m app.score applicants.jsonl -o decisions.jsonl
+    cat applicants.jsonl | python -m app.score > decisions.jsonl
+    python -m app.score applicants.jsonl -o decisions.jsonl --workers 8
+
+Input is read in bounded chunks and output is written through a large buffer,
+so memory use does not depend on the size of the input. With --workers the
+input file is split into line-aligned byte ranges scored by a process pool.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from app.rules import DEFAULT_POLICY_PATH, CompiledPolicy, compile_policy, load_policy
+
+DEFAULT_CHUNK_SIZE = 10_000
+OUTPUT_BUFFER_BYTES = 1 << 20
+
+
+def read_chunks(lines: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Parse JSONL lines into lists of at most `chunk_size` applicants. Blank lines are skipped."""
+    _check_chunk_size(chunk_size)
+    return _read_chunks(lines, chunk_size)
+
+
+def _check_chunk_size(chunk_size: int) -> None:
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, not {chunk_size}")
+
+
+def _read_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    numbered = ((n, line) for n, line in enumerate(lines, start=1) if line.strip())
+    while True:
+        chunk = []
+        for n, line in islice(numbered, chunk_size):
+            try:
+                chunk.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {n}: invalid JSON ({e})") from None
+        if not chunk:
+            return
+        yield chunk
+
+
+def _encoded_decisions(policy: CompiledPolicy, with_rule_index: bool = False) -> List[str]:
+    # The output for a rule index never changes, so serialise each one once.
+    # Index -1 (default decision) ends up last, which is where [-1] looks.
+    encoded = []
+    for i in list(range(len(policy.rules))) + [-1]:
+        d = policy.decision_at(i)
+        record = {"decision": d.decision, "reason_ids": d.reason_ids, "reasons": d.reasons}
+        if with_rule_index:
+            record["rule_index"] = i
+        encoded.append(json.dumps(record))
+    return encoded
+
+
+def score_chunks(
+    chunks: Iterable[List[Dict[str, Any]]],
+    policy: CompiledPolicy,
+    id_field: Optional[str] = "id",
+    with_rule_index: bool = False,
+) -> Iterator[str]:
+    """
+    Yield one block of JSONL output (newline-terminated) per input chunk.
+
+    With `with_rule_index` each record also carries the priority position of
+    the first matching rule (-1 for the default), as app.incremental needs.
+    """
+    encoded = _encoded_decisions(policy, with_rule_index)
+    first_match = policy.first_match
+    for chunk in chunks:
+        out = []
+        for applicant in chunk:
+            record = encoded[first_match(applicant)]
+            if id_field is not None and id_field in applicant:
+                record = f"{{{json.dumps(id_field)}: {json.dumps(applicant[id_field])}, {record[1:]}"
+            out.append(record)
+        out.append("")
+        yield "\n".join(out)
+
+
+def score_stream(
+    lines: Iterable[str],
+    out: TextIO,
+    policy: CompiledPolicy,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    id_field: Optional[str] = "id",
+    with_rule_index: bool = False,
+) -> int:
+    """Score JSONL `lines` into `out`; returns the number of records written."""
+    count = 0
+
+    def counted(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        nonlocal count
+        for chunk in chunks:
+            count += len(chunk)
+            yield chunk
+
+    for block in score_chunks(counted(read_chunks(lines, chunk_size)), policy, id_field, with_rule_index):
+        out.write(block)
+    return count
+
+
+def shard_ranges(path: Path, shards: int) -> List[Tuple[int, int]]:
+    """Split `path` into at most `shards` byte ranges that start and end on line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for k in range(1, shards):
+            target = size * k // shards
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()          # finish the line the target falls in
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def _read_range(path: Path, start: int, end: int) -> Iterator[str]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            line = f.readline()
+            if not line:
+                return
+            pos += len(line)
+            yield line.decode("utf-8")
+
+
+# Set once per worker process by _init_worker(); compiled policies hold
+# generated code and can't be pickled, so workers compile the parsed dict.
+_worker_policy: Optional[CompiledPolicy] = None
+
+
+def _init_worker(policy_source: Dict[str, Any]) -> None:
+    global _worker_policy
+    _worker_policy = compile_policy(policy_source)
+
+
+def _score_shard(task: Tuple[Path, int, int, Path, int, Optional[str], bool]) -> int:
+    path, start, end, out_path, chunk_size, id_field, with_rule_index = task
+    with open(out_path, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_BYTES) as out:
+        return score_stream(_read_range(path, start, end), out, _worker_policy, chunk_size, id_field, with_rule_index)
+
+
+def score_file_parallel(
+    path: Path,
+    out: TextIO,
+    policy_source: Dict[str, Any],
+    workers: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    id_field: Optional[str] = "id",
+    with_rule_index: bool = False,
+) -> int:
+    """
+    Score a JSONL file with a process pool and write the results to `out` in input order.
+
+    Each worker receives the policy once through the pool initializer and
+    writes its shard to a temporary file; shards are concatenated at the end.
+    """
+    _check_chunk_size(chunk_size)
+    path = Path(path)
+    # A few shards per worker keeps the pool busy when some ranges are slower.
+    ranges = shard_ranges(path, workers * 4)
+    with tempfile.TemporaryDirectory(prefix="app-score-") as tmp:
+        tasks = [(path, a, b, Path(tmp) / f"shard-{i:05d}.jsonl", chunk_size, id_field, with_rule_index)
+                 for i, (a, b) in enumerate(ranges)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(policy_source,)) as pool:
+            count = sum(pool.map(_score_shard, tasks))
+        for task in tasks:
+            with open(task[3], "r", encoding="utf-8") as shard:
+                shutil.copyfileobj(shard, out, OUTPUT_BUFFER_BYTES)
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.score", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", nargs="?", default="-", help="applicants JSONL file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="decisions JSONL file (default: stdout)")
+    parser.add_argument("--policy", type=Path, default=DEFAULT_POLICY_PATH)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--id-field", default="id", help="input field copied to each output record if present")
+    parser.add_argument("--workers", type=int, default=1, help="score a file with this many processes")
+    parser.add_argument("--rule-index", action="store_true",
+                        help="add the matched rule's priority position to each record (for app.incremental)")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.workers > 1 and args.input == "-":
+        parser.error("--workers needs an input file, not stdin")
+
+    policy_source = load_policy(args.policy)
+
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_BYTES)
+    start = time.perf_counter()
+    try:
+        if args.workers > 1:
+            count = score_file_parallel(Path(args.input), dst, policy_source, args.workers,
+                                        args.chunk_size, args.id_field, args.rule_index)
+        elif args.input == "-":
+            count = score_stream(sys.stdin, dst, compile_policy(policy_source), args.chunk_size, args.id_field,
+                                 args.rule_index)
+        else:
+            with open(args.input, "r", encoding="utf-8") as src:
+                count = score_stream(src, dst, compile_policy(policy_source), args.chunk_size, args.id_field,
+                                     args.rule_index)
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+        else:
+            dst.flush()
+    elapsed = time.perf_counter() - start
+
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"scored {count} records in {elapsed:.2f}s ({rate:,.0f} records/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Asyncio HTTP scoring service.
+
+    python -m app.server --port 8080 --max-batch 256 --batch-window-ms 2
+
+    POST /evaluate        one applicant object  -> one decision
+    POST /evaluate/bulk   array of applicants   -> array of decisions
+    GET  /healthz         status, policy version and batching counters
+
+Concurrent /evaluate requests are queued and evaluated together: the batcher
+takes the first waiting request, collects more for up to --batch-window-ms
+or until --max-batch, and scores them in one go: large batches against large
+policies with one evaluate_batch() call, everything else with the compiled
+first_match() per applicant (see _first_matches(); /evaluate/bulk bodies go
+the same way). The queue is bounded by
+--max-queue; when it is full requests get 503 straight away instead of
+piling up. The policy comes from get_policy(), checked once per batch, so an
+edit to the policy file is picked up without a restart and every batch is
+scored against exactly one policy version. If the edited file can't be
+loaded the previous policy keeps serving.
+
+Apart from NumPy for batch scoring (without it every applicant goes through
+first_match()), only the standard library is used; the HTTP handling covers
+what the bundled load generator and ordinary clients send (HTTP/1.1,
+keep-alive, Content-Length bodies).
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.rules import DEFAULT_POLICY_PATH, INDEX_MIN_RULES, CompiledPolicy, evaluate_batch, get_policy
+from app.score import _encoded_decisions
+
+MAX_BODY_BYTES = 16 << 20
+
+# Below these sizes building columns costs more than calling first_match()
+# per applicant: a small policy's generated first_match() takes well under a
+# microsecond, and evaluate_batch() pays fixed NumPy overhead per rule.
+VECTORIZE_MIN_BATCH = 128
+VECTORIZE_MIN_RULES = INDEX_MIN_RULES
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ScoringService:
+    def __init__(
+        self,
+        policy_path: Path = DEFAULT_POLICY_PATH,
+        max_batch: int = 256,
+        batch_window: float = 0.002,
+        max_queue: int = 10_000,
+    ):
+        self.policy_path = policy_path
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.stats = {"requests": 0, "batches": 0, "batched_applicants": 0, "rejected": 0, "policy_errors": 0}
+        self._current: Optional[Tuple[CompiledPolicy, List[bytes]]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    def policy(self) -> Tuple[CompiledPolicy, List[bytes]]:
+        """The live policy and its pre-encoded responses (indexed like first_match())."""
+        try:
+            policy = get_policy(self.policy_path)
+        except Exception:
+            if self._current is None:
+                raise
+            self.stats["policy_errors"] += 1
+            return self._current
+        if self._current is None or self._current[0] is not policy:
+            self._current = policy, [e.encode("utf-8") for e in _encoded_decisions(policy)]
+        return self._current
+
+    async def start(self) -> None:
+        self.policy()
+        self._queue = asyncio.Queue(self.max_queue)
+        self._batcher = asyncio.create_task(self._run_batches())
+
+    async def stop(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+    async def evaluate(self, applicant: Dict[str, Any]) -> bytes:
+        """Queue one applicant for the next batch; raises asyncio.QueueFull under overload."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((applicant, future))
+        return await future
+
+    def evaluate_bulk(self, applicants: List[Dict[str, Any]]) -> bytes:
+        policy, encoded = self.policy()
+        indices = _first_matches(policy, applicants)
+        if indices is None:
+            indices = map(policy.first_match, applicants)
+        return b"[" + b", ".join(encoded[i] for i in indices) + b"]"
+
+    async def _run_batches(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            # Let connections that are already readable enqueue, then top up
+            # once more after the window if the batch still has room.
+            for wait in (0, self.batch_window):
+                if len(batch) >= self.max_batch:
+                    break
+                await asyncio.sleep(wait)
+                while queue.qsize() and len(batch) < self.max_batch:
+                    batch.append(queue.get_nowait())
+                if wait == 0 and len(batch) > 1 and queue.empty():
+                    break         # busy enough that the batch filled without waiting
+            self._score(batch)
+
+    def _score(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        self.stats["batches"] += 1
+        self.stats["batched_applicants"] += len(batch)
+        try:
+            policy, encoded = self.policy()
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        indices = _first_matches(policy, [applicant for applicant, _ in batch])
+        if indices is not None:
+            for (_, future), i in zip(batch, indices):
+                if not future.done():     # client went away
+                    future.set_result(encoded[i])
+            return
+        first_match = policy.first_match
+        for applicant, future in batch:
+            if future.done():
+                continue
+            try:
+                future.set_result(encoded[first_match(applicant)])
+            except Exception as e:    # e.g. a non-numeric value for an _lt field
+                future.set_exception(e)
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        self.stats["requests"] += 1
+        if path == "/healthz":
+            if method != "GET":
+                return 405, _error("use GET")
+            policy, _ = self.policy()
+            return 200, json.dumps({"status": "ok", "policy_version": policy.source.get("version"),
+                                    "queued": self._queue.qsize(), **self.stats}).encode("utf-8")
+        if path not in ("/evaluate", "/evaluate/bulk"):
+            return 404, _error(f"no route for {path}")
+        if method != "POST":
+            return 405, _error("use POST")
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            return 400, _error(f"invalid JSON: {e}")
+
+        if path == "/evaluate/bulk":
+            if not isinstance(payload, list) or not all(isinstance(a, dict) for a in payload):
+                return 400, _error("expected a JSON array of applicant objects")
+            try:
+                return 200, self.evaluate_bulk(payload)
+            except (TypeError, ValueError) as e:
+                return 400, _error(str(e))
+
+        if not isinstance(payload, dict):
+            return 400, _error("expected a JSON object")
+        try:
+            return 200, await self.evaluate(payload)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            return 503, _error("scoring queue is full, retry later")
+        except (TypeError, ValueError) as e:
+            return 400, _error(str(e))
+
+
+def _first_matches(policy: CompiledPolicy, applicants: List[Dict[str, Any]]) -> Optional[List[int]]:
+    """
+    first_match() for every applicant via one evaluate_batch() call.
+
+    Returns None, leaving the batch to per-applicant first_match() calls, for
+    batches or policies below VECTORIZE_MIN_BATCH/VECTORIZE_MIN_RULES,
+    without NumPy, or when a column can't be vectorized with
+    exactly first_match()'s results: an _lt/_gt field holding strings or NaN
+    (evaluate_batch() treats NaN as missing, and each bad value should fail
+    only its own request) or an _eq field holding unhashable values.
+    """
+    if len(applicants) < VECTORIZE_MIN_BATCH or len(policy.rules) < VECTORIZE_MIN_RULES:
+        return None
+    try:
+        import numpy as np
+
+        from app.columnar import Categorical
+    except ImportError:
+        return None
+
+    ranged = {c.field for rule in policy.rules for c in rule.conditions if c.op != "eq"}
+    equal = {c.field for rule in policy.rules for c in rule.conditions if c.op == "eq"}
+    columns: Dict[str, Any] = {}
+    try:
+        for field in policy.fields:
+            values = [a.get(field) for a in applicants]
+            if field in ranged and not all(v is None or (isinstance(v, (int, float)) and v == v) for v in values):
+                return None
+            if field not in equal:
+                columns[field] = np.array([math.nan if v is None else v for v in values], dtype=np.float64)
+                continue
+            # Python equality per distinct value, as in first_match().
+            positions: Dict[Any, int] = {}
+            codes = [-1 if v is None else positions.setdefault(v, len(positions)) for v in values]
+            columns[field] = Categorical(np.array(codes, dtype=np.int32), list(positions))
+        if not columns:
+            return [policy.first_match({})] * len(applicants)
+        return evaluate_batch(columns, policy).rule_index.tolist()
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode("utf-8")
+
+
+async def _serve_connection(service: ScoringService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, path, version = lines[0].split(" ", 2)
+            except ValueError:
+                return
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                status, body = 400, _error("invalid Content-Length")
+                keep_alive = False
+            elif length > MAX_BODY_BYTES:
+                status, body = 413, _error(f"body larger than {MAX_BODY_BYTES} bytes")
+                keep_alive = False
+            else:
+                payload = await reader.readexactly(length) if length else b""
+                try:
+                    status, body = await service.handle(method, path.split("?", 1)[0], payload)
+                except Exception as e:
+                    status, body = 500, _error(f"{type(e).__name__}: {e}")
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+            writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n%s\r\n%s" % (
+                status, _REASONS[status].encode(), len(body),
+                b"" if keep_alive else b"Connection: close\r\n", body))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service: ScoringService, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+    """Start `service` and listen on host:port; the caller owns the returned server."""
+    await service.start()
+    return await asyncio.start_server(lambda r, w: _serve_connection(service, r, w), host, port)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    service = ScoringService(args.policy, args.max_batch, args.batch_window_ms / 1000, args.max_queue)
+    server = await serve(service, args.host, args.port)
+    print(f"serving on http://{args.host}:{args.port} (policy {args.policy})", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.server", description="Serve app.rules over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--policy", type=Path, default=DEFAULT_POLICY_PATH)
+    parser.add_argument("--max-batch", type=int, default=256, help="most /evaluate requests scored together")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0, help="how long a batch waits to fill up")
+    parser.add_argument("--max-queue", type=int, default=10_000, help="queued requests before answering 503")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
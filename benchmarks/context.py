@@ -0,0 +1,76 @@
+"""
+Prompt size with and without the context packer, on the golden issues.
+
+    python -m benchmarks.context --budget 12000 -o context.json
+
+Two scenarios: "current" is the context process_issue() sends today
+(app/rules.py and site/index.html editable, docs/policy.json read-only);
+"grown" adds more read-only files, standing in for a larger repo. Sizes are
+the Ollama backend's full prompt, in estimated tokens. Model latency is not
+measured here; it needs a model server.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from orchestrator.agent_ollama import build_prompt
+from orchestrator.context import SECTIONS, estimate_tokens, pack_context
+
+ROOT = Path(__file__).resolve().parent.parent
+GOLDEN_ISSUES = Path(__file__).with_name("golden_issues.json")
+EDITABLE = ("app/rules.py", "site/index.html")
+SCENARIOS = {
+    "current": ("app/rules.py", "docs/policy.json", "site/index.html"),
+    "grown": ("app/rules.py", "docs/policy.json", "site/index.html", "docs/golden_cases.json",
+              "tests/test_rules.py", "app/score.py", "app/server.py", "app/optimize.py", "app/columnar.py"),
+}
+
+
+def run(budget: int, issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    results = []
+    for scenario, paths in SCENARIOS.items():
+        files = {p: (ROOT / p).read_text(encoding="utf-8") for p in paths}
+        for issue in issues:
+            query = f"{issue['title']}\n{issue['body']}"
+            SECTIONS.clear()
+            start = time.perf_counter()
+            packed = pack_context(query, files, EDITABLE, budget)
+            cold_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            pack_context(query, files, EDITABLE, budget)
+            warm_ms = (time.perf_counter() - start) * 1000
+
+            before = estimate_tokens(build_prompt(issue["title"], issue["body"], files))
+            after = estimate_tokens(build_prompt(issue["title"], issue["body"], packed.files))
+            results.append({
+                "scenario": scenario, "issue": issue["name"], "budget": budget,
+                "prompt_tokens_unpacked": before, "prompt_tokens_packed": after,
+                "reduction_pct": round(100 * (before - after) / before, 1),
+                "sliced": packed.sliced, "omitted": packed.omitted,
+                "pack_ms_cold": round(cold_ms, 2), "pack_ms_warm": round(warm_ms, 2),
+            })
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.context", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=int, default=12000, help="context budget in estimated tokens")
+    parser.add_argument("--issues", type=Path, default=GOLDEN_ISSUES)
+    parser.add_argument("-o", "--output", type=Path)
+    args = parser.parse_args(argv)
+
+    results = run(args.budget, json.loads(args.issues.read_text(encoding="utf-8")))
+    for r in results:
+        print(f"{r['scenario']:8} {r['issue']:26} {r['prompt_tokens_unpacked']:>7} -> {r['prompt_tokens_packed']:>6} tokens "
+              f"({r['reduction_pct']:>5}% less)  pack {r['pack_ms_cold']:.1f} ms cold, {r['pack_ms_warm']:.1f} ms warm",
+              file=sys.stderr)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Synthetic policies and applicant populations for the rules benchmarks."""
+import random
+from typing import Any, Dict, Iterator, List
+
+NUMERIC_FIELDS = {
+    "credit_score": (300, 850),
+    "dti": (0.0, 1.0),
+    "income": (5_000, 250_000),
+    "age": (18, 90),
+    "ltv": (0.0, 1.5),
+}
+CATEGORICAL_FIELDS = {
+    "region": ["EU", "US", "APAC", "LATAM"],
+    "product": ["card", "loan", "mortgage"],
+}
+BOOLEAN_FIELDS = ["defaults_past_24m", "bankrupt"]
+
+
+def generate_policy(n_rules: int, seed: int = 0, max_conditions: int = 3) -> Dict[str, Any]:
+    """Policy with `n_rules` rules mixing _lt/_gt/_eq/boolean conditions and random priorities."""
+    rng = random.Random(seed)
+    rules: List[Dict[str, Any]] = []
+    for i in range(n_rules):
+        conditions: Dict[str, Any] = {}
+        for _ in range(rng.randint(1, max_conditions)):
+            kind = rng.random()
+            if kind < 0.7:
+                field = rng.choice(list(NUMERIC_FIELDS))
+                lo, hi = NUMERIC_FIELDS[field]
+                op = rng.choice(["lt", "gt"])
+                # Skew thresholds toward the tails so most rules rarely fire,
+                # like real policies where the default decision dominates.
+                q = rng.random() ** 3
+                threshold = lo + (hi - lo) * (q if op == "lt" else 1 - q)
+                conditions[f"{field}_{op}"] = round(threshold, 3)
+            elif kind < 0.9:
+                field = rng.choice(list(CATEGORICAL_FIELDS))
+                conditions[f"{field}_eq"] = rng.choice(CATEGORICAL_FIELDS[field])
+            else:
+                conditions[rng.choice(BOOLEAN_FIELDS)] = True
+        rules.append({
+            "id": f"R{i}",
+            "priority": rng.randint(0, 10 * n_rules),
+            "decision": rng.choice(["reject", "reject", "refer"]),
+            "reason": f"Synthetic rule {i}",
+            "conditions": conditions,
+        })
+    return {"version": "synthetic", "default_decision": "approve", "rules": rules}
+
+
+def generate_applicants(n: int, seed: int = 0, missing_rate: float = 0.02) -> Iterator[Dict[str, Any]]:
+    """Yield `n` applicant dicts; each numeric field is missing with probability `missing_rate`."""
+    rng = random.Random(seed)
+    for i in range(n):
+        applicant: Dict[str, Any] = {"id": i}
+        for field, (lo, hi) in NUMERIC_FIELDS.items():
+            if rng.random() >= missing_rate:
+                applicant[field] = round(rng.uniform(lo, hi), 3)
+        for field, values in CATEGORICAL_FIELDS.items():
+            applicant[field] = rng.choice(values)
+        for field in BOOLEAN_FIELDS:
+            applicant[field] = rng.random() < 0.05
+        yield applicant
+
+
+def generate_columns(n: int, seed: int = 0, missing_rate: float = 0.02) -> Dict[str, Any]:
+    """Columnar population for evaluate_batch(); missing numeric values are NaN."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, Any] = {}
+    for field, (lo, hi) in NUMERIC_FIELDS.items():
+        values = rng.uniform(lo, hi, n)
+        values[rng.random(n) < missing_rate] = np.nan
+        columns[field] = values
+    for field, values in CATEGORICAL_FIELDS.items():
+        columns[field] = rng.choice(np.array(values), n)
+    for field in BOOLEAN_FIELDS:
+        columns[field] = rng.random(n) < 0.05
+    return columns
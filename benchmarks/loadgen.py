@@ -0,0 +1,95 @@
+"""
+Closed-loop HTTP load generator for app.server.
+
+    python -m app.server --port 8080 &
+    python -m benchmarks.loadgen --port 8080 --connections 64 --duration 10
+
+Each connection keeps one request in flight over a keep-alive socket and
+sends synthetic applicants to /evaluate (or batches of --bulk applicants to
+/evaluate/bulk). Reports requests/s, applicants/s, p50/p99/max latency and
+non-200 responses.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.generators import generate_applicants
+from benchmarks.run import _percentile
+
+
+async def _connection(host: str, port: int, bodies: List[bytes], path: str, stop_at: float,
+                      latencies: List[int], errors: List[int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    clock = time.perf_counter_ns
+    k = 0
+    try:
+        while time.perf_counter() < stop_at:
+            body = bodies[k % len(bodies)]
+            k += 1
+            start = clock()
+            writer.write(b"POST %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+                         % (path.encode(), host.encode(), len(body), body))
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(clock() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, connections: int, duration: float, bulk: int = 0,
+                   seed: int = 0) -> Dict[str, Any]:
+    applicants = list(generate_applicants(max(1000, bulk * 10), seed))
+    if bulk:
+        path = "/evaluate/bulk"
+        bodies = [json.dumps(applicants[i:i + bulk]).encode() for i in range(0, len(applicants) - bulk + 1, bulk)]
+    else:
+        path = "/evaluate"
+        bodies = [json.dumps(a).encode() for a in applicants]
+
+    latencies: List[int] = []
+    errors: List[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_connection(host, port, bodies[c::connections] or bodies, path, start + duration,
+                                       latencies, errors) for c in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "applicants_per_s": round(len(latencies) * max(1, bulk) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) / 1e6, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) / 1e6, 3),
+        "max_ms": round(latencies[-1] / 1e6, 3) if latencies else 0.0,
+        "errors": len(errors),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadgen", description="Load test app.server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--bulk", type=int, default=0, help="applicants per /evaluate/bulk request (0: use /evaluate)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_load(args.host, args.port, args.connections, args.duration, args.bulk, args.seed))
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
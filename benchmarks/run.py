@@ -0,0 +1,169 @@
+"""
+Benchmarks for app.rules.
+
+    python -m benchmarks.run --rules 10,1000 --applicants 1000,100000 -o bench.json
+    python -m benchmarks.run --compare bench_main.json -o bench_branch.json
+
+Every case records throughput (items/s), per-call p50/p99 latency and the
+process peak RSS after the case ran (a high-water mark, so it only grows).
+Results are written as JSON so runs on different commits can be compared.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.memo import DecisionMemo
+from app.rules import (compile_policy, evaluate, evaluate_batch, get_policy, load_policy, load_snapshot,
+                       save_snapshot)
+from benchmarks.generators import generate_applicants, generate_columns, generate_policy
+
+try:
+    import resource
+except ImportError:       # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def time_calls(fn: Callable[[Any], Any], args: Iterable[Any], items_per_call: int = 1) -> Dict[str, Any]:
+    """Call fn(arg) for every arg, timing each call individually."""
+    latencies = []
+    clock = time.perf_counter_ns
+    for arg in args:
+        start = clock()
+        fn(arg)
+        latencies.append(clock() - start)
+    total_s = sum(latencies) / 1e9
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "ops_per_s": round(len(latencies) * items_per_call / total_s, 1) if total_s else None,
+        "p50_us": round(_percentile(latencies, 0.50) / 1e3, 3),
+        "p99_us": round(_percentile(latencies, 0.99) / 1e3, 3),
+    }
+
+
+def run_case(n_rules: int, n_applicants: int, max_scalar: int, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    results = []
+
+    def record(name: str, stats: Dict[str, Any]) -> None:
+        row = {"name": name, "rules": n_rules, "applicants": n_applicants, **stats, "peak_rss_mb": peak_rss_mb()}
+        results.append(row)
+        print(f"{name:<22} rules={n_rules:<7} applicants={n_applicants:<9} "
+              f"{row['ops_per_s'] or 0:>14,.0f}/s  p50={row['p50_us']:>10.3f}us  p99={row['p99_us']:>10.3f}us",
+              file=sys.stderr)
+
+    policy_source = generate_policy(n_rules, seed=seed)
+    with tempfile.TemporaryDirectory(prefix="rules-bench-") as tmp:
+        path = Path(tmp) / "policy.json"
+        path.write_text(json.dumps(policy_source), encoding="utf-8")
+        record("load_policy", time_calls(lambda _: load_policy(path), range(repeat)))
+        parsed = load_policy(path)
+        record("compile_policy", time_calls(lambda _: compile_policy(parsed), range(repeat)))
+        get_policy(path)
+        record("get_policy_cached", time_calls(lambda _: get_policy(path), range(repeat * 100)))
+        # Cold start: what a fresh worker pays to go from files on disk to a usable policy.
+        record("cold_start_json", time_calls(lambda _: compile_policy(load_policy(path)), range(repeat)))
+        snapshot = Path(tmp) / "policy.snap"
+        save_snapshot(snapshot, path)
+        record("cold_start_snapshot", time_calls(lambda _: load_snapshot(snapshot, path, refresh=False), range(repeat)))
+
+    compiled = compile_policy(parsed)
+    scalar_n = min(n_applicants, max_scalar)
+    record("evaluate_interpreted",
+           time_calls(lambda a: evaluate(a, parsed), islice(generate_applicants(scalar_n, seed), max(1, scalar_n // 10))))
+    record("evaluate_compiled", time_calls(lambda a: evaluate(a, compiled), generate_applicants(scalar_n, seed)))
+    memo = DecisionMemo(maxsize=scalar_n)
+    for a in generate_applicants(scalar_n, seed):
+        memo.evaluate(a, compiled)
+    # Every call is a hit: the cost of a repeated applicant.
+    record("evaluate_memo_hit", time_calls(lambda a: memo.evaluate(a, compiled), generate_applicants(scalar_n, seed)))
+
+    columns = generate_columns(n_applicants, seed)
+    record("evaluate_batch", time_calls(lambda _: evaluate_batch(columns, compiled), range(repeat), n_applicants))
+    del columns
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """One line per case present in both runs with the throughput change."""
+    key = lambda r: (r["name"], r["rules"], r["applicants"])
+    before = {key(r): r for r in baseline["results"]}
+    lines = []
+    for row in current["results"]:
+        old = before.get(key(row))
+        if not old or not old.get("ops_per_s") or not row.get("ops_per_s"):
+            continue
+        change = (row["ops_per_s"] / old["ops_per_s"] - 1) * 100
+        lines.append(f"{row['name']:<22} rules={row['rules']:<7} applicants={row['applicants']:<9} {change:+7.1f}%")
+    return lines
+
+
+def _ints(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmark app.rules.")
+    parser.add_argument("--rules", type=_ints, default=[10, 1000, 10000], help="comma-separated rule counts")
+    parser.add_argument("--applicants", type=_ints, default=[1000, 100000], help="comma-separated population sizes")
+    parser.add_argument("--max-scalar", type=int, default=100_000,
+                        help="cap on per-applicant evaluate() calls per case (batch paths use the full population)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_rules in args.rules:
+        for n_applicants in args.applicants:
+            results.extend(run_case(n_rules, n_applicants, args.max_scalar, args.repeat, args.seed))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        print("\n".join(compare(baseline, report)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,24 @@
+import os
 import json
+import queue
+import threading
 import requests
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
+from orchestrator.llm_cache import LLMCache
+from orchestrator.stream_guard import EditStreamGuard, GuardrailAbort
+
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/generate")
 MODEL = "qwen2.5-coder:7b"
+# Stream tokens and check them as they arrive (OLLAMA_STREAM=0 for one blocking call).
+STREAM = os.environ.get("OLLAMA_STREAM", "1") != "0"
+TEMPERATURE = 0.0
+# Streaming timeouts (seconds): the first chunk only arrives after the whole
+# prompt has been evaluated, later chunks should follow each other closely.
+CONNECT_TIMEOUT = 10
+FIRST_CHUNK_TIMEOUT = 600
+CHUNK_TIMEOUT = 30
+LLM_CACHE = LLMCache.from_env()
 
 SYSTEM_PROMPT = """You are a careful software engineer.
 You must output ONLY valid JSON. No markdown. No commentary.
@@ -42,11 +57,144 @@ def call_ollama(prompt: str, temperature: float = 0.2) -> str:
     data = r.json()
     return data["response"]
 
-def generate_file_edits(issue_title: str, issue_body: str, repo_files: Dict[str, str], ci_feedback: str | None = None) -> Dict[str, Any]:
+def stream_ollama(prompt: str, temperature: float = 0.2, guard: Optional[EditStreamGuard] = None) -> str:
+    """
+    call_ollama() with "stream": true. Each NDJSON chunk is fed to `guard`,
+    which raises GuardrailAbort as soon as the output can't pass; the
+    connection is then closed, and Ollama stops generating when its client
+    goes away.
+
+    Lines are read on a helper thread and handed over through a queue, so
+    waiting is bounded whatever the socket does: ReadTimeout is raised when
+    the first chunk (prompt evaluation) takes longer than FIRST_CHUNK_TIMEOUT
+    or a later one longer than CHUNK_TIMEOUT, however long the whole
+    generation takes. The helper thread closes the response when it next
+    wakes up (closing it here would wait for its blocked read); requests' own
+    read timeout (FIRST_CHUNK_TIMEOUT) bounds how long that can take.
+    """
+    payload = {
+        "model": MODEL,
+        "prompt": prompt,
+        "system": SYSTEM_PROMPT,
+        "stream": True,
+        "options": {
+            "temperature": temperature
+        }
+    }
+    parts = []
+    r = requests.post(OLLAMA_URL, json=payload, stream=True, timeout=(CONNECT_TIMEOUT, FIRST_CHUNK_TIMEOUT))
+    try:
+        r.raise_for_status()
+    except requests.HTTPError:
+        r.close()
+        raise
+    lines: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    threading.Thread(target=_read_lines, args=(r, lines, stop), name="ollama-stream", daemon=True).start()
+    try:
+        timeout = FIRST_CHUNK_TIMEOUT
+        while True:
+            try:
+                line = lines.get(timeout=timeout)
+            except queue.Empty:
+                raise requests.exceptions.ReadTimeout(f"no chunk from Ollama within {timeout}s") from None
+            if line is _END_OF_STREAM:
+                break
+            if isinstance(line, Exception):
+                raise line
+            timeout = CHUNK_TIMEOUT
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise RuntimeError(f"Ollama error: {chunk['error']}")
+            token = chunk.get("response", "")
+            parts.append(token)
+            if guard is not None:
+                guard.feed(token)
+            if chunk.get("done"):
+                break
+    finally:
+        stop.set()
+    return "".join(parts)
+
+_END_OF_STREAM = object()
+
+def _read_lines(response: requests.Response, lines: queue.Queue, stop: threading.Event):
+    """
+    Put each non-empty line of `response` on `lines`, then _END_OF_STREAM or
+    the exception that ended it. Closes `response` when done, or at the next
+    line once `stop` is set.
+    """
+    try:
+        for line in response.iter_lines():
+            if stop.is_set():
+                return
+            if line:
+                lines.put(line)
+        lines.put(_END_OF_STREAM)
+    except Exception as e:
+        lines.put(e)
+    finally:
+        response.close()
+
+def _save_output(raw: str):
+    with open("orchestrator/logs/last_model_output.txt", "w", encoding="utf-8") as f:
+        f.write(raw)
+
+def _generate(prompt: str, allowed_paths: Optional[Iterable[str]]) -> str:
+    key = LLM_CACHE.key("ollama", MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE)
+    cached = LLM_CACHE.get(key)
+    if cached is not None:
+        if STREAM:
+            # A recorded early abort replays as the same abort.
+            EditStreamGuard(allowed_paths).feed(cached["response"])
+        if cached["complete"]:
+            return cached["response"]
+        # Cut off under different guardrails: it can't be replayed.
+
+    LLM_CACHE.miss(key)
+    if STREAM:
+        try:
+            raw = stream_ollama(prompt, temperature=TEMPERATURE, guard=EditStreamGuard(allowed_paths))
+        except GuardrailAbort as abort:
+            LLM_CACHE.put(key, abort.partial, complete=False, backend="ollama", model=MODEL)
+            _save_output(abort.partial)
+            raise
+    else:
+        raw = call_ollama(prompt, temperature=TEMPERATURE)
+    LLM_CACHE.put(key, raw, backend="ollama", model=MODEL)
+    return raw
+
+def generate_file_edits(issue_title: str, issue_body: str, repo_files: Dict[str, str], ci_feedback: str | None = None,
+                        allowed_paths: Optional[Iterable[str]] = None) -> Dict[str, Any]:
     """
     repo_files: mapping {path: content} for relevant files you want the model to consider.
     ci_feedback: optional failure summary for retry.
+    allowed_paths: files the orchestrator accepts; when streaming, generation
+    stops with GuardrailAbort as soon as the output can't pass its guardrails.
     """
+    prompt = build_prompt(issue_title, issue_body, repo_files, ci_feedback)
+    raw = _generate(prompt, allowed_paths)
+    _save_output(raw)
+    # Be strict: JSON only
+    try:
+        result = json.loads(raw)
+    except json.JSONDecodeError:
+        # Sometimes models include stray text. Try to salvage JSON by trimming.
+        start = raw.find("{")
+        end = raw.rfind("}")
+        if start == -1 or end == -1:
+            raise
+        result = json.loads(raw[start:end+1])
+
+    # Minimal validation
+    if "files" not in result or not isinstance(result["files"], list):
+        raise ValueError("Model output missing 'files' list.")
+    for f in result["files"]:
+        if "path" not in f or "content_b64" not in f:
+            raise ValueError("Each file item must have 'path' and 'content_b64'.")
+    return result
+
+def build_prompt(issue_title: str, issue_body: str, repo_files: Dict[str, str], ci_feedback: str | None = None) -> str:
     files_block = "\n\n".join(
         [f"--- FILE: {path} ---\n{content}" for path, content in repo_files.items()]
     )
@@ -74,25 +222,4 @@ OUTPUT REQUIREMENTS:
 - Include FULL content for each file you modify (not diffs).
 - Prefer editing existing files over creating many new ones.
 """
-
-    raw = call_ollama(prompt, temperature=0.0)
-    with open("orchestrator/logs/last_model_output.txt", "w", encoding="utf-8") as f:
-        f.write(raw)
-    # Be strict: JSON only
-    try:
-        result = json.loads(raw)
-    except json.JSONDecodeError:
-        # Sometimes models include stray text. Try to salvage JSON by trimming.
-        start = raw.find("{")
-        end = raw.rfind("}")
-        if start == -1 or end == -1:
-            raise
-        result = json.loads(raw[start:end+1])
-
-    # Minimal validation
-    if "files" not in result or not isinstance(result["files"], list):
-        raise ValueError("Model output missing 'files' list.")
-    for f in result["files"]:
-        if "path" not in f or "content_b64" not in f:
-            raise ValueError("Each file item must have 'path' and 'content_b64'.")
-    return result
\ No newline at end of file
+    return prompt
\ No newline at end of file
@@ -1,12 +1,15 @@
 import os
 import json
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional
 from openai import OpenAI
 
+from orchestrator.llm_cache import LLMCache
+
 client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
 MODEL = os.environ.get("OPENAI_MODEL", "gpt-5-mini")
+LLM_CACHE = LLMCache.from_env()
 
 # =============================================================================
 # APPROACH: Instead of asking the model to base64-encode file content (which it
@@ -91,6 +94,7 @@ def generate_file_edits(
     issue_body: str,
     repo_files: Dict[str, str],
     ci_feedback: Optional[str] = None,
+    allowed_paths: Optional[Iterable[str]] = None,
 ) -> Dict[str, Any]:
     """
     Returns the same schema as before:
@@ -101,19 +105,18 @@ def generate_file_edits(
     
     But internally uses plain-text output from the model and encodes here.
     This is a DROP-IN REPLACEMENT — orchestrator.py doesn't need changes.
+    allowed_paths marks which files are EDITABLE in the prompt.
     """
     import base64
 
-    allowed_edit_files = {"app/rules.py", "site/index.html"}
+    allowed_edit_files = set(allowed_paths) if allowed_paths is not None else {"app/rules.py", "site/index.html"}
 
     files_block = ""
     for path, content in repo_files.items():
         editable = "(EDITABLE)" if path in allowed_edit_files else "(READ-ONLY)"
-        files_block += f"\n{'='*60}\n"
-        files_block += f"FILE: {path}  {editable}\n"
-        files_block += f"{'='*60}\n"
+        files_block += f"\n--- FILE: {path} {editable} ---\n"
         files_block += content
-        files_block += f"\n{'='*60} END OF {path} {'='*60}\n"
+        files_block += f"\n--- END FILE: {path} ---\n"
 
     feedback_block = ""
     if ci_feedback:
@@ -142,12 +145,20 @@ REMINDERS:
 Return the <JSON> summary block, then <FILE> blocks as described in the system prompt.
 """
 
-    resp = client.responses.create(
-        model=MODEL,
-        instructions=SYSTEM_PROMPT,
-        input=prompt,
-    )
-    text = resp.output_text
+    # No temperature is sent, so it is not part of the cache key.
+    key = LLM_CACHE.key("openai", MODEL, SYSTEM_PROMPT, prompt, None)
+    cached = LLM_CACHE.get(key)
+    if cached is not None:
+        text = cached["response"]
+    else:
+        LLM_CACHE.miss(key)
+        resp = client.responses.create(
+            model=MODEL,
+            instructions=SYSTEM_PROMPT,
+            input=prompt,
+        )
+        text = resp.output_text
+        LLM_CACHE.put(key, text, backend="openai", model=MODEL)
 
     # Extract summary
     json_text = extract_json_block(text)
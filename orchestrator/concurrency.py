@@ -0,0 +1,116 @@
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Per-issue lifecycle. process_issue() moves an issue through these; the
+# worker pool adds the terminal state from its outcome.
+ISSUE_TRANSITIONS = {
+    "queued": {"preparing", "failed"},
+    "preparing": {"generating", "failed"},
+    "generating": {"pushing", "blocked", "failed"},
+    "pushing": {"waiting_ci", "blocked", "failed"},
+    "waiting_ci": {"generating", "done", "blocked", "failed"},
+    "done": set(),
+    "blocked": set(),
+    "failed": set(),
+}
+TERMINAL_STATES = {"done", "blocked", "failed"}
+
+
+class FairSemaphore:
+    """
+    Counting semaphore that grants slots in request order.
+
+    threading.Semaphore wakes an arbitrary waiter, so under contention one
+    issue can keep getting the LLM while another starves; here the longest
+    waiter always goes next.
+    """
+
+    def __init__(self, slots: int):
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        self._free = slots
+        self._lock = threading.Lock()
+        self._waiters = deque()
+
+    def acquire(self):
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return
+            ticket = threading.Event()
+            self._waiters.append(ticket)
+        ticket.wait()
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Hand the slot straight to the oldest waiter.
+                self._waiters.popleft().set()
+            else:
+                self._free += 1
+
+    def waiting(self) -> int:
+        with self._lock:
+            return len(self._waiters)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class IssueTracker:
+    """Thread-safe record of where every issue is in ISSUE_TRANSITIONS."""
+
+    def __init__(self, on_change: Optional[Callable[[dict], None]] = None):
+        self._lock = threading.Lock()
+        self._states: Dict[int, str] = {}
+        self._history: Dict[int, List[tuple]] = {}
+        self._on_change = on_change
+
+    def claim(self, issue_number: int) -> bool:
+        """
+        Register an issue as queued. False if this tracker has seen it before:
+        an issue that crashed before it was labelled would otherwise be picked
+        up again on every poll.
+        """
+        with self._lock:
+            if issue_number in self._states:
+                return False
+            self._states[issue_number] = "queued"
+            self._history[issue_number] = [("queued", datetime.now(timezone.utc).isoformat())]
+        return True
+
+    def transition(self, issue_number: int, state: str):
+        with self._lock:
+            current = self._states.get(issue_number)
+            if current is None or state not in ISSUE_TRANSITIONS[current]:
+                raise ValueError(f"issue #{issue_number}: illegal transition {current} -> {state}")
+            self._states[issue_number] = state
+            self._history[issue_number].append((state, datetime.now(timezone.utc).isoformat()))
+        if self._on_change:
+            self._on_change({"event": "issue_state", "issue": issue_number, "from": current, "to": state})
+
+    def state(self, issue_number: int) -> Optional[str]:
+        with self._lock:
+            return self._states.get(issue_number)
+
+    def history(self, issue_number: int) -> List[tuple]:
+        with self._lock:
+            return list(self._history.get(issue_number, []))
+
+    def active(self) -> List[int]:
+        with self._lock:
+            return [n for n, s in self._states.items() if s not in TERMINAL_STATES]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            out: Dict[str, int] = {}
+            for s in self._states.values():
+                out[s] = out.get(s, 0) + 1
+            return out
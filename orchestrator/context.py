@@ -0,0 +1,316 @@
+import ast
+import hashlib
+import json
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Rough but stable: code and prose both average about four characters per
+# token for the models used here, and the packer only needs relative sizes.
+CHARS_PER_TOKEN = 4
+BLOCK_LINES = 30
+
+_WORD = re.compile(r"[A-Za-z][a-z0-9]*|[A-Z]+(?![a-z])|[0-9]+")
+_STOPWORDS = set("""
+a an and are as at be but by can do does for from has have if in into is it its may must not of on only or
+should so such than that the then there these this to was were what when where which while will with you your
+def self return none true false import class
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def blob_sha(text: str) -> str:
+    """Git's blob id for `text` (what the Contents API reports as "sha")."""
+    data = text.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def terms(text: str) -> List[str]:
+    """Lower-cased words, with snake_case and camelCase identifiers split up."""
+    return [w for w in (m.lower() for m in _WORD.findall(text)) if len(w) > 2 and w not in _STOPWORDS]
+
+
+@dataclass
+class Section:
+    name: str
+    signature: str          # one line standing in for the section when it isn't sent
+    text: str
+    terms: List[str] = field(default_factory=list, repr=False)
+
+
+def _python_sections(text: str) -> Optional[List[Section]]:
+    """One section per top-level def/class; runs of other statements are grouped."""
+    try:
+        tree = ast.parse(text)
+    except SyntaxError:
+        return None
+    lines = text.splitlines(keepends=True)
+    groups: List[List[ast.stmt]] = []
+    for node in tree.body:
+        if groups and not _is_def(node) and not _is_def(groups[-1][0]):
+            groups[-1].append(node)
+        else:
+            groups.append([node])
+
+    sections = []
+    start = 0
+    for k, group in enumerate(groups):
+        # Comments and blank lines before a group belong to it; the last group runs to the end.
+        end = len(lines) if k == len(groups) - 1 else group[-1].end_lineno
+        chunk = "".join(lines[start:end])
+        node = group[0]
+        if _is_def(node):
+            sections.append(Section(node.name, _signature(node, lines), chunk))
+        else:
+            names = ", ".join(_stmt_names(group))
+            sections.append(Section(f"module:{node.lineno}", f"(module code: {names[:80].rstrip(', ')})", chunk))
+        start = end
+    return sections
+
+
+def _is_def(node: ast.stmt) -> bool:
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+
+
+def _stmt_names(stmts: List[ast.stmt]) -> List[str]:
+    names = []
+    for s in stmts:
+        if isinstance(s, (ast.Import, ast.ImportFrom)):
+            names.extend(a.asname or a.name for a in s.names)
+        elif isinstance(s, ast.Assign):
+            names.extend(t.id for t in s.targets if isinstance(t, ast.Name))
+        elif isinstance(s, ast.AnnAssign) and isinstance(s.target, ast.Name):
+            names.append(s.target.id)
+    return names or ["statements"]
+
+
+def _signature(node: ast.AST, lines: List[str]) -> str:
+    header = " ".join(line.strip() for line in lines[node.lineno - 1:node.body[0].lineno - 1]).rstrip(":")
+    if not header:       # one-line definition
+        header = lines[node.lineno - 1].strip().split(":", 1)[0]
+    doc = ast.get_docstring(node)
+    summary = f"  # {doc.strip().splitlines()[0]}" if doc else ""
+    if isinstance(node, ast.ClassDef):
+        methods = [n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        if methods:
+            summary += f"  (methods: {', '.join(methods)})"
+    return header + summary
+
+
+def _json_sections(text: str) -> Optional[List[Section]]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(data, dict):
+        items = [(str(k), {k: v}, v) for k, v in data.items()]
+    elif isinstance(data, list):
+        items = []
+        for i, v in enumerate(data):
+            name = str(v.get("name") or v.get("id") or i) if isinstance(v, dict) else str(i)
+            items.append((name, v, v))
+    else:
+        return None
+    sections = []
+    for name, shown, value in items:
+        kind = f"{type(value).__name__}[{len(value)}]" if isinstance(value, (list, dict)) else repr(value)[:40]
+        sections.append(Section(name, f"{name}: {kind}", json.dumps(shown, indent=2) + "\n"))
+    return sections
+
+
+def _block_sections(text: str) -> List[Section]:
+    """Blank-line separated blocks, merged up to BLOCK_LINES lines."""
+    sections: List[Section] = []
+    current: List[str] = []
+    for line in text.splitlines(keepends=True):
+        current.append(line)
+        if not line.strip() and len(current) >= BLOCK_LINES:
+            sections.append(current)
+            current = []
+    if current:
+        sections.append(current)
+    out = []
+    for i, block in enumerate(sections):
+        first = next((line.strip() for line in block if line.strip()), "")
+        out.append(Section(f"block:{i + 1}", first[:100], "".join(block)))
+    return out
+
+
+class _SectionCache:
+    """split_sections() results keyed on (blob sha, file type); files rarely change between attempts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], List[Section]] = {}
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, path: str, text: str) -> List[Section]:
+        key = (blob_sha(text), _kind(path))
+        with self._lock:
+            sections = self._entries.get(key)
+            self.stats["hits" if sections is not None else "misses"] += 1
+        if sections is None:
+            sections = _split(path, text)
+            with self._lock:
+                self._entries[key] = sections
+        return sections
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _kind(path: str) -> str:
+    return path.rsplit(".", 1)[-1].lower() if "." in path else ""
+
+
+def _split(path: str, text: str) -> List[Section]:
+    kind = _kind(path)
+    sections = None
+    if kind == "py":
+        sections = _python_sections(text)
+    elif kind == "json":
+        sections = _json_sections(text)
+    sections = sections or _block_sections(text)
+    for s in sections:
+        s.terms = terms(s.name + " " + s.text)
+    return sections
+
+
+SECTIONS = _SectionCache()
+
+
+def split_sections(path: str, text: str) -> List[Section]:
+    return SECTIONS.get(path, text)
+
+
+@dataclass
+class PackedContext:
+    files: Dict[str, str]           # what goes in the prompt, in prompt order
+    full: List[str]
+    sliced: List[str]
+    omitted: List[str]
+    tokens: int
+    unpacked_tokens: int
+    budget: int
+
+    def summary(self) -> dict:
+        return {"tokens": self.tokens, "unpacked_tokens": self.unpacked_tokens, "budget": self.budget,
+                "full": self.full, "sliced": self.sliced, "omitted": self.omitted}
+
+
+def _bm25(query: List[str], docs: List[List[str]], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    if not docs:
+        return []
+    n = len(docs)
+    avg = sum(len(d) for d in docs) / n or 1.0
+    df: Dict[str, int] = {}
+    for d in docs:
+        for t in set(d):
+            df[t] = df.get(t, 0) + 1
+    wanted = set(query)
+    scores = []
+    for d in docs:
+        tf: Dict[str, int] = {}
+        for t in d:
+            if t in wanted:
+                tf[t] = tf.get(t, 0) + 1
+        score = 0.0
+        for t, f in tf.items():
+            idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+            score += idf * f * (k1 + 1) / (f + k1 * (1 - b + b * len(d) / avg))
+        scores.append(score)
+    return scores
+
+
+def _excerpt(sections: List[Section], keep: set) -> str:
+    parts = [f"... excerpt: {len(keep)} of {len(sections)} sections shown; "
+             f"the others are listed by signature at the end ...\n"]
+    for i, s in enumerate(sections):
+        if i in keep:
+            parts.append(s.text if s.text.endswith("\n") else s.text + "\n")
+    rest = [s.signature for i, s in enumerate(sections) if i not in keep]
+    if rest:
+        parts.append("... not shown:\n")
+        parts.extend(f"...   {sig}\n" for sig in rest)
+    return "".join(parts)
+
+
+def pack_context(query: str, files: Dict[str, str], editable: Iterable[str], budget: int) -> PackedContext:
+    """
+    Choose what of `files` goes into the prompt for an issue described by `query`.
+
+    Editable files are always sent in full: the agent returns whole files, so
+    it must see them whole. The rest of the budget (in estimated tokens) goes
+    to read-only files, most relevant first (BM25 over their sections, with a
+    boost for files the query names). Each gets at least one-line signatures
+    of its sections while the budget lasts; a file that fits is sent in full,
+    otherwise its most relevant sections are added to the signatures. Files
+    for which not even the signatures fit are left out.
+    """
+    editable = set(editable)
+    out: Dict[str, str] = {}
+    full, sliced, omitted = [], [], []
+    used = 0
+    for path, text in files.items():
+        if path in editable:
+            out[path] = text
+            full.append(path)
+            used += estimate_tokens(text)
+    unpacked = used + sum(estimate_tokens(t) for p, t in files.items() if p not in editable)
+
+    read_only = [(p, t) for p, t in files.items() if p not in editable]
+    q = terms(query)
+    lowered = query.lower()
+    per_file = {p: split_sections(p, t) for p, t in read_only}
+    flat = [(p, i, s) for p, secs in per_file.items() for i, s in enumerate(secs)]
+    scores = _bm25(q, [s.terms for _, _, s in flat])
+    section_score: Dict[Tuple[str, int], float] = {(p, i): sc for (p, i, _), sc in zip(flat, scores)}
+
+    def file_score(path: str) -> float:
+        best = max((section_score[(path, i)] for i in range(len(per_file[path]))), default=0.0)
+        named = path.lower() in lowered or path.rsplit("/", 1)[-1].lower() in lowered
+        return best + (100.0 if named else 2.0 * len(set(terms(path)) & set(q)))
+
+    ranked_files = sorted(read_only, key=lambda item: -file_score(item[0]))
+    # Every read-only file is owed at least its signatures (the smaller of
+    # that and its full text), most relevant first, so one large relevant
+    # file can't crowd all the others out of the prompt.
+    floor = {}
+    for path, text in ranked_files:
+        cost = min(estimate_tokens(text), estimate_tokens(_excerpt(per_file[path], set())))
+        if used + sum(floor.values()) + cost <= budget:
+            floor[path] = cost
+
+    for path, text in ranked_files:
+        if path not in floor:
+            omitted.append(path)
+            continue
+        reserved = sum(floor.values())
+        available = budget - used - reserved + floor.pop(path)
+        cost = estimate_tokens(text)
+        if cost <= available:
+            out[path], used = text, used + cost
+            full.append(path)
+            continue
+        sections = per_file[path]
+        keep: set = set()
+        excerpt = _excerpt(sections, keep)
+        ranked = sorted((i for i in range(len(sections)) if section_score[(path, i)] > 0),
+                        key=lambda i: -section_score[(path, i)])
+        for i in ranked:
+            candidate = _excerpt(sections, keep | {i})
+            if estimate_tokens(candidate) <= available:
+                keep.add(i)
+                excerpt = candidate
+        out[path], used = excerpt, used + estimate_tokens(excerpt)
+        sliced.append(path)
+
+    # Keep the caller's file order in the prompt.
+    ordered = {p: out[p] for p in files if p in out}
+    return PackedContext(ordered, full, sliced, omitted, used, unpacked, budget)
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+
+import requests
+
+_BODY_HEADERS = {"content-length", "content-type", "content-encoding", "transfer-encoding"}
+
+
+class CachingSession(requests.Session):
+    """
+    requests.Session that revalidates GET responses instead of refetching them.
+
+    Successful GET responses carrying an ETag or Last-Modified header are
+    kept (up to `max_entries`, least recently used dropped first). The next
+    GET for the same URL, params and Accept header sends If-None-Match /
+    If-Modified-Since; a 304 is answered from the cache. GitHub does not count
+    304s against the rate limit. Every cached response is revalidated, so a
+    write through the API is always seen by the next read.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        super().__init__()
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"gets": 0, "revalidated": 0, "stored": 0}
+
+    def _key(self, url, params, headers):
+        accept = (headers or {}).get("Accept") or self.headers.get("Accept")
+        items = tuple(sorted((params or {}).items())) if isinstance(params, dict) else params
+        return url, items, accept
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        if method.upper() != "GET":
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+
+        key = self._key(url, params, headers)
+        with self._lock:
+            self.stats["gets"] += 1
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            headers = dict(headers or {})
+            if cached.headers.get("ETag"):
+                headers["If-None-Match"] = cached.headers["ETag"]
+            if cached.headers.get("Last-Modified"):
+                headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        r = super().request(method, url, params=params, headers=headers, **kwargs)
+
+        if r.status_code == 304 and cached is not None:
+            with self._lock:
+                self.stats["revalidated"] += 1
+            return _replay(cached, r)
+        if r.status_code == 200 and (r.headers.get("ETag") or r.headers.get("Last-Modified")):
+            r.content  # read the body now so the cached copy is complete
+            with self._lock:
+                self._cache[key] = r
+                self._cache.move_to_end(key)
+                self.stats["stored"] += 1
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return r
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+
+def _replay(cached: requests.Response, not_modified: requests.Response) -> requests.Response:
+    r = requests.Response()
+    r.status_code = cached.status_code
+    r._content = cached.content
+    r.headers = requests.structures.CaseInsensitiveDict(cached.headers)
+    # Rate-limit headers etc. are current on the 304, not on the cached copy.
+    for name, value in not_modified.headers.items():
+        if name.lower() not in _BODY_HEADERS:
+            r.headers[name] = value
+    r.url = cached.url
+    r.encoding = cached.encoding
+    r.request = not_modified.request
+    r.from_cache = True
+    return r
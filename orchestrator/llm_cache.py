@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+MODES = ("record", "replay", "bypass")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Replay mode was asked for a prompt that was never recorded."""
+
+
+class LLMCache:
+    """
+    On-disk cache of model outputs, keyed on a sha256 of (backend, model,
+    system prompt, prompt, temperature).
+
+    - record: a hit is returned without calling the model; a miss calls it
+      and stores the output;
+    - replay: hits only, a miss raises LLMCacheMiss, so a rerun is
+      deterministic and never reaches the model;
+    - bypass: always calls the model and leaves the cache alone (the default,
+      so live experiment runs are unchanged).
+
+    Each entry is one JSON file, written to a temporary file and renamed into
+    place, so concurrent issues and crashed runs never leave half an entry.
+    When the entries exceed `max_bytes`, the least recently used are deleted.
+    """
+
+    def __init__(self, directory: str = ".llm_cache", mode: str = "bypass", max_bytes: int = 512 << 20):
+        if mode not in MODES:
+            raise ValueError(f"LLM cache mode must be one of {', '.join(MODES)}, not {mode!r}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._index: Optional[OrderedDict] = None    # key -> size, least recently used first
+
+    @classmethod
+    def from_env(cls) -> "LLMCache":
+        return cls(os.environ.get("LLM_CACHE_DIR", ".llm_cache"),
+                   os.environ.get("LLM_CACHE_MODE", "bypass").lower(),
+                   int(float(os.environ.get("LLM_CACHE_MAX_MB", "512")) * (1 << 20)))
+
+    @staticmethod
+    def key(backend: str, model: str, system: str, prompt: str, temperature: Optional[float]) -> str:
+        blob = json.dumps([backend, model, system, prompt, temperature], ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> OrderedDict:
+        if self._index is None:
+            entries = []
+            for path in self.directory.glob("*/*.json"):
+                st = path.stat()
+                entries.append((st.st_mtime_ns, path.stem, st.st_size))
+            self._index = OrderedDict((key, size) for _, key, size in sorted(entries))
+        return self._index
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The stored entry ({"response", "complete", ...}), or None; always None in bypass mode."""
+        if self.mode == "bypass":
+            return None
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            index = self._load_index()
+            if key in index:
+                index.move_to_end(key)
+        try:
+            os.utime(path)      # keeps the LRU order across runs
+        except OSError:
+            pass
+        return entry
+
+    def miss(self, key: str):
+        """Called before going to the model; raises in replay mode."""
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"no recorded model output for prompt {key[:12]} in {self.directory}")
+
+    def put(self, key: str, response: str, complete: bool = True, **meta):
+        """
+        Store a model output. `complete=False` marks output that was cut off
+        on purpose (an early guardrail abort) so a replay can abort the same way.
+        """
+        if self.mode != "record":
+            return
+        entry = {"response": response, "complete": complete,
+                 "created": datetime.now(timezone.utc).isoformat(), **meta}
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            index = self._load_index()
+            index[key] = len(data)
+            index.move_to_end(key)
+            self.stats["stores"] += 1
+            self._evict(index)
+
+    def _evict(self, index: OrderedDict):
+        total = sum(index.values())
+        while total > self.max_bytes and len(index) > 1:
+            key, size = index.popitem(last=False)
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.stats["evictions"] += 1
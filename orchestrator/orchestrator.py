@@ -1,7 +1,15 @@
-import os, time, json, requests
+import os, re, time, json, argparse, threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import base64
 
+from orchestrator.concurrency import FairSemaphore, IssueTracker
+from orchestrator.context import pack_context
+from orchestrator.github_client import CachingSession
+from orchestrator.ratelimit import RequestScheduler
+from orchestrator.stream_guard import MAX_FILES, GuardrailAbort, safe_b64decode_to_text
+from orchestrator.webhook import CIWaiter, WebhookReceiver
+
 AGENT_BACKEND = os.environ.get("AGENT_BACKEND", "ollama").lower()
 
 if AGENT_BACKEND == "openai":
@@ -12,14 +20,34 @@ else:
 OWNER = "ArrianTabatabai"
 REPO = "ai-agile-agents-demo"
 BASE_BRANCH = os.environ.get("BASE_BRANCH", "main")
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
 
 TRIGGER_LABEL = "ai:dev"
 IN_PROGRESS_LABEL = "ai:in-progress"
 POLL_SECONDS = 20
+CI_TIMEOUT_SECONDS = 30 * POLL_SECONDS
+# With webhooks, CI completion wakes the waiting issue directly and the API
+# is only polled this often as a fallback for missed deliveries.
+WEBHOOK_FALLBACK_POLL_SECONDS = 120
 
 LOG_PATH = os.path.join("orchestrator", "logs", "events.jsonl")
 
-session = requests.Session()
+# Long-running mode: issues worked on at once, and how many of them may be
+# talking to the LLM at the same time (a local Ollama serves one at a time).
+MAX_CONCURRENT_ISSUES = int(os.environ.get("MAX_CONCURRENT_ISSUES", "4"))
+LLM_SLOTS = FairSemaphore(int(os.environ.get("LLM_CONCURRENCY", "1")))
+LOOP_INTERVAL_SECONDS = 60
+# Estimated prompt tokens for repo context. Editable files always go in
+# whole; read-only files are sliced to what is left.
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "12000"))
+WEBHOOK_LOOP_INTERVAL_SECONDS = 600
+
+CI_WAITER = CIWaiter()
+ci_poll_seconds = POLL_SECONDS
+
+_log_lock = threading.Lock()
+
+session = CachingSession()
 session.headers.update({
     "Accept": "application/vnd.github+json",
     "Authorization": f"Bearer {os.environ['GITHUB_TOKEN']}",
@@ -28,22 +56,27 @@ session.headers.update({
 
 def log(event: dict):
     event["ts"] = datetime.now(timezone.utc).isoformat()
-    with open(LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(event) + "\n")
-    print(json.dumps(event, indent=2))
+    # Issues run on several threads; keep each event's lines together.
+    with _log_lock:
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+        print(json.dumps(event, indent=2))
+
+# Paces calls against GitHub's rate limits and retries 429s / transient errors.
+scheduler = RequestScheduler(on_event=log)
 
 def gh(url, method="GET", **kwargs):
-    r = session.request(method, url, **kwargs)
+    r = scheduler.call(session.request, method, url, **kwargs)
     if r.status_code >= 400:
         raise RuntimeError(f"{method} {url} -> {r.status_code}: {r.text}")
     return r.json() if r.text else None
 
 def repo_url(path: str) -> str:
-    return f"https://api.github.com/repos/{OWNER}/{REPO}{path}"
+    return f"{API_URL}/repos/{OWNER}/{REPO}{path}"
 
-def list_trigger_issues():
+def list_trigger_issues(limit: int = 5):
     q = f"repo:{OWNER}/{REPO} is:issue is:open label:\"{TRIGGER_LABEL}\" -label:\"{IN_PROGRESS_LABEL}\""
-    data = gh("https://api.github.com/search/issues", params={"q": q, "per_page": 5})
+    data = gh(f"{API_URL}/search/issues", params={"q": q, "per_page": limit})
     return data["items"]
 
 def add_labels(issue_number: int, labels: list[str]):
@@ -59,15 +92,6 @@ def get_branch_head_sha(branch: str) -> str:
 def create_branch(new_branch: str, from_sha: str):
     gh(repo_url("/git/refs"), method="POST", json={"ref": f"refs/heads/{new_branch}", "sha": from_sha})
 
-def create_file_on_branch(branch: str, path: str, content: str, message: str):
-    import base64
-    b64 = base64.b64encode(content.encode("utf-8")).decode("utf-8")
-    gh(repo_url(f"/contents/{path}"), method="PUT", json={
-        "message": message,
-        "content": b64,
-        "branch": branch
-    })
-
 def open_pr(branch: str, title: str, body: str):
     return gh(repo_url("/pulls"), method="POST", json={
         "title": title, "head": branch, "base": BASE_BRANCH, "body": body
@@ -94,45 +118,59 @@ def get_check_runs(sha: str):
 
     return {"status": "completed", "conclusion": "neutral", "runs": runs}
 
+# File contents at a commit sha never change, so they are fetched once per run.
+_content_memo: dict[tuple[str, str], str] = {}
+_content_memo_lock = threading.Lock()
+
+def is_commit_sha(ref: str) -> bool:
+    return re.fullmatch(r"[0-9a-f]{40}", ref or "") is not None
+
 def get_file_content(path: str, ref: str = BASE_BRANCH) -> str:
-    """Fetch a file from GitHub repo at a given ref (branch)."""
+    """Fetch a file from GitHub repo at a given ref (branch or commit sha)."""
+    if is_commit_sha(ref):
+        with _content_memo_lock:
+            if (path, ref) in _content_memo:
+                return _content_memo[(path, ref)]
     data = gh(repo_url(f"/contents/{path}"), params={"ref": ref})
     if data.get("encoding") == "base64":
-        return base64.b64decode(data["content"]).decode("utf-8", errors="replace")
+        content = base64.b64decode(data["content"]).decode("utf-8", errors="replace")
+        if is_commit_sha(ref):
+            with _content_memo_lock:
+                _content_memo[(path, ref)] = content
+        return content
     raise RuntimeError(f"Unexpected encoding for {path}")
 
-def upsert_file(branch: str, path: str, content: str, message: str):
-    """Create or update file on a branch using GitHub Contents API."""
-    b64 = base64.b64encode(content.encode("utf-8")).decode("utf-8")
-    url = repo_url(f"/contents/{path}")
-
-    # Try fetch existing file to get sha (required to update)
-    sha = None
-    try:
-        existing = gh(url, params={"ref": branch})
-        sha = existing.get("sha")
-    except RuntimeError as e:
-        if "404" not in str(e):
-            raise
-
-    payload = {
-        "message": message,
-        "content": b64,
-        "branch": branch,
-    }
-    if sha:
-        payload["sha"] = sha
-
-    gh(url, method="PUT", json=payload)
-
-def safe_b64decode_to_text(b64_str: str) -> str:
-    # Remove whitespace/newlines just in case
-    s = "".join(b64_str.split())
-    # Fix missing padding
-    missing = (-len(s)) % 4
-    if missing:
-        s += "=" * missing
-    return base64.b64decode(s).decode("utf-8", errors="replace")
+def commit_files(branch: str, files: dict[str, str], message: str, retries: int = 3) -> str:
+    """
+    Commit several files to a branch as one commit using the Git Data API.
+
+    One tree (file contents inline, on top of the head commit's tree), one
+    commit and one ref update, whatever the number of files: four requests
+    instead of two per file, and a single CI run. The ref is moved with
+    force=false, so if someone else pushed to the branch in the meantime
+    GitHub answers 422 and the commit is rebuilt on the new head. Returns
+    the new commit sha.
+    """
+    for attempt in range(1, retries + 1):
+        head_sha = get_branch_head_sha(branch)
+        base_tree = gh(repo_url(f"/git/commits/{head_sha}"))["tree"]["sha"]
+        tree = gh(repo_url("/git/trees"), method="POST", json={
+            "base_tree": base_tree,
+            "tree": [{"path": path, "mode": "100644", "type": "blob", "content": content}
+                     for path, content in files.items()],
+        })
+        commit = gh(repo_url("/git/commits"), method="POST", json={
+            "message": message, "tree": tree["sha"], "parents": [head_sha],
+        })
+        try:
+            gh(repo_url(f"/git/refs/heads/{branch}"), method="PATCH", json={"sha": commit["sha"], "force": False})
+        except RuntimeError as e:
+            # 422 "Update is not a fast forward": the branch moved under us.
+            if "-> 422" not in str(e) or attempt == retries:
+                raise
+            log({"event": "ref_update_conflict", "branch": branch, "attempt": attempt, "head_sha": head_sha})
+            continue
+        return commit["sha"]
 
 def get_latest_ci_feedback_from_issue(issue_number: int) -> str | None:
     """
@@ -183,13 +221,24 @@ def is_destructive_shrink(path: str, new_content: str, base_ref: str, threshold:
 
     return new_len < (1.0 - threshold) * old_len
 
-def process_issue(issue):
+def set_state(tracker: IssueTracker | None, issue_number: int, state: str):
+    if tracker is not None:
+        tracker.transition(issue_number, state)
+
+def process_issue(issue, tracker: IssueTracker | None = None):
+    """
+    Work one issue from branch creation to CI result.
+
+    Returns "done" or "blocked"; raises after marking the issue blocked if
+    anything crashes. With a tracker, the issue's state is updated as it goes.
+    """
     issue_number = issue.get("number", None)
     pr_num = None
     pr_url = None
 
     try:
         issue_number = issue["number"]
+        set_state(tracker, issue_number, "preparing")
         issue_title = issue.get("title") or f"Issue {issue_number}"
         issue_body = issue.get("body") or ""
 
@@ -206,10 +255,12 @@ def process_issue(issue):
         log({"event": "branch_created", "issue": issue_number, "branch": branch, "base_sha": base_sha})
 
         # Minimal repo context bundle (keep small/reliable)
+        # Read at base_sha (what the branch was created from) so every read
+        # of the base in this run sees the same, memoised, content.
         repo_context = {
-            "app/rules.py": get_file_content("app/rules.py", ref=BASE_BRANCH),
-            "docs/policy.json": get_file_content("docs/policy.json", ref=BASE_BRANCH),
-            "site/index.html": get_file_content("site/index.html", ref=BASE_BRANCH),
+            "app/rules.py": get_file_content("app/rules.py", ref=base_sha),
+            "docs/policy.json": get_file_content("docs/policy.json", ref=base_sha),
+            "site/index.html": get_file_content("site/index.html", ref=base_sha),
         }
 
         # Allowlist: prevent hallucinated file changes
@@ -224,14 +275,31 @@ def process_issue(issue):
 
         for attempt in range(1, max_attempts + 1):
             log({"event": "agent_attempt_start", "issue": issue_number, "attempt": attempt})
+            set_state(tracker, issue_number, "generating")
 
-            # Ask local LLM (Ollama) for edits
-            result = generate_file_edits(
-                issue_title=issue_title,
-                issue_body=issue_body,
-                repo_files=repo_context,
-                ci_feedback=ci_feedback
-            )
+            packed = pack_context(f"{issue_title}\n{issue_body}\n{ci_feedback or ''}", repo_context,
+                                  ALLOWED_PATHS, CONTEXT_TOKEN_BUDGET)
+            log({"event": "context_packed", "issue": issue_number, "attempt": attempt, **packed.summary()})
+
+            # Ask local LLM (Ollama) for edits. Only the LLM call holds a slot,
+            # so issues waiting on CI never hold up generation for others.
+            try:
+                with LLM_SLOTS:
+                    result = generate_file_edits(
+                        issue_title=issue_title,
+                        issue_body=issue_body,
+                        repo_files=packed.files,
+                        ci_feedback=ci_feedback,
+                        allowed_paths=ALLOWED_PATHS
+                    )
+            except GuardrailAbort as abort:
+                # Streaming backend stopped the model as soon as the output was doomed.
+                log({"event": "guardrail_triggered", "issue": issue_number, "attempt": attempt,
+                     "reason": abort.reason, "detail": abort.detail, "early_abort": True, "chars": abort.chars})
+                comment(issue_number, f"Blocked: model output failed a guardrail while generating ({abort}).")
+                add_labels(issue_number, ["ai:blocked"])
+                return "blocked"
+            set_state(tracker, issue_number, "pushing")
 
             summary = (result.get("summary") or "").strip()
             files = result["files"]
@@ -241,10 +309,10 @@ def process_issue(issue):
                 log({"event": "guardrail_triggered", "issue": issue_number, "attempt": attempt, "reason": "no_op"})
                 comment(issue_number, "Blocked: model produced no file changes (no-op), so no PR can be created. Please refine requirements or provide CI_FEEDBACK.")
                 add_labels(issue_number, ["ai:blocked"])
-                return
+                return "blocked"
 
             # Guardrail: keep diffs small (files touched)
-            if len(files) > 3:
+            if len(files) > MAX_FILES:
                 log({
                     "event": "guardrail_triggered",
                     "issue": issue_number,
@@ -254,9 +322,9 @@ def process_issue(issue):
                 })
                 comment(issue_number, f"Blocked: model attempted to change too many files ({len(files)}).")
                 add_labels(issue_number, ["ai:blocked"])
-                return
+                return "blocked"
 
-            changed_paths = []
+            changes = {}
             for f in files:
                 path = f["path"].strip()
 
@@ -271,7 +339,7 @@ def process_issue(issue):
                     })
                     comment(issue_number, f"Blocked: invalid file path from model: {path}")
                     add_labels(issue_number, ["ai:blocked"])
-                    return
+                    return "blocked"
 
                 # Guardrail: allowlist only
                 if path not in ALLOWED_PATHS:
@@ -284,7 +352,7 @@ def process_issue(issue):
                     })
                     comment(issue_number, f"Blocked: model attempted to edit disallowed file: {path}")
                     add_labels(issue_number, ["ai:blocked"])
-                    return
+                    return "blocked"
 
                 # Decode base64 file content from the model
                 try:
@@ -300,7 +368,7 @@ def process_issue(issue):
                     })
                     comment(issue_number, f"Blocked: could not decode content for {path}")
                     add_labels(issue_number, ["ai:blocked"])
-                    return
+                    return "blocked"
                 
                 # Guardrail: don't allow wiping the UI file
                 if path == "site/index.html" and len(content.strip()) < 200:
@@ -308,7 +376,7 @@ def process_issue(issue):
                         "reason": "index_html_too_small", "chars": len(content.strip())})
                     comment(issue_number, "Blocked: attempted to overwrite site/index.html with very small/empty content.")
                     add_labels(issue_number, ["ai:blocked"])
-                    return
+                    return "blocked"
                 
                 if path.endswith(".py"):
                     cleaned = strip_control_chars(content)
@@ -321,7 +389,7 @@ def process_issue(issue):
                                 "reason": "nonprintable_in_python_after_sanitize", "path": path})
                             comment(issue_number, f"Blocked: non-printable characters still detected in {path} after sanitizing.")
                             add_labels(issue_number, ["ai:blocked"])
-                            return
+                            return "blocked"
                         
                 # Guardrail: prevent destructive rewrites of Python files
                 if path.endswith(".py"):
@@ -334,38 +402,37 @@ def process_issue(issue):
                                 "reason": "missing_required_symbols", "path": path, "missing": missing})
                             comment(issue_number, f"Blocked: app/rules.py missing required definitions: {', '.join(missing)}")
                             add_labels(issue_number, ["ai:blocked"])
-                            return
+                            return "blocked"
 
                         # If functions exist, still block extreme shrink (optional safety)
-                        if is_destructive_shrink(path, content, BASE_BRANCH, threshold=0.60):
+                        if is_destructive_shrink(path, content, base_sha, threshold=0.60):
                             log({"event": "guardrail_triggered", "issue": issue_number, "attempt": attempt,
                                 "reason": "destructive_rewrite_shrink", "path": path})
                             comment(issue_number, f"Blocked: destructive rewrite detected for {path} (file shrank >60%).")
                             add_labels(issue_number, ["ai:blocked"])
-                            return
+                            return "blocked"
 
                     else:
                         # For other python files, keep original shrink guardrail
-                        if is_destructive_shrink(path, content, BASE_BRANCH, threshold=0.60):
+                        if is_destructive_shrink(path, content, base_sha, threshold=0.60):
                             log({"event": "guardrail_triggered", "issue": issue_number, "attempt": attempt,
                                 "reason": "destructive_rewrite_shrink", "path": path})
                             comment(issue_number, f"Blocked: destructive rewrite detected for {path} (file shrank >60%).")
                             add_labels(issue_number, ["ai:blocked"])
-                            return
+                            return "blocked"
 
-                upsert_file(
-                    branch=branch,
-                    path=path,
-                    content=content,
-                    message=f"AI: attempt {attempt} for issue #{issue_number}"
-                )
-                changed_paths.append(path)
+                changes[path] = content
+
+            # Every file passed the guardrails: push them as one commit.
+            changed_paths = list(changes)
+            commit_sha = commit_files(branch, changes, f"AI: attempt {attempt} for issue #{issue_number}")
 
             log({
                 "event": "agent_changes_pushed",
                 "issue": issue_number,
                 "attempt": attempt,
                 "files": changed_paths,
+                "commit": commit_sha,
                 "summary": summary
             })
 
@@ -393,10 +460,14 @@ def process_issue(issue):
 
                 log({"event": "pr_found_for_retry", "issue": issue_number, "pr": pr_num, "pr_url": pr_url, "sha": head_sha})
 
-            # Poll CI status
+            # Poll CI status; a webhook for head_sha cuts the wait short.
+            set_state(tracker, issue_number, "waiting_ci")
             final_conclusion = None
             last_status = None
-            for poll in range(30):
+            deadline = time.monotonic() + CI_TIMEOUT_SECONDS
+            poll = 0
+            while True:
+                poll += 1
                 status = get_check_runs(head_sha)
                 last_status = status
                 log({
@@ -404,7 +475,7 @@ def process_issue(issue):
                     "issue": issue_number,
                     "pr": pr_num,
                     "attempt": attempt,
-                    "poll": poll + 1,
+                    "poll": poll,
                     "ci_status": status["status"],
                     "ci_conclusion": status["conclusion"]
                 })
@@ -413,14 +484,18 @@ def process_issue(issue):
                     final_conclusion = status["conclusion"]
                     break
 
-                time.sleep(POLL_SECONDS)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                CI_WAITER.wait(head_sha, min(ci_poll_seconds, remaining))
+            CI_WAITER.forget(head_sha)
 
             # If CI never completed, treat as blocked
             if final_conclusion is None:
                 comment(issue_number, f"Blocked: CI did not complete in time for PR {pr_url}")
                 add_labels(issue_number, ["ai:blocked"])
                 log({"event": "agent_blocked_ci_timeout", "issue": issue_number, "pr": pr_num})
-                return
+                return "blocked"
 
             # Success path
             if final_conclusion == "success":
@@ -432,7 +507,7 @@ def process_issue(issue):
 
                 add_labels(issue_number, ["ai:done"])
                 log({"event": "agent_success", "issue": issue_number, "pr": pr_num, "attempt": attempt})
-                return
+                return "done"
 
             # Failure path (retry once)
             comment(issue_number, f"CI result: **failure** (attempt {attempt})")
@@ -472,7 +547,7 @@ def process_issue(issue):
             else:
                 add_labels(issue_number, ["ai:blocked"])
                 log({"event": "agent_failed", "issue": issue_number, "pr": pr_num})
-                return
+                return "blocked"
 
     except Exception as e:
         # Crash-safe: ensure issue is marked blocked even if something unexpected happens
@@ -489,7 +564,103 @@ def process_issue(issue):
 
         raise
 
-def main():
+def run_issue(issue, tracker: IssueTracker) -> str:
+    """process_issue() for the worker pool: records the terminal state and never raises."""
+    issue_number = issue["number"]
+    try:
+        outcome = process_issue(issue, tracker)
+    except Exception:
+        outcome = "failed"      # already logged and labelled by process_issue
+    tracker.transition(issue_number, outcome)
+    return outcome
+
+def schedule(issue, pool: ThreadPoolExecutor, tracker: IssueTracker) -> bool:
+    """Queue an issue on the pool unless it has been seen already. Safe to call from any thread."""
+    if not tracker.claim(issue["number"]):
+        return False
+    pool.submit(run_issue, issue, tracker)
+    log({"event": "issue_scheduled", "issue": issue["number"], "active": len(tracker.active())})
+    return True
+
+def schedule_from_webhook(issue, pool: ThreadPoolExecutor, tracker: IssueTracker) -> bool:
+    """schedule() for a labelled issue from a webhook, with the filters list_trigger_issues() searches with."""
+    labels = {label.get("name") for label in issue.get("labels", [])}
+    if issue.get("state", "open") != "open" or "pull_request" in issue:
+        reason = "not_open_issue"
+    elif IN_PROGRESS_LABEL in labels:
+        reason = "in_progress"
+    else:
+        return schedule(issue, pool, tracker)
+    log({"event": "webhook_issue_skipped", "issue": issue["number"], "reason": reason})
+    return False
+
+def run_loop(max_issues: int = MAX_CONCURRENT_ISSUES, interval: float = LOOP_INTERVAL_SECONDS,
+             iterations: int | None = None, tracker: IssueTracker | None = None,
+             webhook_port: int | None = None):
+    """
+    Long-running mode: work up to `max_issues` issues at once on a thread
+    pool; further issues wait in the pool's queue in arrival order.
+
+    Issues are found by searching every `interval` seconds. With
+    `webhook_port`, a webhook receiver also schedules issues the moment they
+    are labelled and wakes issues waiting on CI, so the search and CI polls
+    only act as a fallback.
+    """
+    global ci_poll_seconds
+    tracker = tracker or IssueTracker(on_change=log)
+    log({"event": "orchestrator_started", "mode": "loop", "max_issues": max_issues, "webhook_port": webhook_port})
+    polls = 0
+    with ThreadPoolExecutor(max_workers=max_issues, thread_name_prefix="issue") as pool:
+        receiver = None
+        if webhook_port is not None:
+            receiver = WebhookReceiver(CI_WAITER, lambda issue: schedule_from_webhook(issue, pool, tracker), TRIGGER_LABEL,
+                                       secret=os.environ.get("WEBHOOK_SECRET"), on_event=log)
+            port = receiver.start(port=webhook_port)
+            ci_poll_seconds = WEBHOOK_FALLBACK_POLL_SECONDS
+            log({"event": "webhook_listening", "port": port})
+        try:
+            while iterations is None or polls < iterations:
+                polls += 1
+                try:
+                    issues = list_trigger_issues(limit=max(5, max_issues))
+                except Exception as e:
+                    log({"event": "error", "message": str(e)})
+                    issues = []
+                for issue in issues:
+                    schedule(issue, pool, tracker)
+                if iterations is None or polls < iterations:
+                    time.sleep(interval)
+        finally:
+            if receiver is not None:
+                receiver.stop()
+    ci_poll_seconds = POLL_SECONDS
+    log({"event": "loop_stopped", "states": tracker.counts()})
+    return tracker
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m orchestrator.orchestrator")
+    parser.add_argument("--loop", action="store_true", help="keep polling and work several issues at once")
+    parser.add_argument("--max-issues", type=int, default=MAX_CONCURRENT_ISSUES, help="issues in flight (loop mode)")
+    parser.add_argument("--llm-concurrency", type=int, help="concurrent LLM calls (default: $LLM_CONCURRENCY or 1)")
+    parser.add_argument("--interval", type=float,
+                        help=f"seconds between issue searches (loop mode; default {LOOP_INTERVAL_SECONDS}, "
+                             f"{WEBHOOK_LOOP_INTERVAL_SECONDS} with --webhook-port)")
+    parser.add_argument("--webhook-port", type=int, help="receive GitHub webhooks on this port (implies --loop)")
+    args = parser.parse_args(argv)
+
+    if args.llm_concurrency:
+        global LLM_SLOTS
+        LLM_SLOTS = FairSemaphore(args.llm_concurrency)
+    if args.loop or args.webhook_port is not None:
+        interval = args.interval
+        if interval is None:
+            interval = WEBHOOK_LOOP_INTERVAL_SECONDS if args.webhook_port is not None else LOOP_INTERVAL_SECONDS
+        try:
+            run_loop(args.max_issues, interval, webhook_port=args.webhook_port)
+        except KeyboardInterrupt:
+            log({"event": "loop_interrupted"})
+        return
+
     log({"event": "orchestrator_started", "mode": "single-run"})
 
     try:
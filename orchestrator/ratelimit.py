@@ -0,0 +1,180 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+# Mutations finish work already in progress, plain reads come next, and the
+# issue search (which only finds new work) goes last: lower-priority calls
+# stop while this much of their resource's budget is left.
+BUDGET_RESERVE = {"mutation": 0, "core": 50, "search": 0}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    `rate` calls per second with bursts of up to `capacity`. acquire() reserves
+    a token (the count may go negative) and sleeps outside the lock, so
+    waiting threads are served in the order they asked.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available; returns the time slept."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+class RequestScheduler:
+    """
+    Paces and retries GitHub API calls.
+
+    - search, core reads and mutations each have a token bucket (GitHub
+      allows 30 searches a minute, 5000 core calls an hour, and asks for a
+      second between mutating calls);
+    - the remaining budget and reset time are read from every response's
+      X-RateLimit-* headers; once a resource is down to a category's
+      BUDGET_RESERVE, calls in that category wait for the reset;
+    - 429s and rate-limit 403s are retried for every method (the request was
+      not processed), after Retry-After, the reset time, or a jittered
+      exponential backoff; 5xx and connection errors are retried only for
+      idempotent methods.
+
+    Call it as call(session.request, method, url, **kwargs).
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, tuple]] = None,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        on_event: Optional[Callable[[dict], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        rates = rates or {"search": (30 / 60, 5), "core": (5000 / 3600, 20), "mutation": (1.0, 1)}
+        self.buckets = {name: TokenBucket(rate, capacity, clock, sleep) for name, (rate, capacity) in rates.items()}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_event = on_event
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.budget: Dict[str, Dict[str, float]] = {}    # resource -> {"remaining", "reset"}
+        self.stats = {"calls": 0, "retries": 0, "budget_waits": 0}
+
+    @staticmethod
+    def category(method: str, url: str) -> str:
+        if method.upper() not in ("GET", "HEAD"):
+            return "mutation"
+        return "search" if "/search/" in url else "core"
+
+    def call(self, send: Callable[..., requests.Response], method: str, url: str, **kwargs) -> requests.Response:
+        category = self.category(method, url)
+        resource = "search" if category == "search" else "core"
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_budget(resource, category)
+            self.buckets[category].acquire()
+            with self._lock:
+                self.stats["calls"] += 1
+            try:
+                r = send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if method.upper() not in IDEMPOTENT_METHODS or attempt == self.max_retries:
+                    raise
+                self._retry(method, url, attempt, self._backoff(attempt), type(e).__name__)
+                continue
+
+            self._record_budget(r)
+            delay = self._retry_delay(method, r, attempt)
+            if delay is None or attempt == self.max_retries:
+                return r
+            self._retry(method, url, attempt, delay, r.status_code)
+
+    def _retry(self, method, url, attempt, delay, reason):
+        with self._lock:
+            self.stats["retries"] += 1
+        if self.on_event:
+            self.on_event({"event": "github_retry", "method": method, "url": url, "attempt": attempt + 1,
+                           "reason": reason, "delay": round(delay, 3)})
+        self._sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from concurrent issues apart.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _retry_delay(self, method: str, r: requests.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying `r`, or None if it should be returned as is."""
+        rate_limited = r.status_code == 429 or (r.status_code == 403 and (
+            "Retry-After" in r.headers or r.headers.get("X-RateLimit-Remaining") == "0"
+            or "rate limit" in r.text.lower()))
+        if not rate_limited:
+            if r.status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS:
+                return self._backoff(attempt)
+            return None
+        retry_after = r.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return min(self.max_delay, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        if r.headers.get("X-RateLimit-Remaining") == "0" and r.headers.get("X-RateLimit-Reset"):
+            return max(0.0, float(r.headers["X-RateLimit-Reset"]) - self._wall_clock())
+        # Secondary limit without a hint: back off, but never hammer.
+        return max(self.base_delay, self._backoff(attempt))
+
+    def _record_budget(self, r: requests.Response):
+        remaining = r.headers.get("X-RateLimit-Remaining")
+        reset = r.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        resource = r.headers.get("X-RateLimit-Resource", "core")
+        try:
+            with self._lock:
+                self.budget[resource] = {"remaining": int(remaining), "reset": float(reset)}
+        except ValueError:
+            pass
+
+    def _wait_for_budget(self, resource: str, category: str):
+        with self._lock:
+            budget = self.budget.get(resource)
+            if budget is None or budget["remaining"] > BUDGET_RESERVE[category]:
+                if budget is not None:
+                    budget["remaining"] -= 1      # until the response tells us better
+                return
+            wait = budget["reset"] - self._wall_clock()
+            if wait <= 0:
+                del self.budget[resource]
+                return
+            self.stats["budget_waits"] += 1
+        if self.on_event:
+            self.on_event({"event": "github_budget_wait", "resource": resource, "category": category,
+                           "seconds": round(wait, 3)})
+        self._sleep(wait)
+        with self._lock:
+            # The window has reset; the next response brings fresh numbers.
+            self.budget.pop(resource, None)
@@ -0,0 +1,165 @@
+import base64
+import json
+from typing import Iterable, List, Optional
+
+MAX_FILES = 3
+
+
+def safe_b64decode_to_text(b64_str: str) -> str:
+    """Decode a model's content_b64 the way process_issue() does; raises if it can't be decoded."""
+    # Remove whitespace/newlines just in case
+    s = "".join(b64_str.split())
+    # Fix missing padding
+    missing = (-len(s)) % 4
+    if missing:
+        s += "=" * missing
+    return base64.b64decode(s).decode("utf-8", errors="replace")
+
+
+class GuardrailAbort(Exception):
+    """The model's output can no longer pass the orchestrator's guardrails."""
+
+    def __init__(self, reason: str, detail=None, chars: int = 0, partial: str = ""):
+        super().__init__(f"{reason}: {detail}" if detail is not None else reason)
+        self.reason = reason
+        self.detail = detail
+        self.chars = chars
+        self.partial = partial
+
+
+def check_path(path: str, allowed_paths: Optional[Iterable[str]]) -> Optional[str]:
+    """The guardrail reason `path` fails (as in process_issue()), or None."""
+    path = path.strip()
+    if path.startswith("/") or ".." in path:
+        return "invalid_path"
+    if allowed_paths is not None and path not in allowed_paths:
+        return "path_not_allowed"
+    return None
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "expect_key")
+
+    def __init__(self, kind: str):
+        self.kind = kind            # "obj" or "arr"
+        self.key = None
+        self.expect_key = kind == "obj"
+
+
+class EditStreamGuard:
+    """
+    Scans the agent's {"summary": ..., "files": [{"path", "content_b64"}]}
+    JSON while it is still being generated and raises GuardrailAbort at the
+    first thing that is certain to get the attempt blocked:
+
+    - a path that is absolute, contains "..", or is not in `allowed_paths`
+      (checked as soon as its closing quote arrives);
+    - a file object beyond `max_files`;
+    - a content_b64 that safe_b64decode_to_text() can't decode (checked
+      when its closing quote arrives, with the decoder process_issue() uses).
+
+    Text before the first "{" and after the object closes is ignored, like
+    the salvage step in generate_file_edits(). Only the first top-level
+    object is checked; the full output is still parsed normally afterwards.
+    """
+
+    def __init__(self, allowed_paths: Optional[Iterable[str]] = None, max_files: int = MAX_FILES):
+        self.allowed_paths = set(allowed_paths) if allowed_paths is not None else None
+        self.max_files = max_files
+        self.files = 0
+        self.chars = 0
+        self._seen: List[str] = []
+        self._stack: List[_Frame] = []
+        self._done = False
+        self._in_string = False
+        self._is_key = False
+        self._b64 = False
+        self._escape = False
+        self._buf: List[str] = []
+
+    def feed(self, text: str):
+        """Add the next piece of output; raises GuardrailAbort if the attempt is doomed."""
+        self._seen.append(text)
+        for ch in text:
+            self.chars += 1
+            if self._done:
+                continue
+            if self._in_string:
+                self._string_char(ch)
+            elif ch == '"':
+                if self._stack:
+                    self._start_string()
+            elif ch in "{[":
+                self._open("obj" if ch == "{" else "arr")
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                    self._done = not self._stack
+            elif ch == ":" and self._stack:
+                self._stack[-1].expect_key = False
+            elif ch == "," and self._stack and self._stack[-1].kind == "obj":
+                self._stack[-1].expect_key = True
+
+    def text(self) -> str:
+        return "".join(self._seen)
+
+    def _abort(self, reason: str, detail=None):
+        raise GuardrailAbort(reason, detail, self.chars, self.text())
+
+    def _in_file_item(self) -> bool:
+        stack = self._stack
+        return len(stack) == 3 and stack[0].key == "files" and stack[1].kind == "arr"
+
+    def _open(self, kind: str):
+        if not self._stack and kind == "arr":
+            return                  # only a top-level object is the agent's answer
+        stack = self._stack
+        if kind == "obj" and len(stack) == 2 and stack[0].key == "files" and stack[1].kind == "arr":
+            self.files += 1
+            if self.files > self.max_files:
+                self._abort("too_many_files", self.files)
+        stack.append(_Frame(kind))
+
+    def _start_string(self):
+        top = self._stack[-1]
+        self._in_string = True
+        self._is_key = top.kind == "obj" and top.expect_key
+        self._b64 = not self._is_key and self._in_file_item() and top.key == "content_b64"
+        self._buf = []
+
+    def _string_char(self, ch: str):
+        if self._escape:
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True
+        elif ch == '"':
+            self._in_string = False
+            self._end_string()
+            return
+        self._buf.append(ch)
+
+    def _end_string(self):
+        top = self._stack[-1]
+        if self._is_key:
+            top.key = self._decoded()
+        elif self._in_file_item() and top.key == "path":
+            path = self._decoded()
+            reason = check_path(path, self.allowed_paths)
+            if reason:
+                self._abort(reason, path.strip())
+        elif self._b64:
+            try:
+                content = json.loads('"%s"' % "".join(self._buf))
+            except ValueError:
+                return              # not valid JSON: left to the final parse
+            try:
+                safe_b64decode_to_text(content)
+            except ValueError:    # binascii.Error
+                self._abort("content_not_base64", top.key)
+
+    def _decoded(self) -> str:
+        raw = "".join(self._buf)
+        try:
+            return json.loads(f'"{raw}"')
+        except ValueError:
+            return raw
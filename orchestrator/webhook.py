@@ -0,0 +1,204 @@
+import hashlib
+import hmac
+import json
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Set
+
+CI_EVENTS = ("check_run", "check_suite")
+# GitHub caps webhook payloads at 25 MB; anything larger isn't from GitHub.
+MAX_BODY_BYTES = 25 << 20
+# Notified shas nobody has waited on yet that CIWaiter keeps; older ones are dropped.
+MAX_PENDING_NOTIFICATIONS = 256
+
+
+class CIWaiter:
+    """
+    Lets an issue sleep until CI reports for a commit instead of a fixed
+    interval. The webhook receiver calls notify() for every completed
+    check_run/check_suite; wait() returns True as soon as the sha it waits
+    for was notified (or already had been), False on timeout. Callers still
+    read the authoritative status from the API afterwards.
+
+    A sha is kept from its first wait() until forget(). Of the shas that were
+    notified but never waited on, only the newest `max_pending` are kept, so
+    CI events for commits nobody watches don't accumulate.
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING_NOTIFICATIONS):
+        self._lock = threading.Lock()
+        self._events: Dict[str, threading.Event] = {}
+        self._waited: Set[str] = set()
+        self.max_pending = max_pending
+
+    def notify(self, sha: str):
+        with self._lock:
+            event = self._events.get(sha)
+            if event is None:
+                event = self._events[sha] = threading.Event()
+                excess = len(self._events) - len(self._waited) - self.max_pending
+                if excess > 0:
+                    # Dicts keep insertion order: the first unwatched shas are the oldest.
+                    for old in [s for s in self._events if s not in self._waited][:excess]:
+                        del self._events[old]
+        event.set()
+
+    def wait(self, sha: str, timeout: float) -> bool:
+        with self._lock:
+            event = self._events.get(sha)
+            if event is None:
+                event = self._events[sha] = threading.Event()
+            self._waited.add(sha)
+        woken = event.wait(timeout)
+        if woken:
+            # Several check runs complete per commit; the next wait should
+            # block until another one does.
+            event.clear()
+        return woken
+
+    def forget(self, sha: str):
+        with self._lock:
+            self._events.pop(sha, None)
+            self._waited.discard(sha)
+
+
+def _object(payload: dict, key: str) -> dict:
+    value = payload.get(key)
+    if not isinstance(value, dict):
+        raise ValueError(f"{key!r} is missing or not an object")
+    return value
+
+
+def signature(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class WebhookReceiver:
+    """
+    Minimal GitHub webhook endpoint (POST any path).
+
+    - issues/labeled with `trigger_label`  -> on_issue(issue)
+    - check_run/check_suite completed      -> waiter.notify(head_sha)
+
+    If `secret` is set, requests must carry a matching X-Hub-Signature-256.
+    A malformed Content-Length gets 400 and a body over
+    MAX_BODY_BYTES gets 413, before anything is read. A payload that isn't a
+    JSON object, or an issues/check event missing the fields it is
+    dispatched on, also gets 400.
+    """
+
+    def __init__(self, waiter: CIWaiter, on_issue: Callable[[dict], None], trigger_label: str,
+                 secret: Optional[str] = None, on_event: Optional[Callable[[dict], None]] = None):
+        self.waiter = waiter
+        self.on_issue = on_issue
+        self.trigger_label = trigger_label
+        self.secret = secret
+        self.on_event = on_event
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def handle(self, event: str, payload: dict) -> str:
+        """Dispatch one event; returns what was done (for logs and tests). Raises ValueError for a malformed payload."""
+        if not isinstance(payload, dict):
+            raise ValueError("payload is not a JSON object")
+        action = payload.get("action")
+        if event == "issues" and action == "labeled":
+            if _object(payload, "label").get("name") == self.trigger_label:
+                issue = _object(payload, "issue")
+                if not isinstance(issue.get("number"), int):
+                    raise ValueError("issue has no number")
+                self.on_issue(issue)
+                return "issue_dispatched"
+        elif event in CI_EVENTS and action == "completed":
+            sha = _object(payload, event).get("head_sha")
+            if not isinstance(sha, str):
+                raise ValueError(f"{event} has no head_sha")
+            if sha:
+                self.waiter.notify(sha)
+                return "ci_notified"
+        elif event == "ping":
+            return "pong"
+        return "ignored"
+
+    def start(self, host: str = "127.0.0.1", port: int = 9000) -> int:
+        """Serve on a background thread; returns the bound port."""
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self._reply(400, {"error": "invalid Content-Length"})
+                    return
+                if length > MAX_BODY_BYTES:
+                    self._reply(413, {"error": "payload too large"})
+                    return
+                body = self.rfile.read(length)
+                if receiver.secret:
+                    expected = signature(receiver.secret, body)
+                    if not hmac.compare_digest(expected, self.headers.get("X-Hub-Signature-256", "")):
+                        self._reply(401, {"error": "bad signature"})
+                        return
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    self._reply(400, {"error": "invalid JSON"})
+                    return
+                event = self.headers.get("X-GitHub-Event", "")
+                try:
+                    result = receiver.handle(event, payload)
+                except ValueError as e:
+                    self._reply(400, {"error": f"malformed {event} payload: {e}"})
+                    return
+                if receiver.on_event:
+                    receiver.on_event({"event": "webhook_received", "github_event": event,
+                                       "action": payload.get("action"), "result": result})
+                self._reply(202, {"result": result})
+
+            def _reply(self, status: int, data: dict):
+                out = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass    # events are logged through on_event
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, name="webhook", daemon=True).start()
+        return self.server.server_address[1]
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def post_event(url: str, event: str, payload: dict, secret: Optional[str] = None) -> dict:
+    """Send a (recorded) webhook payload the way GitHub would; used to test the receiver locally."""
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json", "X-GitHub-Event": event}
+    if secret:
+        headers["X-Hub-Signature-256"] = signature(secret, body)
+    req = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    with urllib.request.urlopen(req, timeout=10) as r:
+        return json.loads(r.read() or b"{}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(prog="python -m orchestrator.webhook",
+                                     description="Replay a recorded webhook payload against a running receiver.")
+    parser.add_argument("payload", help="JSON file with the webhook body")
+    parser.add_argument("--event", required=True, help="X-GitHub-Event value, e.g. issues or check_run")
+    parser.add_argument("--url", default="http://127.0.0.1:9000/webhook")
+    args = parser.parse_args()
+    with open(args.payload, "r", encoding="utf-8") as f:
+        print(post_event(args.url, args.event, json.load(f), os.environ.get("WEBHOOK_SECRET")))
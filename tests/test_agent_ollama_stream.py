@@ -0,0 +1,181 @@
+import base64
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+os.environ.setdefault("GITHUB_TOKEN", "test")
+
+from orchestrator import agent_ollama, orchestrator  # noqa: E402
+from orchestrator.stream_guard import EditStreamGuard, GuardrailAbort  # noqa: E402
+
+ALLOWED = {"app/rules.py", "site/index.html"}
+B64 = base64.b64encode(b"def load_policy(): ...\ndef evaluate(): ...\n").decode()
+
+
+def _tokens(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StubOllama:
+    """Replays a token stream as Ollama's NDJSON, one line every `delay` seconds."""
+
+    def __init__(self, tokens, delay=0.0, first_delay=0.0, stall_after=None):
+        self.tokens = tokens
+        self.delay = delay
+        self.first_delay = first_delay      # prompt evaluation before the first token
+        self.stall_after = stall_after      # (token count, seconds) to go quiet mid-stream
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"       # chunked, like Ollama
+
+            def _send(self, data):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_POST(self):
+                stub.requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    time.sleep(stub.first_delay)
+                    for n, token in enumerate(stub.tokens):
+                        if stub.stall_after and n == stub.stall_after[0]:
+                            time.sleep(stub.stall_after[1])
+                        self._send(json.dumps({"response": token, "done": False}).encode() + b"\n")
+                        time.sleep(stub.delay)
+                    self._send(json.dumps({"response": "", "done": True}).encode() + b"\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/generate"
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    servers = []
+
+    def start(text, delay=0.0, **kw):
+        server = StubOllama(_tokens(text), delay, **kw)
+        servers.append(server)
+        monkeypatch.setattr(agent_ollama, "OLLAMA_URL", server.url)
+        return server
+
+    monkeypatch.setattr(agent_ollama, "STREAM", True)
+    monkeypatch.setattr(agent_ollama, "_save_output", lambda raw: None)
+    yield start
+    for server in servers:
+        server.server.shutdown()
+        server.server.server_close()
+
+
+def _edits():
+    return agent_ollama.generate_file_edits("t", "b", {"app/rules.py": "x"}, allowed_paths=ALLOWED)
+
+
+def test_streamed_output_is_parsed(stub):
+    server = stub('Sure. {"summary": "s", "files": [{"path": "app/rules.py", "content_b64": "%s"}]}' % B64)
+    assert _edits() == {"summary": "s", "files": [{"path": "app/rules.py", "content_b64": B64}]}
+    assert server.requests[0]["stream"] is True
+
+
+@pytest.mark.parametrize("output,reason", [
+    ('{"files": [{"path": "tests/test_rules.py", "content_b64": "%s"}]}', "path_not_allowed"),
+    ('{"files": [{"path": "../etc/passwd", "content_b64": "%s"}]}', "invalid_path"),
+    ('{"files": [{"content_b64": "def load_policy():\\n    pass", "path": "app/rules.py"}]}', "content_not_base64"),
+    ('{"files": [%s]}' % ", ".join(['{"path": "app/rules.py", "content_b64": "QQ=="}'] * 4), "too_many_files"),
+])
+def test_doomed_output_aborts_generation_early(stub, output, reason):
+    # Followed by a long tail of completion that should never be waited for.
+    text = output.replace("%s", B64) + " " * 2000
+    stub(text, delay=0.005)
+    start = time.monotonic()
+    with pytest.raises(GuardrailAbort) as abort:
+        _edits()
+    assert abort.value.reason == reason
+    assert abort.value.chars < len(text) // 2
+    assert time.monotonic() - start < len(_tokens(text)) * 0.005 / 2
+
+
+def test_first_chunk_may_be_slow_but_chunks_may_not_stall(stub, monkeypatch):
+    monkeypatch.setattr(agent_ollama, "FIRST_CHUNK_TIMEOUT", 2)
+    monkeypatch.setattr(agent_ollama, "CHUNK_TIMEOUT", 0.3)
+    text = '{"summary": "s", "files": [{"path": "app/rules.py", "content_b64": "%s"}]}' % B64
+    stub(text, first_delay=0.5)
+    assert _edits()["files"][0]["content_b64"] == B64
+
+    # Slower overall than CHUNK_TIMEOUT, but every chunk arrives in time.
+    stub(text, delay=0.05)
+    assert _edits()["files"][0]["content_b64"] == B64
+
+    # A stall longer than the socket's read timeout is still cut off after CHUNK_TIMEOUT.
+    stub(text, stall_after=(3, 5))
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        _edits()
+    assert time.monotonic() - start < 1.5
+
+
+@pytest.mark.parametrize("content", [
+    B64, "QUJD.RA==", "QUJD\\nRA", base64.urlsafe_b64encode(b"x = '>>>???'\n").decode(),
+    "QUJDR", "def load_policy():\\n    pass", "QQ\\u003d\\u003d",
+])
+def test_guard_aborts_exactly_when_the_decoder_fails(content):
+    try:
+        orchestrator.safe_b64decode_to_text(json.loads('"%s"' % content))
+        decodes = True
+    except ValueError:
+        decodes = False
+    guard = EditStreamGuard(ALLOWED)
+    text = '{"files": [{"path": "app/rules.py", "content_b64": "%s"}]}' % content
+    if decodes:
+        guard.feed(text)
+    else:
+        with pytest.raises(GuardrailAbort, match="content_not_base64"):
+            guard.feed(text)
+
+
+def test_guard_handles_escapes_and_split_tokens():
+    guard = EditStreamGuard(ALLOWED)
+    text = '{"summary": "a \\"quoted\\" [x]", "files": [{"path": "app\\/rules.py", "content_b64": "QU\\nJD\\u003d"}]}'
+    for ch in text:
+        guard.feed(ch)
+    assert guard.files == 1
+    with pytest.raises(GuardrailAbort, match="path_not_allowed"):
+        EditStreamGuard(ALLOWED).feed('{"files": [{"path": "app\\/other.py"')
+
+
+def test_process_issue_blocks_on_early_abort(monkeypatch, tmp_path):
+    monkeypatch.setattr(orchestrator, "LOG_PATH", str(tmp_path / "events.jsonl"))
+    calls = []
+    monkeypatch.setattr(orchestrator, "add_labels", lambda n, labels: calls.append(labels))
+    monkeypatch.setattr(orchestrator, "comment", lambda n, body: None)
+    monkeypatch.setattr(orchestrator, "get_branch_head_sha", lambda branch: "base")
+    monkeypatch.setattr(orchestrator, "create_branch", lambda branch, sha: None)
+    monkeypatch.setattr(orchestrator, "get_file_content", lambda path, ref="main": "x")
+
+    def doomed(**kw):
+        assert kw["allowed_paths"] == ALLOWED
+        raise GuardrailAbort("path_not_allowed", "tests/test_rules.py", chars=40)
+
+    monkeypatch.setattr(orchestrator, "generate_file_edits", doomed)
+    issue = {"number": 5, "title": "t", "body": "b", "html_url": "u"}
+    assert orchestrator.process_issue(issue) == "blocked"
+    assert ["ai:blocked"] in calls
+    events = [json.loads(line) for line in open(tmp_path / "events.jsonl", encoding="utf-8")]
+    assert {"reason": "path_not_allowed", "early_abort": True}.items() <= events[-1].items()
@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+
+from app.rules import DECISIONS, compile_policy, evaluate, evaluate_batch, load_policy
+
+
+def _random_rows(n, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        row = {
+            "credit_score": rng.choice([None, rng.randint(500, 800)]),
+            "dti": rng.choice([None, round(rng.uniform(0.1, 0.6), 2)]),
+            "income": rng.choice([None, rng.randint(10000, 90000)]),
+            "defaults_past_24m": rng.random() < 0.2,
+        }
+        rows.append(row)
+    return rows
+
+
+def _columns(rows):
+    def numeric(field):
+        return np.array([np.nan if r[field] is None else r[field] for r in rows], dtype=np.float64)
+
+    return {
+        "credit_score": numeric("credit_score"),
+        "dti": numeric("dti"),
+        "income": numeric("income"),
+        "defaults_past_24m": np.array([r["defaults_past_24m"] for r in rows]),
+    }
+
+
+def test_evaluate_batch_matches_scalar_evaluate():
+    policy = compile_policy(load_policy())
+    rows = _random_rows(2000)
+
+    codes, rule_index = evaluate_batch(_columns(rows), policy)
+
+    for row, code, idx in zip(rows, codes, rule_index):
+        assert idx == policy.first_match(row)
+        assert DECISIONS[code] == evaluate(row, policy).decision
+
+
+def test_evaluate_batch_handles_missing_columns_and_eq_conditions():
+    policy = {
+        "default_decision": "approve",
+        "rules": [
+            {"id": "A", "priority": 1, "decision": "refer", "reason": "", "conditions": {"region_eq": "EU"}},
+            {"id": "B", "priority": 2, "decision": "reject", "reason": "", "conditions": {"score_lt": 600}},
+        ],
+    }
+    columns = {"region": np.array(["EU", "US", "US"]), "other": [1, 2, 3]}
+
+    codes, rule_index = evaluate_batch(columns, policy)
+
+    assert rule_index.tolist() == [0, -1, -1]
+    assert [DECISIONS[c] for c in codes] == ["refer", "approve", "approve"]
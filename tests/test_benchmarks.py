@@ -0,0 +1,23 @@
+import json
+
+from app.rules import compile_policy, evaluate
+from benchmarks.generators import generate_applicants, generate_policy
+from benchmarks.run import main
+
+
+def test_generated_policy_is_valid_and_deterministic():
+    policy = generate_policy(50, seed=1)
+    assert policy == generate_policy(50, seed=1)
+    compiled = compile_policy(policy)
+    for applicant in generate_applicants(20, seed=1):
+        assert evaluate(applicant, compiled).decision in ("approve", "refer", "reject")
+
+
+def test_benchmark_run_writes_json(tmp_path):
+    out = tmp_path / "bench.json"
+    assert main(["--rules", "5", "--applicants", "50", "--repeat", "1", "-o", str(out)]) == 0
+
+    report = json.loads(out.read_text(encoding="utf-8"))
+    names = {r["name"] for r in report["results"]}
+    assert {"load_policy", "evaluate_compiled", "evaluate_batch"} <= names
+    assert all(r["p99_us"] >= r["p50_us"] for r in report["results"])
@@ -0,0 +1,65 @@
+import csv
+import json
+
+import numpy as np
+
+from app.columnar import Categorical, convert, load_columns, main, score_dataset
+from app.rules import compile_policy, load_policy
+from benchmarks.generators import generate_applicants, generate_policy
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+
+def test_columnar_scoring_matches_scalar(tmp_path):
+    rows = list(generate_applicants(3000, seed=9, missing_rate=0.1))
+    for r in rows[::7]:
+        r["region"] = None
+    rows[5]["product"] = 3                 # mixed categorical column
+    _write_jsonl(tmp_path / "in.jsonl", rows)
+
+    manifest = convert(tmp_path / "in.jsonl", tmp_path / "cols", chunk_size=512)
+
+    assert manifest["rows"] == len(rows)
+    assert manifest["fields"]["credit_score"]["kind"] == "numeric"
+    assert manifest["fields"]["region"]["kind"] == "categorical"
+    columns = load_columns(tmp_path / "cols")
+    assert isinstance(columns["credit_score"], np.memmap)
+    assert isinstance(columns["bankrupt"], Categorical)
+    for seed in range(3):
+        source = generate_policy(80, seed=seed)
+        source["rules"].append({"id": "NUM", "decision": "refer", "reason": "", "conditions": {"product_eq": 3.0}})
+        policy = compile_policy(source)
+        batch = score_dataset(tmp_path / "cols", policy)
+        assert batch.rule_index.tolist() == [policy.first_match(r) for r in rows]
+
+
+def test_csv_input(tmp_path):
+    rows = [{"credit_score": "600", "dti": "", "defaults_past_24m": "false"},
+            {"credit_score": "700", "dti": "0.5", "defaults_past_24m": "false"},
+            {"credit_score": "", "dti": "0.1", "defaults_past_24m": "true"},
+            {"credit_score": "700", "dti": "0.1", "income": "", "defaults_past_24m": "false"}]
+    with open(tmp_path / "in.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["credit_score", "dti", "income", "defaults_past_24m"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    convert(tmp_path / "in.csv", tmp_path / "cols")
+
+    batch = score_dataset(tmp_path / "cols", compile_policy(load_policy()))
+    assert [d.reason_ids for d in batch.decisions(compile_policy(load_policy()))] == [["R1"], ["R2"], ["R4"], []]
+
+
+def test_cli_convert_and_score(tmp_path):
+    rows = list(generate_applicants(200, seed=1))
+    _write_jsonl(tmp_path / "in.jsonl", rows)
+
+    assert main(["convert", str(tmp_path / "in.jsonl"), str(tmp_path / "cols")]) == 0
+    assert main(["score", str(tmp_path / "cols"), "-o", str(tmp_path / "out.jsonl")]) == 0
+
+    manifest = json.loads((tmp_path / "cols" / "manifest.json").read_text(encoding="utf-8"))
+    policy = compile_policy(load_policy())
+    assert set(manifest["fields"]) == set(policy.fields)
+    decisions = [json.loads(line)["decision"] for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    assert decisions == [policy.evaluate(r).decision for r in rows]
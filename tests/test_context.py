@@ -0,0 +1,93 @@
+import json
+
+from orchestrator.context import SECTIONS, blob_sha, estimate_tokens, pack_context, split_sections, terms
+
+MODULE = '''"""Helpers."""
+import math
+
+RATE = 0.05
+
+
+def compound_interest(principal, years):
+    """Interest on a loan after `years`."""
+    return principal * (1 + RATE) ** years
+
+
+# Kept for the old dashboard.
+def format_currency(amount):
+    return f"${amount:,.2f}"
+
+
+class Applicant:
+    def risk_band(self):
+        return "low"
+''' + "".join(
+    f"\n\ndef unrelated_helper_{i}(x):\n" + "".join(f"    x = x * {k} + {i}\n" for k in range(8)) + f"    return x + {i}\n"
+    for i in range(40))
+
+
+def test_python_sections_cover_the_file_and_have_signatures():
+    sections = split_sections("app/helpers.py", MODULE)
+    assert "".join(s.text for s in sections) == MODULE
+    by_name = {s.name: s for s in sections}
+    assert by_name["compound_interest"].signature == "def compound_interest(principal, years)  # Interest on a loan after `years`."
+    assert by_name["format_currency"].text.startswith("\n\n# Kept for the old dashboard.")
+    assert by_name["Applicant"].signature == "class Applicant  (methods: risk_band)"
+
+
+def test_json_sections_follow_items():
+    cases = json.dumps([{"name": "A_low_credit", "input": {}}, {"name": "B_high_dti", "input": {}}])
+    assert [s.name for s in split_sections("docs/golden_cases.json", cases)] == ["A_low_credit", "B_high_dti"]
+
+
+def test_terms_split_identifiers():
+    assert terms("computeRiskBand(credit_score)") == ["compute", "risk", "band", "credit", "score"]
+
+
+def test_editable_files_are_always_whole():
+    files = {"app/rules.py": "x = 1\n" * 4000, "app/helpers.py": MODULE}
+    packed = pack_context("anything", files, {"app/rules.py"}, budget=100)
+    assert packed.files["app/rules.py"] == files["app/rules.py"]
+    assert packed.omitted == ["app/helpers.py"]
+
+
+def test_read_only_files_are_sliced_to_the_budget():
+    files = {"site/index.html": "<html></html>\n", "app/helpers.py": MODULE}
+    budget = estimate_tokens(files["site/index.html"]) + estimate_tokens(MODULE) // 2
+    packed = pack_context("Show compound interest on the loan page", files, {"site/index.html"}, budget)
+
+    excerpt = packed.files["app/helpers.py"]
+    assert packed.sliced == ["app/helpers.py"] and packed.tokens <= budget
+    assert "return principal * (1 + RATE) ** years" in excerpt            # relevant: shown
+    assert "...   def unrelated_helper_7(x)" in excerpt                   # the rest: signatures
+    assert "return x + 7" not in excerpt
+    assert packed.unpacked_tokens > packed.tokens
+
+
+def test_small_files_fit_whole_and_keep_their_order():
+    files = {"docs/policy.json": '{"rules": []}', "site/index.html": "<p>hi</p>"}
+    packed = pack_context("policy", files, {"site/index.html"}, budget=1000)
+    assert list(packed.files) == list(files) and packed.files == files
+    assert packed.sliced == [] and packed.omitted == []
+
+
+def test_sections_are_cached_by_blob_sha():
+    SECTIONS.clear()
+    before = dict(SECTIONS.stats)
+    split_sections("app/a.py", MODULE)
+    split_sections("app/b.py", MODULE)           # same blob, another path
+    split_sections("app/a.py", MODULE + "\n")
+    assert SECTIONS.stats["misses"] - before["misses"] == 2
+    assert SECTIONS.stats["hits"] - before["hits"] == 1
+    assert blob_sha("hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+def test_context_benchmark_writes_json(tmp_path):
+    from benchmarks.context import main
+
+    out = tmp_path / "context.json"
+    assert main(["--budget", "9000", "-o", str(out)]) == 0
+    results = json.loads(out.read_text(encoding="utf-8"))
+    assert {r["scenario"] for r in results} == {"current", "grown"}
+    grown = [r for r in results if r["scenario"] == "grown"]
+    assert all(r["prompt_tokens_packed"] < r["prompt_tokens_unpacked"] for r in grown)
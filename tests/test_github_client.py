@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+os.environ.setdefault("GITHUB_TOKEN", "test")
+
+from orchestrator import orchestrator  # noqa: E402
+from orchestrator.github_client import CachingSession  # noqa: E402
+
+SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+
+class FakeGitHub:
+    """Serves /repos/{owner}/{repo}/contents/{path}?ref= with ETags and 304s, counting requests."""
+
+    def __init__(self, files):
+        self.files = files           # {(path, ref): text}
+        self.requests = []           # (path, status)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                prefix = f"/repos/{orchestrator.OWNER}/{orchestrator.REPO}/contents/"
+                ref = parse_qs(url.query).get("ref", [""])[0]
+                text = fake.files.get((url.path[len(prefix):], ref))
+                if not url.path.startswith(prefix) or text is None:
+                    return self._reply(404, b'{"message": "Not Found"}')
+                body = json.dumps({"encoding": "base64",
+                                   "content": base64.b64encode(text.encode()).decode()}).encode()
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    return self._reply(304, b"", etag)
+                self._reply(200, body, etag)
+
+            def _reply(self, status, body, etag=None):
+                fake.requests.append((urlparse(self.path).path, status))
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("X-RateLimit-Remaining", str(5000 - len(fake.requests)))
+                if status != 304:
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def statuses(self):
+        return [status for _, status in self.requests]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    server = FakeGitHub({("app/rules.py", "main"): "print('v1')\n", ("app/rules.py", SHA): "print('at sha')\n"})
+    monkeypatch.setattr(orchestrator, "API_URL", server.url)
+    monkeypatch.setattr(orchestrator, "session", CachingSession())
+    monkeypatch.setattr(orchestrator, "_content_memo", {})
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def test_branch_reads_are_revalidated_with_etags(fake):
+    assert orchestrator.get_file_content("app/rules.py", ref="main") == "print('v1')\n"
+    assert orchestrator.get_file_content("app/rules.py", ref="main") == "print('v1')\n"
+    assert fake.statuses() == [200, 304]
+    assert orchestrator.session.stats["revalidated"] == 1
+
+    # A changed file gets a new ETag, so the next read sees it.
+    fake.files[("app/rules.py", "main")] = "print('v2')\n"
+    assert orchestrator.get_file_content("app/rules.py", ref="main") == "print('v2')\n"
+    assert fake.statuses() == [200, 304, 200]
+
+
+def test_replayed_response_keeps_body_and_takes_fresh_headers(fake):
+    s = CachingSession()
+    url = f"{fake.url}/repos/{orchestrator.OWNER}/{orchestrator.REPO}/contents/app/rules.py"
+    first = s.get(url, params={"ref": "main"})
+    second = s.get(url, params={"ref": "main"})
+    assert second.status_code == 200 and second.from_cache
+    assert second.json() == first.json()
+    assert second.headers["Content-Length"] == first.headers["Content-Length"]
+    assert int(second.headers["X-RateLimit-Remaining"]) < int(first.headers["X-RateLimit-Remaining"])
+    # Different params are a different cache entry.
+    s.get(url, params={"ref": SHA})
+    assert fake.statuses() == [200, 304, 200]
+
+
+def test_reads_at_a_commit_sha_are_fetched_once(fake):
+    for _ in range(3):
+        assert orchestrator.get_file_content("app/rules.py", ref=SHA) == "print('at sha')\n"
+    assert fake.statuses() == [200]
+    assert orchestrator.is_commit_sha(SHA) and not orchestrator.is_commit_sha("main")
+
+
+def test_cache_evicts_least_recently_used(fake):
+    s = CachingSession(max_entries=1)
+    url = f"{fake.url}/repos/{orchestrator.OWNER}/{orchestrator.REPO}/contents/app/rules.py"
+    s.get(url, params={"ref": "main"})
+    s.get(url, params={"ref": SHA})
+    s.get(url, params={"ref": "main"})
+    assert fake.statuses() == [200, 200, 200]
@@ -0,0 +1,59 @@
+import io
+import json
+
+from app.impact import ImpactAnalysis, diff_stream, format_matrix, main
+from app.rules import compile_policy, load_policy
+from benchmarks.generators import generate_applicants, generate_policy
+
+
+def _write_policy(path, source):
+    path.write_text(json.dumps(source), encoding="utf-8")
+    return compile_policy(load_policy(path))
+
+
+def test_diff_stream_matches_two_full_passes(tmp_path):
+    source = generate_policy(60, seed=4)
+    changed = json.loads(json.dumps(source))
+    changed["rules"][3]["conditions"] = {"credit_score_lt": 640}
+    changed["rules"][10]["decision"] = "refer" if changed["rules"][10]["decision"] == "reject" else "reject"
+    del changed["rules"][20]
+    old = _write_policy(tmp_path / "old.json", source)
+    new = _write_policy(tmp_path / "new.json", changed)
+    applicants = list(generate_applicants(1000, seed=4))
+    out = io.StringIO()
+
+    summary = diff_stream((json.dumps(a) for a in applicants), out, ImpactAnalysis(old, new), chunk_size=64)
+
+    expected = {}
+    transitions = {}
+    for a in applicants:
+        before, after = old.evaluate(a), new.evaluate(a)
+        row = transitions.setdefault(before.decision, {})
+        row[after.decision] = row.get(after.decision, 0) + 1
+        if (before.decision, before.reason_ids) != (after.decision, after.reason_ids):
+            expected[a["id"]] = (before.reason_ids, after.reason_ids)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert {r["id"]: (r["old"]["reason_ids"], r["new"]["reason_ids"]) for r in records} == expected
+    assert summary["applicants"] == len(applicants)
+    assert summary["changed"] == len(expected) > 0
+    assert summary["transitions"] == transitions
+
+
+def test_main_writes_summary(tmp_path, capsys):
+    source = generate_policy(10, seed=2)
+    changed = dict(source, default_decision="refer")
+    (tmp_path / "old.json").write_text(json.dumps(source), encoding="utf-8")
+    (tmp_path / "new.json").write_text(json.dumps(changed), encoding="utf-8")
+    (tmp_path / "in.jsonl").write_text("".join(json.dumps(a) + "\n" for a in generate_applicants(200, seed=2)),
+                                       encoding="utf-8")
+
+    assert main([str(tmp_path / "in.jsonl"), "--old-policy", str(tmp_path / "old.json"),
+                 "--new-policy", str(tmp_path / "new.json"), "-o", str(tmp_path / "diff.jsonl"),
+                 "--summary", str(tmp_path / "summary.json")]) == 0
+
+    summary = json.loads((tmp_path / "summary.json").read_text(encoding="utf-8"))
+    approvals = summary["transitions"]["approve"]["refer"]
+    assert set(summary["transitions"]["approve"]) == {"refer"}
+    assert summary["changed"] == approvals
+    assert len((tmp_path / "diff.jsonl").read_text(encoding="utf-8").splitlines()) == approvals
+    assert format_matrix(summary["transitions"]) in capsys.readouterr().err
@@ -0,0 +1,102 @@
+import copy
+import io
+import json
+import random
+
+from app.incremental import IncrementalRescorer, main
+from app.rules import compile_policy, load_policy
+from app.score import score_stream
+from benchmarks.generators import generate_applicants, generate_policy
+
+
+def _modified(source, seed):
+    rng = random.Random(seed)
+    policy = copy.deepcopy(source)
+    rules = policy["rules"]
+    for _ in range(rng.randint(1, 5)):
+        kind = rng.random()
+        rule = rng.choice(rules)
+        if kind < 0.25:
+            rules.remove(rule)
+        elif kind < 0.5:
+            new = generate_policy(1, seed=rng.randint(0, 10**6))["rules"][0]
+            new["id"] = f"N{rng.randint(0, 10**6)}"
+            new["priority"] = rng.randint(0, 10 * len(rules))
+            rules.append(new)
+        elif kind < 0.75:
+            key = rng.choice(list(rule["conditions"]))
+            if isinstance(rule["conditions"][key], float):
+                rule["conditions"][key] = round(rule["conditions"][key] * rng.uniform(0.8, 1.2), 3)
+            else:
+                rule["decision"] = "refer" if rule["decision"] == "reject" else "reject"
+        else:
+            rule["priority"] = rng.randint(0, 10 * len(rules))
+    if rng.random() < 0.2:
+        policy["default_decision"] = "refer"
+    return policy
+
+
+def _compiled(source):
+    # Same ordering load_policy() applies.
+    return compile_policy(dict(source, rules=sorted(source["rules"], key=lambda r: r.get("priority", 999999))))
+
+
+def test_rescore_matches_full_evaluation_after_random_edits():
+    applicants = list(generate_applicants(500, seed=3))
+    for seed in range(25):
+        source = generate_policy(40, seed=seed)
+        old = _compiled(source)
+        new = _compiled(_modified(source, seed))
+        rescorer = IncrementalRescorer(old, new)
+
+        for applicant in applicants:
+            assert rescorer.rescore(applicant, old.first_match(applicant)) == new.first_match(applicant)
+
+
+def test_unchanged_policy_checks_no_rules():
+    source = generate_policy(30, seed=1)
+    old, new = _compiled(source), _compiled(copy.deepcopy(source))
+    rescorer = IncrementalRescorer(old, new)
+    applicants = list(generate_applicants(200, seed=1))
+
+    results = list(rescorer.rescore_all(applicants, (old.first_match(a) for a in applicants)))
+
+    assert results == [new.first_match(a) for a in applicants]
+    assert rescorer.changed == []
+    assert rescorer.rules_checked == rescorer.full_evaluations == 0
+    assert rescorer.skipped == len(applicants)
+
+
+def test_moving_one_rule_to_the_front_only_marks_that_rule():
+    source = generate_policy(30, seed=2)
+    edited = copy.deepcopy(source)
+    ordered = sorted(edited["rules"], key=lambda r: r.get("priority", 999999))
+    ordered[-1]["priority"] = ordered[0].get("priority", 0) - 1
+    old, new = _compiled(source), _compiled(edited)
+    rescorer = IncrementalRescorer(old, new)
+    assert rescorer.changed == [0]
+
+    applicants = list(generate_applicants(200, seed=2))
+    for applicant in applicants:
+        assert rescorer.rescore(applicant, old.first_match(applicant)) == new.first_match(applicant)
+    assert rescorer.rules_checked <= len(applicants)
+
+
+def test_main_rescores_previous_output(tmp_path):
+    source = generate_policy(20, seed=7)
+    changed = _modified(source, 7)
+    applicants = list(generate_applicants(300, seed=7))
+    paths = {name: tmp_path / name for name in ("old.json", "new.json", "in.jsonl", "prev.jsonl", "out.jsonl")}
+    paths["old.json"].write_text(json.dumps(source), encoding="utf-8")
+    paths["new.json"].write_text(json.dumps(changed), encoding="utf-8")
+    lines = [json.dumps(a) + "\n" for a in applicants]
+    paths["in.jsonl"].write_text("".join(lines), encoding="utf-8")
+    with open(paths["prev.jsonl"], "w", encoding="utf-8") as out:
+        score_stream(lines, out, compile_policy(load_policy(paths["old.json"])), with_rule_index=True)
+
+    assert main([str(paths["in.jsonl"]), str(paths["prev.jsonl"]), "--old-policy", str(paths["old.json"]),
+                 "--new-policy", str(paths["new.json"]), "-o", str(paths["out.jsonl"])]) == 0
+
+    expected = io.StringIO()
+    score_stream(lines, expected, compile_policy(load_policy(paths["new.json"])), with_rule_index=True)
+    assert paths["out.jsonl"].read_text(encoding="utf-8") == expected.getvalue()
@@ -0,0 +1,129 @@
+import json
+import threading
+from pathlib import Path
+
+from app import instrument
+from app.rules import compile_policy, evaluate, load_policy
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _golden_cases():
+    return json.loads((ROOT / "docs" / "golden_cases.json").read_text(encoding="utf-8"))
+
+
+def test_instrumented_evaluate_counts_hits_predicates_and_decisions():
+    policy = load_policy()
+    instrument.reset()
+    instrument.enable()
+    try:
+        for case in _golden_cases():
+            out = evaluate(case["input"], policy=policy)
+            assert out.reason_ids == case["expected"]["reason_ids"]
+            evaluate(case["input"], policy=compile_policy(policy))
+    finally:
+        instrument.disable()
+
+    snap = instrument.snapshot()
+    assert snap["calls"] == 10
+    assert snap["decisions"] == {"reject": 6, "refer": 2, "approve": 2}
+    assert snap["rule_hits"] == {"R1": 2, "R2": 2, "R4": 2, "R3": 2}
+    # Policy order is R4, R1, R2, R3 with one condition each: A=2, B=3, C=1, D=4, E=4.
+    assert snap["predicates_total"] == 2 * (2 + 3 + 1 + 4 + 4)
+    assert snap["latency_seconds"]["buckets"]["+Inf"] == 10
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrument.reset()
+    assert not instrument.is_enabled()
+    evaluate(_golden_cases()[0]["input"], policy=load_policy())
+    assert instrument.snapshot()["calls"] == 0
+
+
+def test_counters_merge_across_threads_and_export_prometheus():
+    policy = compile_policy(load_policy())
+    applicant = _golden_cases()[0]["input"]
+    instrument.reset()
+    instrument.enable()
+    try:
+        threads = [threading.Thread(target=lambda: [evaluate(applicant, policy) for _ in range(50)]) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        instrument.disable()
+
+    text = instrument.to_prometheus()
+    assert "rules_evaluate_calls_total 200" in text
+    assert 'rules_rule_hits_total{rule="R1"} 200' in text
+    assert 'rules_evaluate_latency_seconds_bucket{le="+Inf"} 200' in text
+
+
+def test_instrumented_evaluate_does_no_extra_lookups():
+    class CountingApplicant(dict):
+        lookups = 0
+
+        def get(self, key, default=None):
+            CountingApplicant.lookups += 1
+            return super().get(key, default)
+
+    applicants = [CountingApplicant(c["input"]) for c in _golden_cases()]
+    for policy in (compile_policy(load_policy()), load_policy()):
+        CountingApplicant.lookups = 0
+        for applicant in applicants:
+            evaluate(applicant, policy)
+        plain, CountingApplicant.lookups = CountingApplicant.lookups, 0
+
+        instrument.reset()
+        instrument.enable()
+        try:
+            for applicant in applicants:
+                evaluate(applicant, policy)
+        finally:
+            instrument.disable()
+        assert CountingApplicant.lookups == plain
+
+
+def test_predicate_count_follows_the_rule_index():
+    # Eight head rules fail on one predicate each; the index then skips R8
+    # and R9 (credit_score_lt 108/109) and confirms R10 with one predicate.
+    policy = compile_policy({"rules": [
+        {"id": f"R{i}", "priority": i, "decision": "reject", "conditions": {"credit_score_lt": 100 + i}}
+        for i in range(10)
+    ] + [{"id": "R10", "priority": 10, "decision": "refer", "conditions": {"credit_score_gt": 400}}]}, index=True)
+    assert policy.counted_first_match()({"credit_score": 500}) == (10, 9)
+
+    instrument.reset()
+    instrument.enable()
+    try:
+        assert evaluate({"credit_score": 500}, policy).reason_ids == ["R10"]
+    finally:
+        instrument.disable()
+    assert instrument.snapshot()["predicates_per_call"] == {9: 1}
+
+
+def test_snapshot_while_threads_keep_counting():
+    policy = compile_policy(load_policy())
+    cases = [c["input"] for c in _golden_cases()]
+    instrument.reset()
+    instrument.enable()
+    stop = threading.Event()
+
+    def work():
+        while not stop.is_set():
+            for applicant in cases:
+                evaluate(applicant, policy)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    try:
+        for t in threads:
+            t.start()
+        for _ in range(200):
+            instrument.snapshot()
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        instrument.disable()
+    assert instrument.snapshot()["calls"] > 0
@@ -0,0 +1,117 @@
+import base64
+import json
+
+import pytest
+
+from orchestrator import agent_ollama
+from orchestrator.llm_cache import LLMCache, LLMCacheMiss
+from orchestrator.stream_guard import GuardrailAbort
+
+ALLOWED = {"app/rules.py"}
+B64 = base64.b64encode(b"def load_policy(): ...\ndef evaluate(): ...\n").decode()
+GOOD = '{"summary": "s", "files": [{"path": "app/rules.py", "content_b64": "%s"}]}' % B64
+
+
+def test_key_covers_every_input():
+    base = ("ollama", "m", "sys", "prompt", 0.0)
+    keys = {LLMCache.key(*base)}
+    for i, other in enumerate(("openai", "m2", "sys2", "prompt2", 0.2)):
+        keys.add(LLMCache.key(*base[:i], other, *base[i + 1:]))
+    assert len(keys) == 6
+    assert LLMCache.key(*base) == LLMCache.key(*base)
+
+
+def test_record_then_replay(tmp_path):
+    recorder = LLMCache(tmp_path, "record")
+    key = LLMCache.key("ollama", "m", "sys", "prompt", 0.0)
+    assert recorder.get(key) is None
+    recorder.put(key, "output")
+    assert recorder.get(key)["response"] == "output"
+
+    replay = LLMCache(tmp_path, "replay")
+    assert replay.get(key)["response"] == "output"
+    with pytest.raises(LLMCacheMiss):
+        replay.miss(LLMCache.key("ollama", "m", "sys", "another prompt", 0.0))
+    assert not list(tmp_path.glob("*/.*.tmp"))
+
+
+def test_bypass_neither_reads_nor_writes(tmp_path):
+    key = LLMCache.key("ollama", "m", "sys", "prompt", 0.0)
+    LLMCache(tmp_path, "record").put(key, "output")
+    bypass = LLMCache(tmp_path, "bypass")
+    assert bypass.get(key) is None
+    bypass.miss(key)
+    bypass.put(LLMCache.key("ollama", "m", "sys", "new", 0.0), "x")
+    assert len(list(tmp_path.glob("*/*.json"))) == 1
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = LLMCache(tmp_path, "record")
+    key = LLMCache.key("ollama", "m", "sys", "prompt", 0.0)
+    cache.put(key, "output")
+    next(tmp_path.glob("*/*.json")).write_text('{"respo', encoding="utf-8")
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = LLMCache(tmp_path, "record", max_bytes=1000)
+    keys = [LLMCache.key("ollama", "m", "sys", f"p{i}", 0.0) for i in range(4)]
+    for key in keys[:3]:
+        cache.put(key, "x" * 250)
+    cache.get(keys[0])              # now more recent than keys[1]
+    cache.put(keys[3], "x" * 250)
+    assert [cache.get(k) is not None for k in keys] == [True, False, True, True]
+    assert cache.stats["evictions"] == 1
+    # A new process rebuilds the order from the files.
+    assert LLMCache(tmp_path, "replay").get(keys[2])["response"] == "x" * 250
+
+
+@pytest.fixture
+def model(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_stream(prompt, temperature=0.2, guard=None):
+        calls.append(prompt)
+        text = model.output
+        if guard is not None:
+            guard.feed(text)
+        return text
+
+    monkeypatch.setattr(agent_ollama, "stream_ollama", fake_stream)
+    monkeypatch.setattr(agent_ollama, "STREAM", True)
+    monkeypatch.setattr(agent_ollama, "_save_output", lambda raw: None)
+    monkeypatch.setattr(agent_ollama, "LLM_CACHE", LLMCache(tmp_path, "record"))
+    model.output = GOOD
+    model.calls = calls
+    return model
+
+
+def _edits():
+    return agent_ollama.generate_file_edits("t", "b", {"app/rules.py": "x"}, allowed_paths=ALLOWED)
+
+
+def test_agent_replays_recorded_output_without_the_model(model, monkeypatch):
+    first = _edits()
+    assert _edits() == first
+    assert len(model.calls) == 1
+
+    monkeypatch.setattr(agent_ollama.LLM_CACHE, "mode", "replay")
+    assert _edits() == first
+    with pytest.raises(LLMCacheMiss):
+        agent_ollama.generate_file_edits("other", "b", {"app/rules.py": "x"}, allowed_paths=ALLOWED)
+    assert len(model.calls) == 1
+
+
+def test_early_abort_is_recorded_and_replayed(model):
+    model.output = '{"files": [{"path": "tests/test_rules.py", "content_b64": "%s"}]}' % B64
+    for _ in range(2):
+        with pytest.raises(GuardrailAbort, match="path_not_allowed"):
+            _edits()
+    assert len(model.calls) == 1
+    entry = json.loads(next(agent_ollama.LLM_CACHE.directory.glob("*/*.json")).read_text(encoding="utf-8"))
+    assert entry["complete"] is False
+
+    # With the path allowed, the cut-off output can't be replayed; the model is asked again.
+    model.output = GOOD
+    agent_ollama.generate_file_edits("t", "b", {"app/rules.py": "x"}, allowed_paths=ALLOWED | {"tests/test_rules.py"})
+    assert len(model.calls) == 2
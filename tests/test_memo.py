@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+
+from app.memo import DecisionMemo
+from app.rules import compile_policy, evaluate, get_policy, load_policy
+from benchmarks.generators import generate_applicants, generate_policy
+
+
+def test_memo_matches_evaluate_and_counts_hits():
+    policy = compile_policy(load_policy())
+    memo = DecisionMemo(maxsize=100)
+    applicants = list(generate_applicants(50, seed=1))
+
+    for _ in range(3):
+        for a in applicants:
+            assert memo.evaluate(a, policy) == evaluate(a, policy)
+
+    stats = memo.stats()
+    assert stats["misses"] <= 50 and stats["hits"] >= 100
+    assert stats["size"] == stats["misses"]
+    assert stats["hit_rate"] == stats["hits"] / 150
+
+
+def test_key_ignores_fields_the_policy_does_not_use():
+    policy = compile_policy(load_policy())
+    memo = DecisionMemo()
+    memo.evaluate({"id": 1, "credit_score": 700, "dti": 0.3, "income": 50000}, policy)
+    memo.evaluate({"id": 2, "credit_score": 700, "dti": 0.3, "income": 50000, "channel": "web"}, policy)
+    assert memo.stats()["hits"] == 1
+
+
+def test_lru_eviction_and_unhashable_values():
+    policy = compile_policy(generate_policy(20, seed=2))
+    memo = DecisionMemo(maxsize=2)
+    a, b, c = ({"credit_score": s} for s in (400, 500, 600))
+    memo.evaluate(a, policy)
+    memo.evaluate(b, policy)
+    memo.evaluate(a, policy)          # a is now most recent
+    memo.evaluate(c, policy)          # evicts b
+    memo.evaluate(a, policy)
+    memo.evaluate(b, policy)
+
+    assert memo.stats()["evictions"] == 2 and memo.stats()["hits"] == 2
+    assert memo.evaluate({"region": ["EU"]}, policy) == evaluate({"region": ["EU"]}, policy)
+    assert memo.stats()["uncacheable"] == 1
+
+
+def test_policy_change_invalidates(tmp_path):
+    path = tmp_path / "policy.json"
+
+    def write(threshold, stamp):
+        path.write_text(json.dumps({"rules": [{"id": "R1", "decision": "reject", "reason": "low",
+                                               "conditions": {"credit_score_lt": threshold}}]}), encoding="utf-8")
+        os.utime(path, ns=(stamp, stamp))
+
+    write(620, 1)
+    memo = DecisionMemo(policy_path=path)
+    assert memo.evaluate({"credit_score": 650}).decision == "approve"
+    write(700, 2)
+    assert memo.evaluate({"credit_score": 650}).decision == "reject"
+    assert memo.stats()["invalidations"] == 1 and memo.stats()["size"] == 1
+    assert get_policy(path).rules[0].conditions[0].value == 700
+
+
+def test_memo_is_thread_safe():
+    policy = compile_policy(generate_policy(100, seed=3))
+    applicants = list(generate_applicants(200, seed=3))
+    expected = [policy.evaluate(a) for a in applicants]
+    memo = DecisionMemo(maxsize=64)
+    errors = []
+
+    def worker():
+        for _ in range(5):
+            for a, want in zip(applicants, expected):
+                if memo.evaluate(a, policy) != want:
+                    errors.append(a)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert memo.stats()["size"] <= 64
+
+
+def test_policy_swap_between_evaluations_never_mixes_entries():
+    # Same key, different policies with different rule counts: an entry stored
+    # for one must never be served for the other.
+    small = compile_policy({"rules": [{"id": "S1", "decision": "reject", "reason": "low",
+                                       "conditions": {"credit_score_lt": 700}}]})
+    large = compile_policy(generate_policy(50, seed=4))
+    memo = DecisionMemo()
+    applicant = {"credit_score": 650}
+    for _ in range(3):
+        for policy in (large, small):
+            assert memo.evaluate(applicant, policy) == policy.evaluate(applicant)
+
+    # A reader that passed the identity check keeps the entries it read with it.
+    cached_policy, entries = memo._state
+    memo.evaluate(applicant, large)
+    assert cached_policy is small and entries.get(tuple(map(applicant.get, small.fields))) == small.evaluate(applicant)
+    assert memo._state[0] is large and memo._state[1] is not entries
+    assert memo.stats()["invalidations"] == 6
@@ -0,0 +1,67 @@
+import json
+
+from app.optimize import analyze_policy, main, optimize_policy
+from app.rules import compile_policy, load_policy
+from benchmarks.generators import generate_applicants, generate_policy
+
+
+def _rule(rid, decision, conditions):
+    return {"id": rid, "decision": decision, "reason": rid, "conditions": conditions}
+
+
+def _kinds(policy):
+    return {f.rule_id: (f.kind, f.covered_by) for f in analyze_policy(policy)}
+
+
+def test_finds_shadowed_redundant_and_contradictory_rules():
+    policy = {"default_decision": "approve", "rules": [
+        _rule("R1", "reject", {"credit_score_lt": 620}),
+        _rule("R2", "refer", {"credit_score_lt": 600}),
+        _rule("R3", "reject", {"credit_score_lt": 500, "dti_gt": 0.5}),
+        _rule("R4", "refer", {"credit_score_lt": 700}),
+        _rule("R5", "refer", {"region_eq": "EU", "region": "US"}),
+        _rule("R6", "refer", {"age_eq": 17, "age_gt": 18}),
+        _rule("R7", "refer", {"dti_gt": 0.9, "dti_lt": 0.1}),
+        _rule("R8", "reject", {"credit_score_eq": 610, "income_lt": 100}),
+        _rule("R9", "refer", {"bankrupt": True}),
+        _rule("R10", "refer", {"bankrupt": True, "product_eq": "loan"}),
+    ]}
+
+    assert _kinds(policy) == {
+        "R2": ("shadowed", "R1"),
+        "R3": ("redundant", "R1"),
+        "R5": ("contradictory", None),
+        "R6": ("contradictory", None),
+        "R7": ("nan_only", None),
+        "R8": ("redundant", "R1"),
+        "R10": ("redundant", "R9"),
+    }
+    assert [r["id"] for r in optimize_policy(policy)["rules"]] == ["R1", "R4", "R7", "R9"]
+
+
+def test_catch_all_rule_shadows_everything_after_it():
+    policy = {"rules": [_rule("R1", "refer", {"dti_gt": 0.5}), _rule("ALL", "reject", {}),
+                        _rule("R3", "refer", {"age_lt": 30})]}
+    assert _kinds(policy) == {"R3": ("shadowed", "ALL")}
+
+
+def test_pruned_policy_keeps_first_match_decisions():
+    applicants = list(generate_applicants(2000, seed=5))
+    for seed in range(10):
+        source = generate_policy(200, seed=seed)
+        source["rules"].sort(key=lambda r: r["priority"])
+        full, pruned = compile_policy(source), compile_policy(source, prune=True)
+        assert len(pruned.rules) < len(full.rules)
+        for a in applicants:
+            assert pruned.evaluate(a) == full.evaluate(a)
+
+
+def test_main_reports_and_writes_pruned_policy(tmp_path, capsys):
+    src = tmp_path / "policy.json"
+    src.write_text(json.dumps({"rules": [_rule("R1", "reject", {"x_lt": 1}), _rule("R2", "reject", {"x_lt": 0})]}),
+                   encoding="utf-8")
+
+    assert main([str(src), "-o", str(tmp_path / "lean.json")]) == 0
+
+    assert "redundant      R2 (by R1)" in capsys.readouterr().out
+    assert [r["id"] for r in load_policy(tmp_path / "lean.json")["rules"]] == ["R1"]
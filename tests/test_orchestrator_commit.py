@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("GITHUB_TOKEN", "test")
+
+from orchestrator import orchestrator  # noqa: E402
+
+
+class FakeGitData:
+    """In-memory refs/commits/trees behind orchestrator.gh(), recording every call."""
+
+    def __init__(self, files):
+        self.trees = {}
+        self.commits = {}
+        self.calls = []
+        self.race = 0            # how many ref updates lose to a concurrent push
+        root = self._put_tree(dict(files))
+        self.refs = {"ai/issue-1": self._put_commit("initial", root, [])}
+
+    def _sha(self, obj):
+        return hashlib.sha1(json.dumps(obj, sort_keys=True).encode()).hexdigest()
+
+    def _put_tree(self, files):
+        sha = self._sha(files)
+        self.trees[sha] = files
+        return sha
+
+    def _put_commit(self, message, tree, parents):
+        sha = self._sha([message, tree, parents])
+        self.commits[sha] = {"sha": sha, "message": message, "tree": {"sha": tree}, "parents": parents}
+        return sha
+
+    def files_at(self, branch):
+        return self.trees[self.commits[self.refs[branch]]["tree"]["sha"]]
+
+    def gh(self, url, method="GET", **kwargs):
+        path = url.split(f"/repos/{orchestrator.OWNER}/{orchestrator.REPO}", 1)[1]
+        self.calls.append((method, path))
+        body = kwargs.get("json")
+        if method == "GET" and path.startswith("/git/ref/heads/"):
+            return {"object": {"sha": self.refs[path[len("/git/ref/heads/"):]]}}
+        if method == "GET" and path.startswith("/git/commits/"):
+            return self.commits[path[len("/git/commits/"):]]
+        if method == "POST" and path == "/git/trees":
+            files = dict(self.trees[body["base_tree"]])
+            files.update({e["path"]: e["content"] for e in body["tree"]})
+            return {"sha": self._put_tree(files)}
+        if method == "POST" and path == "/git/commits":
+            return self.commits[self._put_commit(body["message"], body["tree"], body["parents"])]
+        if method == "PATCH" and path.startswith("/git/refs/heads/"):
+            branch = path[len("/git/refs/heads/"):]
+            if self.race:
+                self.race -= 1
+                # Someone else pushes first, so ours is no longer a fast forward.
+                files = dict(self.files_at(branch), **{"README.md": "theirs"})
+                self.refs[branch] = self._put_commit("theirs", self._put_tree(files), [self.refs[branch]])
+            if not body["force"] and self.refs[branch] not in self.commits[body["sha"]]["parents"]:
+                raise RuntimeError(f"{method} {url} -> 422: Update is not a fast forward")
+            self.refs[branch] = body["sha"]
+            return {"object": {"sha": body["sha"]}}
+        raise AssertionError(f"unexpected call {method} {path}")
+
+
+@pytest.fixture
+def git(monkeypatch, tmp_path):
+    fake = FakeGitData({"app/rules.py": "old rules", "site/index.html": "old site"})
+    monkeypatch.setattr(orchestrator, "gh", fake.gh)
+    monkeypatch.setattr(orchestrator, "LOG_PATH", str(tmp_path / "events.jsonl"))
+    return fake
+
+
+def test_several_files_become_one_commit(git):
+    before = git.refs["ai/issue-1"]
+    sha = orchestrator.commit_files("ai/issue-1", {"app/rules.py": "new rules", "site/index.html": "new site"}, "AI: x")
+
+    assert git.refs["ai/issue-1"] == sha
+    assert git.commits[sha]["parents"] == [before]
+    assert git.files_at("ai/issue-1") == {"app/rules.py": "new rules", "site/index.html": "new site"}
+    assert [m for m, _ in git.calls] == ["GET", "GET", "POST", "POST", "PATCH"]
+
+
+def test_commit_is_rebuilt_when_the_branch_moved(git):
+    git.race = 1
+    sha = orchestrator.commit_files("ai/issue-1", {"app/rules.py": "new rules"}, "AI: x")
+
+    # The concurrent push is kept, not overwritten.
+    assert git.files_at("ai/issue-1") == {"app/rules.py": "new rules", "site/index.html": "old site",
+                                          "README.md": "theirs"}
+    assert git.commits[git.commits[sha]["parents"][0]]["message"] == "theirs"
+    assert sum(1 for m, _ in git.calls if m == "PATCH") == 2
+
+
+def test_gives_up_after_repeated_conflicts(git):
+    git.race = 5
+    with pytest.raises(RuntimeError, match="422"):
+        orchestrator.commit_files("ai/issue-1", {"app/rules.py": "new rules"}, "AI: x", retries=2)
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+import pytest
+
+os.environ.setdefault("GITHUB_TOKEN", "test")
+
+from orchestrator import orchestrator  # noqa: E402
+from orchestrator.concurrency import FairSemaphore, IssueTracker  # noqa: E402
+
+
+def test_fair_semaphore_serves_waiters_in_order():
+    sem = FairSemaphore(1)
+    sem.acquire()
+    order = []
+
+    def worker(n):
+        with sem:
+            order.append(n)
+
+    threads = []
+    for n in range(5):
+        t = threading.Thread(target=worker, args=(n,))
+        t.start()
+        threads.append(t)
+        while sem.waiting() < n + 1:
+            time.sleep(0.001)
+    sem.release()
+    for t in threads:
+        t.join()
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_tracker_rejects_illegal_transitions_and_duplicate_claims():
+    tracker = IssueTracker()
+    assert tracker.claim(7)
+    assert not tracker.claim(7)
+    tracker.transition(7, "preparing")
+    with pytest.raises(ValueError):
+        tracker.transition(7, "done")
+    tracker.transition(7, "failed")
+    assert not tracker.claim(7)
+    assert [s for s, _ in tracker.history(7)] == ["queued", "preparing", "failed"]
+
+
+def test_loop_keeps_generating_while_another_issue_waits_on_ci(monkeypatch, tmp_path):
+    monkeypatch.setattr(orchestrator, "LOG_PATH", str(tmp_path / "events.jsonl"))
+    monkeypatch.setattr(orchestrator, "LLM_SLOTS", FairSemaphore(1))
+    ci_released = threading.Event()
+    finished = []
+
+    def fake_process_issue(issue, tracker):
+        n = issue["number"]
+        tracker.transition(n, "preparing")
+        tracker.transition(n, "generating")
+        with orchestrator.LLM_SLOTS:
+            time.sleep(0.01)
+        tracker.transition(n, "pushing")
+        tracker.transition(n, "waiting_ci")
+        if n == 1:
+            # Issue 1's CI only finishes once every other issue is done.
+            assert ci_released.wait(5)
+        finished.append(n)
+        if len(finished) == 3:
+            ci_released.set()
+        if n == 3:
+            raise RuntimeError("boom")
+        return "done"
+
+    monkeypatch.setattr(orchestrator, "process_issue", fake_process_issue)
+    monkeypatch.setattr(orchestrator, "list_trigger_issues", lambda limit=5: [{"number": n} for n in (1, 2, 3, 4)])
+
+    tracker = orchestrator.run_loop(max_issues=4, interval=0, iterations=2)
+
+    assert finished[-1] == 1
+    assert {n: tracker.state(n) for n in (1, 2, 3, 4)} == {1: "done", 2: "done", 3: "failed", 4: "done"}
@@ -0,0 +1,145 @@
+import base64
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.error
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("GITHUB_TOKEN", "test")
+
+from orchestrator import orchestrator  # noqa: E402
+from orchestrator.concurrency import IssueTracker  # noqa: E402
+from orchestrator.webhook import MAX_BODY_BYTES, CIWaiter, WebhookReceiver, post_event  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures" / "webhooks"
+SHA = "9f2c1e7d4b3a5e6f708192a3b4c5d6e7f8091a2b"
+
+
+def _payload(name):
+    return json.loads((FIXTURES / f"{name}.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def receiver():
+    issues = []
+    waiter = CIWaiter()
+    r = WebhookReceiver(waiter, issues.append, "ai:dev", secret="s3cret")
+    port = r.start(port=0)
+    r.url = f"http://127.0.0.1:{port}/webhook"
+    r.issues = issues
+    yield r
+    r.stop()
+
+
+def test_recorded_payloads_are_dispatched(receiver):
+    assert post_event(receiver.url, "issues", _payload("issues_labeled"), "s3cret") == {"result": "issue_dispatched"}
+    assert post_event(receiver.url, "check_suite", _payload("check_suite_completed"), "s3cret") == {"result": "ci_notified"}
+    unlabelled = dict(_payload("issues_labeled"), label={"name": "bug"})
+    assert post_event(receiver.url, "issues", unlabelled, "s3cret") == {"result": "ignored"}
+    assert [i["number"] for i in receiver.issues] == [42]
+    assert receiver.waiter.wait(SHA, 0)
+
+
+def test_bad_signature_is_rejected(receiver):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        post_event(receiver.url, "issues", _payload("issues_labeled"), "wrong")
+    assert err.value.code == 401
+    assert receiver.issues == []
+
+
+def test_check_run_webhook_wakes_issue_waiting_on_ci(receiver, monkeypatch, tmp_path):
+    monkeypatch.setattr(orchestrator, "LOG_PATH", str(tmp_path / "events.jsonl"))
+    monkeypatch.setattr(orchestrator, "CI_WAITER", receiver.waiter)
+    monkeypatch.setattr(orchestrator, "ci_poll_seconds", 60)
+    calls = []
+    monkeypatch.setattr(orchestrator, "add_labels", lambda n, labels: calls.append(("labels", labels)))
+    monkeypatch.setattr(orchestrator, "comment", lambda n, body: calls.append(("comment", body)))
+    monkeypatch.setattr(orchestrator, "get_branch_head_sha", lambda branch: "base")
+    monkeypatch.setattr(orchestrator, "create_branch", lambda branch, sha: None)
+    monkeypatch.setattr(orchestrator, "get_file_content", lambda path, ref="main": "x = 1\n" * 50)
+    monkeypatch.setattr(orchestrator, "commit_files", lambda branch, files, message: "c0ffee")
+    monkeypatch.setattr(orchestrator, "generate_file_edits", lambda **kw: {"summary": "s", "files": [
+        {"path": "app/rules.py",
+         "content_b64": base64.b64encode(b"def load_policy(): ...\ndef evaluate(): ...\n" * 20).decode()}]})
+    monkeypatch.setattr(orchestrator, "open_pr", lambda *a: {"number": 7, "html_url": "pr-url", "head": {"sha": SHA}})
+    ci = {"done": False}
+    monkeypatch.setattr(orchestrator, "get_check_runs", lambda sha: (
+        {"status": "completed", "conclusion": "success", "runs": []} if ci["done"]
+        else {"status": "in_progress", "conclusion": None, "runs": []}))
+
+    def finish_ci():
+        time.sleep(0.2)
+        ci["done"] = True
+        post_event(receiver.url, "check_run", _payload("check_run_completed"), "s3cret")
+
+    threading.Thread(target=finish_ci).start()
+    start = time.monotonic()
+    outcome = orchestrator.process_issue(_payload("issues_labeled")["issue"])
+
+    assert outcome == "done"
+    assert time.monotonic() - start < 10        # not the 60s fallback poll
+    assert ("labels", ["ai:done"]) in calls
+
+
+@pytest.mark.parametrize("length,status", [("abc", 400), ("-5", 400), (str(MAX_BODY_BYTES + 1), 413)])
+def test_bad_content_length_is_rejected_before_reading(receiver, length, status):
+    conn = http.client.HTTPConnection(*receiver.server.server_address, timeout=5)
+    conn.putrequest("POST", "/webhook")
+    conn.putheader("X-GitHub-Event", "issues")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == status
+    conn.close()
+    assert receiver.issues == []
+
+
+def test_webhook_skips_closed_and_in_progress_issues(monkeypatch, tmp_path):
+    monkeypatch.setattr(orchestrator, "LOG_PATH", str(tmp_path / "events.jsonl"))
+    submitted = []
+
+    class Pool:
+        def submit(self, fn, issue, tracker):
+            submitted.append(issue["number"])
+
+    tracker = IssueTracker()
+    issue = _payload("issues_labeled")["issue"]
+    closed = dict(issue, number=1, state="closed")
+    busy = dict(issue, number=2, labels=issue["labels"] + [{"name": orchestrator.IN_PROGRESS_LABEL}])
+    for candidate in (closed, busy, issue):
+        orchestrator.schedule_from_webhook(candidate, Pool(), tracker)
+
+    assert submitted == [issue["number"]]
+    events = [json.loads(line) for line in open(tmp_path / "events.jsonl", encoding="utf-8")]
+    assert [(e["issue"], e["reason"]) for e in events if e["event"] == "webhook_issue_skipped"] == [
+        (1, "not_open_issue"), (2, "in_progress")]
+
+
+def test_unwatched_notifications_are_pruned():
+    waiter = CIWaiter(max_pending=3)
+    waiter.notify("watched")
+    assert waiter.wait("watched", 0)      # now watched: kept however many others arrive
+    for i in range(10):
+        waiter.notify(f"sha{i}")
+    assert set(waiter._events) == {"watched", "sha7", "sha8", "sha9"}
+    assert waiter.wait("sha9", 0) and not waiter.wait("sha0", 0)
+    waiter.forget("watched")
+    assert "watched" not in waiter._events
+
+
+@pytest.mark.parametrize("event,payload", [
+    ("issues", {"action": "labeled", "label": {"name": "ai:dev"}}),
+    ("issues", {"action": "labeled", "label": {"name": "ai:dev"}, "issue": {"title": "no number"}}),
+    ("issues", {"action": "labeled", "label": "ai:dev", "issue": {"number": 1}}),
+    ("check_run", {"action": "completed", "check_run": None}),
+    ("issues", [1, 2]),
+])
+def test_malformed_payload_gets_400(receiver, event, payload):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        post_event(receiver.url, event, payload, "s3cret")
+    assert err.value.code == 400
+    assert receiver.issues == []
@@ -0,0 +1,57 @@
+import json
+import os
+import threading
+
+from app.rules import clear_policy_cache, evaluate, get_policy, policy_cache_stats
+
+
+def _write_policy(path, threshold):
+    path.write_text(json.dumps({
+        "default_decision": "approve",
+        "rules": [{"id": "R1", "priority": 10, "decision": "reject", "reason": "low",
+                   "conditions": {"credit_score_lt": threshold}}],
+    }), encoding="utf-8")
+
+
+def test_get_policy_caches_until_file_changes(tmp_path):
+    clear_policy_cache()
+    path = tmp_path / "policy.json"
+    _write_policy(path, 620)
+
+    first = get_policy(path)
+    assert get_policy(path) is first
+    assert evaluate({"credit_score": 650}, first).decision == "approve"
+
+    # Same contents with a new mtime: revalidated by hash, not recompiled.
+    os.utime(path, ns=(1, 1))
+    assert get_policy(path) is first
+
+    _write_policy(path, 700)
+    os.utime(path, ns=(2, 2))
+    second = get_policy(path)
+    assert second is not first
+    assert evaluate({"credit_score": 650}, second).decision == "reject"
+
+    assert policy_cache_stats() == {"hits": 2, "misses": 1, "reloads": 1}
+
+
+def test_get_policy_is_consistent_across_threads(tmp_path):
+    clear_policy_cache()
+    path = tmp_path / "policy.json"
+    _write_policy(path, 620)
+    seen = []
+
+    def worker():
+        for _ in range(200):
+            seen.append(get_policy(path))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(p) for p in seen}) == 1
+    stats = policy_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["misses"] == 800
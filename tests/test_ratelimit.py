@@ -0,0 +1,127 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from orchestrator.ratelimit import RequestScheduler, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class LimitedServer:
+    """Answers each request with the next scripted (status, headers), then 200s."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.hits = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                fake.hits.append((self.command, self.path))
+                status, headers = fake.script.pop(0) if fake.script else (200, {})
+                body = json.dumps({"ok": status == 200}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _scheduler(clock, **kw):
+    return RequestScheduler(clock=clock, wall_clock=clock, sleep=clock.sleep, **kw)
+
+
+def _serve(script):
+    server = LimitedServer(script)
+    return server, requests.Session()
+
+
+def test_429_is_retried_after_retry_after(clock):
+    server, session = _serve([(429, {"Retry-After": "3"}), (429, {"Retry-After": "5"})])
+    events = []
+    s = _scheduler(clock, on_event=events.append)
+    r = s.call(session.request, "GET", f"{server.url}/repos/o/r/issues")
+    assert r.status_code == 200
+    assert len(server.hits) == 3
+    assert clock.slept == [3.0, 5.0]
+    assert [e["reason"] for e in events] == [429, 429]
+    server.server.shutdown()
+
+
+def test_mutations_retry_rate_limits_but_not_server_errors(clock):
+    server, session = _serve([(403, {"Retry-After": "1"}), (502, {})])
+    s = _scheduler(clock)
+    assert s.call(session.request, "POST", f"{server.url}/repos/o/r/git/trees", json={}).status_code == 502
+    assert [m for m, _ in server.hits] == ["POST", "POST"]
+    # A GET is idempotent, so a 502 is retried with backoff.
+    server.script = [(502, {})]
+    assert s.call(session.request, "GET", f"{server.url}/repos/o/r").status_code == 200
+    server.server.shutdown()
+
+
+def test_exhausted_budget_waits_for_reset(clock):
+    reset = str(int(clock.now) + 30)
+    server, session = _serve([(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset,
+                                     "X-RateLimit-Resource": "core"})])
+    s = _scheduler(clock)
+    s.call(session.request, "GET", f"{server.url}/repos/o/r")
+    s.call(session.request, "GET", f"{server.url}/repos/o/r")
+    assert pytest.approx(sum(clock.slept), abs=1.5) == 30
+    assert s.stats["budget_waits"] == 1
+    server.server.shutdown()
+
+
+def test_core_reads_leave_a_reserve_for_mutations(clock):
+    reset = str(int(clock.now) + 60)
+    server, session = _serve([(200, {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": reset})])
+    s = _scheduler(clock)
+    s.call(session.request, "GET", f"{server.url}/repos/o/r")
+    clock.slept.clear()
+    s.call(session.request, "POST", f"{server.url}/repos/o/r/issues/1/comments", json={})
+    assert sum(clock.slept) < 2            # mutation goes straight through
+    s.call(session.request, "GET", f"{server.url}/repos/o/r")
+    assert s.stats["budget_waits"] == 1    # the read waited for the reset
+    server.server.shutdown()
+
+
+def test_categories():
+    assert RequestScheduler.category("GET", "https://api.github.com/search/issues") == "search"
+    assert RequestScheduler.category("GET", "https://api.github.com/repos/o/r/pulls") == "core"
+    assert RequestScheduler.category("PATCH", "https://api.github.com/repos/o/r/git/refs/heads/x") == "mutation"
+
+
+def test_token_bucket_paces_after_the_burst(clock):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3:] == [pytest.approx(0.5), pytest.approx(0.5)]
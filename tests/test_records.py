@@ -0,0 +1,54 @@
+import sys
+
+import numpy as np
+import pytest
+
+from app.records import applicant_type
+from app.rules import DECISIONS, Decision, compile_policy, evaluate, evaluate_many, load_policy
+from benchmarks.generators import generate_applicants, generate_policy
+
+
+def test_decision_has_no_instance_dict():
+    d = Decision(decision="approve", reason_ids=[], reasons=[])
+    assert not hasattr(d, "__dict__")
+    assert d == Decision("approve", [], [])
+
+
+def test_applicant_records_evaluate_like_dicts():
+    source = generate_policy(200, seed=6)
+    for index in (False, True):
+        policy = compile_policy(source, index=index)
+        Applicant = applicant_type(policy.fields)
+        for a in generate_applicants(300, seed=6):
+            record = Applicant.from_dict(a)
+            assert policy.evaluate(record) == policy.evaluate(a)
+            assert evaluate(record, source) == evaluate(a, source)
+
+
+def test_applicant_record_behaves_like_a_partial_dict():
+    Applicant = applicant_type(["credit_score", "dti"])
+    a = Applicant(credit_score=700)
+    assert a.get("credit_score") == 700 and a.get("dti") is None and a.get("get") is None
+    assert "credit_score" in a and "dti" not in a
+    with pytest.raises(KeyError):
+        a["dti"]
+    assert a.to_dict() == {"credit_score": 700}
+    assert sys.getsizeof(a) < sys.getsizeof({"credit_score": 700, "dti": 0.3})
+    with pytest.raises(ValueError):
+        applicant_type(["class"])
+
+
+def test_evaluate_many_returns_compact_batch():
+    policy = compile_policy(load_policy())
+    applicants = list(generate_applicants(500, seed=8))
+
+    batch = evaluate_many(applicants, policy)
+
+    assert batch.codes.dtype == np.int8 and batch.rule_index.dtype == np.int32
+    expected = [evaluate(a, policy) for a in applicants]
+    assert list(batch.decisions(policy)) == expected
+    assert batch.decision(3, policy) == expected[3]
+    assert [DECISIONS[c] for c in batch.codes] == [d.decision for d in expected]
+    assert sum(batch.counts().values()) == len(applicants)
+    codes, rule_index = batch
+    assert codes is batch.codes and rule_index is batch.rule_index
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from app.rules import compile_policy, evaluate
+
+
+def _random_policy(rng, n_rules):
+    fields = ["credit_score", "dti", "income", "age"]
+    rules = []
+    for i in range(n_rules):
+        conditions = {}
+        for field in rng.sample(fields, rng.randint(1, 2)):
+            op = rng.choice(["lt", "gt"])
+            conditions[f"{field}_{op}"] = rng.randint(0, 100)
+        if rng.random() < 0.2:
+            conditions["region_eq"] = rng.choice(["EU", "US"])
+        if rng.random() < 0.1:
+            conditions["defaults_past_24m"] = True
+        rules.append({"id": f"R{i}", "priority": rng.randint(0, 1000), "decision": rng.choice(["reject", "refer"]),
+                      "reason": "", "conditions": conditions})
+    rules.sort(key=lambda r: r["priority"])
+    return {"default_decision": "approve", "rules": rules}
+
+
+def _random_applicant(rng):
+    def value():
+        return rng.choice([None, float("nan"), rng.randint(-5, 105), rng.uniform(0, 100)])
+
+    return {
+        "credit_score": value(), "dti": value(), "income": value(), "age": value(),
+        "region": rng.choice([None, "EU", "US", "APAC"]),
+        "defaults_past_24m": rng.choice([True, False, 1, None]),
+    }
+
+
+def test_index_agrees_with_linear_scan():
+    rng = random.Random(11)
+    for n_rules in (1, 10, 300):
+        policy = _random_policy(rng, n_rules)
+        indexed = compile_policy(policy, index=True)
+        linear = compile_policy(policy, index=False)
+        assert indexed.index is not None and linear.index is None
+        for _ in range(500):
+            applicant = _random_applicant(rng)
+            assert indexed.evaluate(applicant) == linear.evaluate(applicant), applicant
+
+
+def test_index_falls_back_to_linear_scan_for_unparseable_values():
+    policy = {"rules": [
+        {"id": "A", "priority": 1, "decision": "reject", "conditions": {"flag": True}},
+        {"id": "B", "priority": 2, "decision": "reject", "conditions": {"score_lt": 5}},
+    ]}
+    indexed = compile_policy(policy, index=True)
+
+    assert indexed.evaluate({"flag": True, "score": "n/a"}).reason_ids == ["A"]
+
+
+def test_large_policies_are_indexed_by_default():
+    policy = _random_policy(random.Random(3), 100)
+    assert compile_policy(policy).index is not None
+
+
+def test_unhashable_eq_values_are_left_to_the_predicates():
+    rules = [{"id": f"R{i}", "priority": i, "decision": "reject", "conditions": {"score_lt": i}} for i in range(70)]
+    rules.append({"id": "T", "priority": 70, "decision": "refer", "conditions": {"tags_eq": ["a"]}})
+    policy = {"default_decision": "approve", "rules": rules}
+    indexed = compile_policy(policy)
+    assert indexed.index is not None
+
+    assert indexed.evaluate({"score": 500, "tags": ["a"]}).reason_ids == ["T"]
+    assert indexed.evaluate({"score": 500, "tags": ["b"]}).reason_ids == []
+    assert indexed.evaluate({"score": 500, "tags": "a"}).reason_ids == []
+    assert indexed.evaluate({"score": 500}).reason_ids == []
+    assert evaluate({"score": 500, "tags": ["a"]}, policy).reason_ids == ["T"]
+
+
+def test_huge_ints_fall_back_to_the_linear_scan():
+    rules = [{"id": f"R{i}", "priority": i, "decision": "reject", "conditions": {"flag": i}} for i in range(70)]
+    rules.append({"id": "S", "priority": 70, "decision": "refer", "conditions": {"score_gt": 5}})
+    indexed = compile_policy({"rules": rules})
+    linear = compile_policy({"rules": rules}, index=False)
+    assert indexed.index.candidates({"score": 10 ** 400}) is None
+    with pytest.raises(OverflowError):
+        linear.evaluate({"score": 10 ** 400})
+    with pytest.raises(OverflowError):
+        indexed.evaluate({"score": 10 ** 400})
@@ -1,7 +1,7 @@
 import json
 from pathlib import Path
 
-from app.rules import evaluate, load_policy
+from app.rules import compile_policy, evaluate, load_policy
 
 ROOT = Path(__file__).resolve().parents[1]
 
@@ -14,4 +14,79 @@ def test_golden_cases_match_expected():
     for case in cases:
         out = evaluate(case["input"], policy=policy)
         assert out.decision == case["expected"]["decision"], f"Case {case['name']} decision mismatch"
-        assert out.reason_ids == case["expected"]["reason_ids"], f"Case {case['name']} reasons mismatch"
\ No newline at end of file
+        assert out.reason_ids == case["expected"]["reason_ids"], f"Case {case['name']} reasons mismatch"
+
+def test_compiled_policy_matches_golden_cases():
+    policy = compile_policy(load_policy(ROOT / "docs" / "policy.json"))
+
+    cases = json.loads((ROOT / "docs" / "golden_cases.json").read_text(encoding="utf-8"))
+
+    for case in cases:
+        out = evaluate(case["input"], policy=policy)
+        assert out.decision == case["expected"]["decision"], f"Case {case['name']} decision mismatch"
+        assert out.reason_ids == case["expected"]["reason_ids"], f"Case {case['name']} reasons mismatch"
+
+
+def test_compiled_policy_agrees_with_interpreted_rules():
+    policy = {
+        "default_decision": "approve",
+        "rules": [
+            {"id": "A", "priority": 1, "decision": "reject", "reason": "a",
+             "conditions": {"score_lt": 500, "region_eq": "EU"}},
+            {"id": "B", "priority": 2, "decision": "refer", "reason": "b",
+             "conditions": {"score_gt": 800, "flagged": True}},
+            {"id": "C", "priority": 3, "decision": "reject", "reason": "c",
+             "conditions": {"dti_gt": 0.4, "dti_lt": 0.6, "score_lt": 700}},
+        ],
+    }
+    compiled = compile_policy(policy)
+    applicants = [
+        {},
+        {"score": None, "dti": 0.5},
+        {"score": 400, "region": "EU"},
+        {"score": 400, "region": "US"},
+        {"score": 900, "flagged": True},
+        {"score": 900, "flagged": 1},
+        {"score": "650", "dti": "0.5"},
+        {"score": float("nan"), "dti": float("nan"), "region": "EU"},
+    ]
+    for applicant in applicants:
+        assert evaluate(applicant, compiled) == evaluate(applicant, policy), applicant
+
+
+def test_all_mode_reports_every_match_with_most_severe_decision():
+    policy = load_policy(ROOT / "docs" / "policy.json")
+    applicant = {"credit_score": 600, "dti": 0.5, "income": 20000, "defaults_past_24m": True}
+    refer_only = {"credit_score": 700, "dti": 0.3, "income": 20000, "defaults_past_24m": False}
+
+    for p in (policy, compile_policy(policy)):
+        out = evaluate(applicant, policy=p, mode="all")
+        assert out.decision == "reject"
+        assert out.reason_ids == ["R4", "R1", "R2", "R3"]
+
+        early = evaluate(applicant, policy=p, mode="severity")
+        assert early.decision == "reject"
+        assert early.reason_ids == ["R4"]
+
+        assert evaluate(refer_only, policy=p, mode="all").reason_ids == ["R3"]
+        assert evaluate(refer_only, policy=p, mode="all").decision == "refer"
+
+
+def test_all_mode_evaluates_shared_predicates_once():
+    class CountingApplicant(dict):
+        lookups = 0
+
+        def get(self, key, default=None):
+            CountingApplicant.lookups += 1
+            return super().get(key, default)
+
+    policy = compile_policy({"rules": [
+        {"id": f"R{i}", "priority": i, "decision": "refer", "conditions": {"score_lt": 600, f"flag{i}": True}}
+        for i in range(5)
+    ]})
+    assert len(policy.predicates) == 6
+
+    out = evaluate(CountingApplicant(score=500, flag1=True, flag3=True), policy=policy, mode="all")
+
+    assert out.reason_ids == ["R1", "R3"]
+    assert CountingApplicant.lookups == 6
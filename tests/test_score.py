@@ -0,0 +1,88 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from app.rules import compile_policy, evaluate, load_policy
+from app.score import main, read_chunks, score_file_parallel, score_stream, shard_ranges
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _golden_inputs():
+    cases = json.loads((ROOT / "docs" / "golden_cases.json").read_text(encoding="utf-8"))
+    return [dict(c["input"], id=c["name"]) for c in cases]
+
+
+def test_read_chunks_bounds_chunk_size_and_skips_blank_lines():
+    lines = ['{"a": 1}\n', "\n", '{"a": 2}\n', '{"a": 3}\n']
+    assert [len(c) for c in read_chunks(lines, chunk_size=2)] == [2, 1]
+
+
+def test_score_stream_matches_evaluate():
+    policy = compile_policy(load_policy())
+    applicants = _golden_inputs()
+    out = io.StringIO()
+
+    count = score_stream((json.dumps(a) + "\n" for a in applicants), out, policy, chunk_size=2)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == len(applicants) == len(records)
+    for applicant, record in zip(applicants, records):
+        expected = evaluate(applicant, policy)
+        assert record == {"id": applicant["id"], "decision": expected.decision,
+                          "reason_ids": expected.reason_ids, "reasons": expected.reasons}
+
+
+def test_main_reads_and_writes_files(tmp_path, capsys):
+    src = tmp_path / "in.jsonl"
+    dst = tmp_path / "out.jsonl"
+    src.write_text("".join(json.dumps(a) + "\n" for a in _golden_inputs()), encoding="utf-8")
+
+    assert main([str(src), "-o", str(dst), "--chunk-size", "3"]) == 0
+
+    decisions = [json.loads(line)["decision"] for line in dst.read_text(encoding="utf-8").splitlines()]
+    assert decisions == ["reject", "reject", "reject", "refer", "approve"]
+    assert "records/s" in capsys.readouterr().err
+
+
+def test_chunk_size_below_one_is_rejected(tmp_path, capsys):
+    policy = compile_policy(load_policy())
+    for size in (0, -1):
+        with pytest.raises(ValueError, match="chunk_size"):
+            score_stream(['{"a": 1}\n'], io.StringIO(), policy, chunk_size=size)
+    src = tmp_path / "in.jsonl"
+    src.write_text('{"a": 1}\n', encoding="utf-8")
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(src), "--chunk-size", "0"])
+    assert exit_info.value.code == 2
+    assert "--chunk-size" in capsys.readouterr().err
+
+
+def test_shard_ranges_cover_file_on_line_boundaries(tmp_path):
+    path = tmp_path / "in.jsonl"
+    lines = [json.dumps({"n": i, "pad": "x" * (i % 7)}) + "\n" for i in range(100)]
+    path.write_text("".join(lines), encoding="utf-8")
+    data = path.read_bytes()
+
+    ranges = shard_ranges(path, 8)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+
+
+def test_parallel_scoring_matches_serial(tmp_path):
+    src = tmp_path / "in.jsonl"
+    applicants = [dict(a, id=f"{a['id']}-{i}") for i in range(40) for a in _golden_inputs()]
+    src.write_text("".join(json.dumps(a) + "\n" for a in applicants), encoding="utf-8")
+
+    serial, parallel = io.StringIO(), io.StringIO()
+    policy_source = load_policy()
+    with open(src, encoding="utf-8") as lines:
+        score_stream(lines, serial, compile_policy(policy_source))
+    count = score_file_parallel(src, parallel, policy_source, workers=2, chunk_size=7)
+
+    assert count == len(applicants)
+    assert parallel.getvalue() == serial.getvalue()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+from dataclasses import asdict
+
+import pytest
+
+from app.rules import compile_policy, evaluate, load_policy
+from app.server import MAX_BODY_BYTES, ScoringService, _first_matches, serve
+from benchmarks.loadgen import run_load
+
+
+def _write_policy(path, threshold, stamp):
+    path.write_text(json.dumps({"version": str(threshold), "default_decision": "approve", "rules": [
+        {"id": "R1", "priority": 1, "decision": "reject", "reason": "low", "conditions": {"credit_score_lt": threshold}},
+    ]}), encoding="utf-8")
+    os.utime(path, ns=(stamp, stamp))
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(b"%s %s HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s"
+                 % (method.encode(), path.encode(), len(body), body))
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+def test_single_bulk_and_error_requests():
+    policy = compile_policy(load_policy())
+    applicants = [{"credit_score": 600}, {"credit_score": 700, "dti": 0.5}, {"credit_score": 700, "income": 90000}]
+
+    async def scenario():
+        server = await serve(ScoringService(max_batch=8), port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            singles = await asyncio.gather(*(_request(port, "POST", "/evaluate", a) for a in applicants))
+            bulk = await _request(port, "POST", "/evaluate/bulk", applicants)
+            errors = [await _request(port, "POST", "/evaluate", [1]),
+                      await _request(port, "GET", "/evaluate"),
+                      await _request(port, "GET", "/nope")]
+            health = await _request(port, "GET", "/healthz")
+        finally:
+            server.close()
+        return singles, bulk, errors, health
+
+    singles, bulk, errors, health = asyncio.run(scenario())
+
+    expected = [asdict(evaluate(a, policy)) for a in applicants]
+    assert [body for status, body in singles] == expected
+    assert bulk == (200, expected)
+    assert [status for status, _ in errors] == [400, 405, 404]
+    assert health[0] == 200 and health[1]["batched_applicants"] == 3
+
+
+@pytest.mark.parametrize("length,status", [("abc", 400), ("-5", 400), (str(MAX_BODY_BYTES + 1), 413)])
+def test_bad_content_length_is_answered(length, status):
+    async def scenario():
+        server = await serve(ScoringService(), port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /evaluate HTTP/1.1\r\nContent-Length: %s\r\n\r\n" % length.encode())
+            data = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+        finally:
+            server.close()
+        return int(data.split(b" ")[1])
+
+    assert asyncio.run(scenario()) == status
+
+
+def test_batches_are_vectorized_with_first_match_results(monkeypatch):
+    monkeypatch.setattr("app.server.VECTORIZE_MIN_BATCH", 8)
+    monkeypatch.setattr("app.server.VECTORIZE_MIN_RULES", 1)
+    policy = compile_policy({"default_decision": "approve", "rules": [
+        {"id": "A", "priority": 1, "decision": "reject", "conditions": {"score_lt": 500, "region_eq": "EU"}},
+        {"id": "B", "priority": 2, "decision": "refer", "conditions": {"score_gt": 800, "flagged": True}},
+        {"id": "C", "priority": 3, "decision": "reject", "conditions": {"dti_gt": 0.4, "dti_lt": 0.6}},
+    ]})
+    applicants = [{}, {"score": None, "dti": 0.5}, {"score": 400, "region": "EU"}, {"score": 400, "region": "US"},
+                  {"score": 900, "flagged": True}, {"score": 900, "flagged": 1}, {"score": 900, "flagged": "yes"},
+                  {"dti": True}, {"score": 450, "region": "EU", "dti": 0.5}]
+    assert _first_matches(policy, applicants) == [policy.first_match(a) for a in applicants]
+    # Unhashable _eq values, strings/NaN in _lt/_gt fields and overflowing
+    # numbers are left to first_match().
+    assert _first_matches(policy, applicants[:6] + [{"flagged": [1]}] * 4) is None
+    assert _first_matches(policy, applicants[:6] + [{"dti": "0.5"}] * 4) is None
+    assert _first_matches(policy, applicants[:6] + [{"dti": float("nan")}] * 4) is None
+    assert _first_matches(policy, applicants[:8] + [{"score": 10 ** 400}]) is None
+    assert _first_matches(policy, applicants[:7]) is None     # too small to pay off
+
+
+def test_full_queue_answers_503():
+    async def scenario():
+        service = ScoringService(max_queue=1)
+        service.policy()
+        service._queue = asyncio.Queue(1)      # no batcher running: the queue never drains
+        first = asyncio.ensure_future(service.handle("POST", "/evaluate", b'{"credit_score": 700}'))
+        await asyncio.sleep(0)
+        status, _ = await service.handle("POST", "/evaluate", b'{"credit_score": 700}')
+        first.cancel()
+        return status, service.stats["rejected"]
+
+    assert asyncio.run(scenario()) == (503, 1)
+
+
+def test_policy_change_is_picked_up(tmp_path):
+    path = tmp_path / "policy.json"
+    _write_policy(path, 620, 1)
+
+    async def scenario():
+        server = await serve(ScoringService(path, batch_window=0), port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            before = await _request(port, "POST", "/evaluate", {"credit_score": 650})
+            _write_policy(path, 700, 2)
+            after = await _request(port, "POST", "/evaluate", {"credit_score": 650})
+            _write_policy(path, 700, 3)
+            path.write_text("{not json", encoding="utf-8")
+            os.utime(path, ns=(4, 4))
+            broken = await _request(port, "POST", "/evaluate", {"credit_score": 650})
+        finally:
+            server.close()
+        return before, after, broken
+
+    before, after, broken = asyncio.run(scenario())
+    assert before[1]["decision"] == "approve"
+    assert after[1]["decision"] == "reject"
+    assert broken[1]["decision"] == "reject"     # last good policy keeps serving
+
+
+def test_loadgen_against_server():
+    async def scenario():
+        server = await serve(ScoringService(), port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await run_load("127.0.0.1", port, connections=4, duration=0.3)
+        finally:
+            server.close()
+
+    result = asyncio.run(scenario())
+    assert result["requests"] > 0 and result["errors"] == 0
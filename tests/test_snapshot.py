@@ -0,0 +1,59 @@
+import json
+
+from app.rules import compile_policy, load_policy, load_snapshot, save_snapshot
+from benchmarks.generators import generate_applicants, generate_policy
+
+
+def _write(path, policy):
+    path.write_text(json.dumps(policy), encoding="utf-8")
+
+
+def test_snapshot_round_trip_matches_json_compile(tmp_path):
+    for n_rules in (4, 200):   # generated matcher and RuleIndex
+        policy_path = tmp_path / f"policy-{n_rules}.json"
+        snap_path = tmp_path / f"policy-{n_rules}.snap"
+        _write(policy_path, generate_policy(n_rules, seed=n_rules))
+
+        save_snapshot(snap_path, policy_path)
+        loaded = load_snapshot(snap_path, policy_path)
+        expected = compile_policy(load_policy(policy_path))
+
+        assert loaded.source == expected.source
+        assert (loaded.index is None) == (expected.index is None)
+        for applicant in generate_applicants(300, seed=1):
+            assert loaded.evaluate(applicant) == expected.evaluate(applicant)
+            assert loaded.evaluate_all(applicant) == expected.evaluate_all(applicant)
+
+
+def test_stale_or_corrupt_snapshot_falls_back_to_json(tmp_path):
+    policy_path = tmp_path / "policy.json"
+    snap_path = tmp_path / "policy.snap"
+    rule = {"id": "R1", "priority": 1, "decision": "reject", "reason": "", "conditions": {"score_lt": 600}}
+    _write(policy_path, {"rules": [rule]})
+    save_snapshot(snap_path, policy_path)
+
+    rule["conditions"]["score_lt"] = 700
+    _write(policy_path, {"rules": [rule]})
+    assert load_snapshot(snap_path, policy_path).evaluate({"score": 650}).decision == "reject"
+    # The fallback rewrote the snapshot for the new contents.
+    assert load_snapshot(snap_path, policy_path, refresh=False).evaluate({"score": 650}).decision == "reject"
+
+    snap_path.write_bytes(b"garbage")
+    assert load_snapshot(snap_path, policy_path).evaluate({"score": 650}).decision == "reject"
+    assert load_snapshot(tmp_path / "missing.snap", policy_path, refresh=False).rules[0].id == "R1"
+
+
+def test_truncated_snapshot_is_recompiled_and_rewritten(tmp_path):
+    policy_path = tmp_path / "policy.json"
+    snap_path = tmp_path / "policy.snap"
+    _write(policy_path, generate_policy(200, seed=3))
+    save_snapshot(snap_path, policy_path)
+    full = snap_path.read_bytes()
+    expected = compile_policy(load_policy(policy_path))
+    applicants = list(generate_applicants(50, seed=2))
+
+    for cut in (len(full) // 2, len(full) - 1):
+        snap_path.write_bytes(full[:cut])
+        loaded = load_snapshot(snap_path, policy_path)
+        assert [loaded.evaluate(a) for a in applicants] == [expected.evaluate(a) for a in applicants]
+        assert snap_path.read_bytes() == full